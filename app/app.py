@@ -1,27 +1,37 @@
 """FastAPI 应用入口"""
 
 import logging
+from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from prometheus_client import REGISTRY
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from app.config import settings
-from app.scanner import JobScanner, RouterScanner
+from app.core.metrics import ConnectionPoolCollector, HttpClientPoolCollector
 from app.core.middlewares import RequestLoggingMiddleware
 from app.core.shared import (
+    http_clients,
     httpx_async_client,
     httpx_sync_client,
-    scheduler,
     postgres_async_pool,
     postgres_checkpointer,
+    scheduler,
+    shutdown_hooks,
+    startup_hooks,
 )
+from app.scanner import JobScanner, RouterScanner
 
 logger = logging.getLogger(__name__)
 
+# 自定义采集器在模块级注册到全局 REGISTRY，create_app 被多次调用（测试、reload）时不会重复注册
+if settings.enable_metrics:
+    REGISTRY.register(ConnectionPoolCollector([postgres_async_pool]))
+    REGISTRY.register(HttpClientPoolCollector(http_clients))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
@@ -38,8 +48,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     if scheduled_jobs:
         scheduler.start()
 
-    await postgres_async_pool.open()
+    # 预热连接池到 min_size 后再接收请求
+    await postgres_async_pool.open(wait=True, timeout=settings.postgres_pool_timeout)
     await postgres_checkpointer.setup()
+    await http_clients.warmup()
+    for hook in startup_hooks:
+        await hook()
 
     logger.info("Application startup completed")
 
@@ -49,6 +63,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("Shutting down application")
 
     await httpx_async_client.aclose()
+    await http_clients.aclose()
     httpx_sync_client.close()
 
     await postgres_async_pool.close()
@@ -56,6 +71,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     if scheduler.running:
         scheduler.shutdown()
 
+    for hook in shutdown_hooks:
+        await hook()
+
     logger.info("Application shutdown completed")
 
 
@@ -51,6 +51,14 @@ class GlobalSettings(BaseSettings):
     postgres_db: str = Field(default="postgres", description="PostgreSQL 数据库名")
     postgres_sslmode: str = Field(default="disable", description="PostgreSQL SSL 模式")
 
+    # PostgreSQL 连接池配置（每个 worker 一个连接池，总连接数上限为 workers * postgres_pool_max_size）
+    postgres_pool_min_size: int = Field(default=2, description="连接池最小连接数，启动时预热到该数量")
+    postgres_pool_max_size: int = Field(default=10, description="连接池最大连接数")
+    postgres_pool_timeout: float = Field(default=30.0, description="获取连接的超时时间（秒），启动预热同样使用该超时")
+    postgres_pool_max_waiting: int = Field(default=0, description="等待连接的最大请求数，超出时立即失败，0 表示不限制")
+    postgres_pool_max_idle: float = Field(default=600.0, description="超过最小连接数的空闲连接保留时间（秒）")
+    postgres_pool_max_lifetime: float = Field(default=3600.0, description="连接最长存活时间（秒），到期后替换")
+
     @property
     def postgres_url(self) -> str:
         """PostgreSQL 连接 URL，供全局连接池使用。"""
@@ -0,0 +1,212 @@
+"""按上游划分的 HTTP 客户端：每个上游独立的连接池、超时与指标，避免慢上游占满其他上游的连接。"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.metrics import (
+    HTTP_CLIENT_REQUEST_SECONDS,
+    HTTP_CLIENT_REQUESTS,
+    HTTP_CLIENT_REQUESTS_IN_FLIGHT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """响应体读完或关闭时归还连接计数的响应流。"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    记录请求数、耗时（到响应头）与并发数的 transport。
+
+    连接池统计在请求边界上自行维护（不读取 httpcore 内部状态）：请求从发出到响应体关闭期间占用一个连接，
+    超过 max_connections 的请求视为排队；请求结束后连接作为空闲保活连接保留 keepalive_expiry 秒
+    （最多 max_keepalive_connections 个），新请求优先复用空闲连接。HTTP/2 多路复用时为近似值。
+    """
+
+    def __init__(self, name: str, transport: httpx.AsyncBaseTransport, limits: httpx.Limits) -> None:
+        self.name = name
+        self.transport = transport
+        self._limits = limits
+        self._in_flight = 0
+        # 空闲保活连接的释放时间，栈顶为最近释放的连接
+        self._idle_since: list[float] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started_at = time.perf_counter()
+        in_flight = HTTP_CLIENT_REQUESTS_IN_FLIGHT.labels(client=self.name)
+        in_flight.inc()
+        self._acquire()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException as e:
+            self._release()
+            if isinstance(e, httpx.TransportError):
+                HTTP_CLIENT_REQUESTS.labels(client=self.name, status=e.__class__.__name__).inc()
+            raise
+        finally:
+            in_flight.dec()
+            HTTP_CLIENT_REQUEST_SECONDS.labels(client=self.name).observe(time.perf_counter() - started_at)
+        HTTP_CLIENT_REQUESTS.labels(client=self.name, status=str(response.status_code)).inc()
+        if response.is_closed:
+            # 响应体已在 transport 内读完（如 MockTransport）
+            self._release()
+        else:
+            response.stream = _ReleasingStream(response.stream, self._release_once())
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    def connection_stats(self) -> dict[str, int]:
+        """连接池中的连接数（总数/空闲）与排队请求数。"""
+        self._expire_idle()
+        max_connections = self._limits.max_connections
+        active = self._in_flight if max_connections is None else min(self._in_flight, max_connections)
+        return {
+            "connections": active + len(self._idle_since),
+            "idle": len(self._idle_since),
+            "queued": self._in_flight - active,
+        }
+
+    def _acquire(self) -> None:
+        self._expire_idle()
+        if self._idle_since:
+            self._idle_since.pop()
+        self._in_flight += 1
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        max_keepalive = self._limits.max_keepalive_connections
+        if max_keepalive is None or len(self._idle_since) < max_keepalive:
+            self._idle_since.append(time.monotonic())
+
+    def _release_once(self) -> Callable[[], None]:
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self._release()
+
+        return release
+
+    def _expire_idle(self) -> None:
+        expiry = self._limits.keepalive_expiry
+        if expiry is not None:
+            deadline = time.monotonic() - expiry
+            self._idle_since = [idle_since for idle_since in self._idle_since if idle_since > deadline]
+
+
+class HttpClientRegistry:
+    """具名 HTTP 客户端注册表：各服务在 shared.py 中注册上游客户端，应用启动时统一预热、关闭时统一释放。"""
+
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._transports: dict[str, InstrumentedTransport] = {}
+        self._warmup: dict[str, tuple[str, int]] = {}
+
+    def register(
+        self,
+        name: str,
+        url: str = "",
+        *,
+        max_connections: int = 50,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        connect_timeout: float = 3.0,
+        pool_timeout: float = 5.0,
+        http2: bool = False,
+        warmup_connections: int = 0,
+        warmup_path: str = "/",
+    ) -> httpx.AsyncClient:
+        """
+        注册并返回一个上游客户端，同名客户端只创建一次。
+
+        Args:
+            name: 客户端名称，作为指标的 client 标签。
+            url: 上游地址，用于启动时预热连接。
+            max_connections: 最大连接数。
+            max_keepalive_connections: 最大保活连接数。
+            keepalive_expiry: 空闲保活连接的过期时间（秒）。
+            timeout: 默认读写超时（秒），请求可单独覆盖。
+            connect_timeout: 建立连接超时（秒）。
+            pool_timeout: 等待连接池空闲连接的超时（秒），超时抛出 httpx.PoolTimeout。
+            http2: 是否启用 HTTP/2（需安装 h2，未安装时回退到 HTTP/1.1）。
+            warmup_connections: 启动时预先建立的连接数。
+            warmup_path: 预热时发送 HEAD 请求的路径，上游根路径需要鉴权或有副作用时可改为健康检查路径。
+        """
+        if name in self._clients:
+            return self._clients[name]
+
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning(f"HTTP client {name}: h2 is not installed, falling back to HTTP/1.1")
+                http2 = False
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        transport = InstrumentedTransport(name, httpx.AsyncHTTPTransport(limits=limits, http2=http2), limits)
+        client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout, pool=pool_timeout),
+        )
+        self._clients[name] = client
+        self._transports[name] = transport
+        if url and warmup_connections > 0:
+            parts = urlsplit(url)
+            self._warmup[name] = (f"{parts.scheme}://{parts.netloc}/{warmup_path.lstrip('/')}", warmup_connections)
+        return client
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        return self._clients[name]
+
+    def transports(self) -> dict[str, InstrumentedTransport]:
+        return dict(self._transports)
+
+    async def warmup(self) -> None:
+        """并发向各上游的预热路径发送 HEAD 请求以预先建立保活连接，失败只记录日志。"""
+
+        async def warmup_client(name: str, url: str, connections: int) -> None:
+            results = await asyncio.gather(
+                *(self._clients[name].head(url) for _ in range(connections)), return_exceptions=True
+            )
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                logger.warning(f"HTTP client {name}: {len(errors)}/{connections} warmup requests failed: {errors[0]!r}")
+            else:
+                logger.info(f"HTTP client {name}: {connections} connections warmed up")
+
+        await asyncio.gather(
+            *(warmup_client(name, url, connections) for name, (url, connections) in self._warmup.items())
+        )
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(client.aclose() for client in self._clients.values()))
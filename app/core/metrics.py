@@ -0,0 +1,107 @@
+"""全局 Prometheus 指标与采集器，随 /metrics 一起暴露。"""
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, ClassVar
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from psycopg_pool import AsyncConnectionPool
+
+if TYPE_CHECKING:
+    from app.core.http import HttpClientRegistry
+
+HTTP_CLIENT_REQUESTS = Counter(
+    "http_client_requests_total",
+    "上游 HTTP 请求数，按客户端与状态码（或传输异常类型，如 PoolTimeout）区分",
+    ["client", "status"],
+)
+
+HTTP_CLIENT_REQUEST_SECONDS = Histogram(
+    "http_client_request_seconds",
+    "上游 HTTP 请求耗时（含等待连接，到收到响应头为止）",
+    ["client"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+HTTP_CLIENT_REQUESTS_IN_FLIGHT = Gauge(
+    "http_client_requests_in_flight",
+    "正在进行的上游 HTTP 请求数",
+    ["client"],
+)
+
+
+class ConnectionPoolCollector(Collector):
+    """采集 psycopg 连接池统计信息（get_stats 不会清零累计值），未打开或已关闭的连接池不上报。"""
+
+    _GAUGES: ClassVar[dict[str, tuple[str, str]]] = {
+        "pool_min": ("db_pool_min_size", "连接池最小连接数"),
+        "pool_max": ("db_pool_max_size", "连接池最大连接数"),
+        "pool_size": ("db_pool_size", "连接池当前连接数（含使用中与建立中）"),
+        "pool_available": ("db_pool_available", "连接池空闲连接数"),
+        "requests_waiting": ("db_pool_requests_waiting", "正在等待连接的请求数"),
+    }
+    _COUNTERS: ClassVar[dict[str, tuple[str, str]]] = {
+        "requests_num": ("db_pool_requests", "获取连接的请求数"),
+        "requests_queued": ("db_pool_requests_queued", "需要排队等待连接的请求数"),
+        "requests_errors": ("db_pool_requests_errors", "获取连接失败的请求数（超时、排队已满等）"),
+        "connections_num": ("db_pool_connections", "建立的连接数"),
+        "connections_errors": ("db_pool_connections_errors", "建立连接失败次数"),
+        "connections_lost": ("db_pool_connections_lost", "检查时发现已断开的连接数"),
+        "returns_bad": ("db_pool_returns_bad", "归还时状态异常被丢弃的连接数"),
+    }
+    _DURATIONS: ClassVar[dict[str, tuple[str, str]]] = {
+        "requests_wait_ms": ("db_pool_requests_wait_seconds", "请求等待连接的累计时间（秒）"),
+        "usage_ms": ("db_pool_usage_seconds", "连接被占用的累计时间（秒）"),
+        "connections_ms": ("db_pool_connections_seconds", "建立连接的累计时间（秒）"),
+    }
+
+    def __init__(self, pools: list[AsyncConnectionPool]) -> None:
+        self._pools = pools
+
+    def collect(self) -> Iterable[Metric]:
+        gauges = {key: GaugeMetricFamily(name, doc, labels=["pool"]) for key, (name, doc) in self._GAUGES.items()}
+        counters = {
+            key: CounterMetricFamily(name, doc, labels=["pool"])
+            for key, (name, doc) in (self._COUNTERS | self._DURATIONS).items()
+        }
+        in_use = GaugeMetricFamily("db_pool_in_use", "使用中的连接数（含建立中）", labels=["pool"])
+
+        for pool in self._pools:
+            # 未打开的连接池 pool_size 按 min_size 计算，上报会被误读为连接全部在使用中
+            if pool.closed:
+                continue
+            stats = pool.get_stats()
+            labels = [pool.name]
+            for key, gauge in gauges.items():
+                gauge.add_metric(labels, stats.get(key, 0))
+            for key, counter in counters.items():
+                value = stats.get(key, 0)
+                counter.add_metric(labels, value / 1000 if key in self._DURATIONS else value)
+            in_use.add_metric(labels, stats.get("pool_size", 0) - stats.get("pool_available", 0))
+
+        yield from gauges.values()
+        yield in_use
+        yield from counters.values()
+
+
+class HttpClientPoolCollector(Collector):
+    """采集各上游 HTTP 客户端连接池的连接数与排队请求数。"""
+
+    def __init__(self, registry: "HttpClientRegistry") -> None:
+        self._registry = registry
+
+    def collect(self) -> Iterable[Metric]:
+        connections = GaugeMetricFamily("http_client_pool_connections", "连接池当前连接数", labels=["client"])
+        idle = GaugeMetricFamily("http_client_pool_idle_connections", "连接池空闲连接数", labels=["client"])
+        queued = GaugeMetricFamily("http_client_pool_queued_requests", "等待空闲连接的请求数", labels=["client"])
+
+        for name, transport in self._registry.transports().items():
+            stats = transport.connection_stats()
+            connections.add_metric([name], stats["connections"])
+            idle.add_metric([name], stats["idle"])
+            queued.add_metric([name], stats["queued"])
+
+        yield connections
+        yield idle
+        yield queued
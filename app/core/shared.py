@@ -1,19 +1,36 @@
-from httpx import AsyncClient, Client
+from collections.abc import Awaitable, Callable
+
 from apscheduler.schedulers.background import BackgroundScheduler
-from psycopg_pool import AsyncConnectionPool
+from httpx import AsyncClient, Client
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg_pool import AsyncConnectionPool
 
 from app.config import settings
+from app.core.http import HttpClientRegistry
 
 httpx_async_client = AsyncClient()
 httpx_sync_client = Client()
 
+# 各服务的上游客户端在本服务 shared.py 中注册，见 HttpClientRegistry
+http_clients = HttpClientRegistry()
+
+# 各服务注册的启动预热钩子（异步函数），在 lifespan 中依次执行
+startup_hooks: list[Callable[[], Awaitable[None]]] = []
+
+# 各服务注册的关闭钩子（异步函数），在 lifespan 中定时任务停止后依次执行
+shutdown_hooks: list[Callable[[], Awaitable[None]]] = []
+
 scheduler = BackgroundScheduler()
 
 postgres_async_pool = AsyncConnectionPool(
     conninfo=settings.postgres_url,
-    min_size=1,
-    max_size=10,
+    name="postgres",
+    min_size=settings.postgres_pool_min_size,
+    max_size=settings.postgres_pool_max_size,
+    timeout=settings.postgres_pool_timeout,
+    max_waiting=settings.postgres_pool_max_waiting,
+    max_idle=settings.postgres_pool_max_idle,
+    max_lifetime=settings.postgres_pool_max_lifetime,
     open=False,
     kwargs={"autocommit": True},
 )
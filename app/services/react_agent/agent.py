@@ -1,18 +1,42 @@
+import asyncio
 import logging
-from typing import Self, Generator, AsyncGenerator
+import time
+from collections.abc import AsyncGenerator, Generator
 from datetime import datetime
+from typing import Any, Self
 
-from langgraph.graph import StateGraph, START, END, MessagesState
-from langgraph.prebuilt import ToolNode
+import httpx
+import openai
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.tools import Tool
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+from langgraph.types import Durability
+
+from .caching import ResponseCache
+from .history import HistoryCompactor
+from .metrics import LLM_CACHED_PROMPT_TOKENS, LLM_HEDGED_CALLS, LLM_PROMPT_TOKENS
+from .prompts import FINAL_ANSWER_PROMPT, HISTORY_SUMMARY_CONTEXT_PROMPT
+from .resilience import CircuitBreaker, Deadline
 
 logger = logging.getLogger(__name__)
 
 
+class AgentState(MessagesState):
+    """Agent 图状态：消息历史 + 更早历史的滚动摘要。"""
+
+    summary: str
+
+
 class ReActAgent:
     """ReAct Agent 单例工作流"""
 
@@ -30,22 +54,54 @@ class ReActAgent:
         tools: list[Tool], 
         system_prompt: str, 
         backup_chat_model: BaseChatModel = None,
+        hedge_delay: float | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        final_answer_reserve: float = 0.0,
+        context_prompt: str | None = None,
+        context_time_format: str = "%Y-%m-%d %H:00",
+        history_compactor: HistoryCompactor | None = None,
+        response_cache: ResponseCache | None = None,
+        durability: Durability | None = None,
     ):
+        """
+        Args:
+            hedge_delay: 对冲延迟（秒）。主模型超过该时间未返回时并发调用备用模型，
+                取先返回者；为 None 时仅在主模型失败后回退。
+            circuit_breaker: 主模型熔断器，熔断期间直接调用备用模型。
+            final_answer_reserve: 请求剩余时间低于该值（秒）时不再调用工具，强制输出最终回复。
+            context_prompt: 易变上下文提示词（含 {current_time} 及 context 中的占位符）。
+                设置后 system_prompt 原样作为逐字节稳定的前缀，上下文追加到消息末尾，便于命中模型服务端的前缀缓存。
+            context_time_format: 上下文中当前时间的格式，粒度越粗缓存越稳定。
+            history_compactor: 历史压缩器，设置后每轮对话开始前按 token 预算压缩历史并持久化。
+            response_cache: 首轮回复缓存，命中时直接把缓存的消息写入会话，跳过模型与工具调用。
+                调用方需传入 cache_query（原始用户消息）才会启用。
+            durability: checkpoint 写入时机（sync/async/exit），为 None 时使用 langgraph 默认值。
+        """
         if self._initialized:
             return
-        self._initialized = True
         self._chat_model = chat_model
         self._backup_chat_model = backup_chat_model
         self._tools = tools
         self._chat_model_with_tools = chat_model.bind_tools(tools)
         self._backup_chat_model_with_tools = backup_chat_model.bind_tools(tools) if backup_chat_model else None
         self._system_prompt = system_prompt
+        self._hedge_delay = hedge_delay
+        self._circuit_breaker = circuit_breaker
+        self._final_answer_reserve = final_answer_reserve
+        self._context_prompt = context_prompt
+        self._context_time_format = context_time_format
+        self._history_compactor = history_compactor
+        self._response_cache = response_cache
+        self._durability = durability
         self._graph = self._build()
+        # 构建成功后才标记为已初始化，构建失败时下次请求重新构建
+        self._initialized = True
 
     def run(self, message: str, thread_id: str) -> str:
         response = self._graph.invoke(
             {"messages": HumanMessage(content=message)},
             config={"configurable": {"thread_id": thread_id}},
+            durability=self._durability,
         )
         return response["messages"][-1].content
     
@@ -54,62 +110,385 @@ class ReActAgent:
             {"messages": HumanMessage(content=message)},
             config={"configurable": {"thread_id": thread_id}},
             stream_mode=stream_mode,
+            durability=self._durability,
         )
     
-    def astream(self, message: str, thread_id: str, stream_mode: str = "updates") -> AsyncGenerator[str, None]:
+    def astream(
+        self,
+        message: str,
+        thread_id: str,
+        stream_mode: str = "updates",
+        deadline: Deadline | None = None,
+        context: dict[str, str] | None = None,
+        cache_query: str | None = None,
+    ) -> AsyncGenerator[str, None]:
         return self._graph.astream(
             {"messages": HumanMessage(content=message)},
-            config={"configurable": {"thread_id": thread_id}},
+            config=self._config(thread_id, deadline=deadline, context=context, cache_query=cache_query),
             stream_mode=stream_mode,
+            durability=self._durability,
         )
 
-    async def arun(self, message: str, thread_id: str) -> str:
+    async def arun(
+        self,
+        message: str,
+        thread_id: str,
+        deadline: Deadline | None = None,
+        context: dict[str, str] | None = None,
+        cache_query: str | None = None,
+    ) -> str:
         response = await self._graph.ainvoke(
             {"messages": HumanMessage(content=message)},
-            config={"configurable": {"thread_id": thread_id}},
+            config=self._config(thread_id, deadline=deadline, context=context, cache_query=cache_query),
+            durability=self._durability,
         )
         return response["messages"][-1].content
 
-    async def _agent_node(self, state: MessagesState) -> dict:
-        system_message = SystemMessage(
-            content=self._system_prompt.format(
-                current_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    async def astream_tokens(
+        self,
+        message: str,
+        thread_id: str,
+        deadline: Deadline | None = None,
+        context: dict[str, str] | None = None,
+        cache_query: str | None = None,
+    ) -> AsyncGenerator[dict, None]:
+        """按 token 流式输出 agent 回复，并穿插工具开始/结束事件。
+
+        模型没有逐 token 输出（或回退到未流式的备用模型）时，以该步最终的 AI 消息补发完整回复；
+        主模型中途失败、改由备用模型回答时，先输出 reset 事件，客户端应丢弃此前收到的 token。
+
+        Yields:
+            {"event": "token", "data": {"content": ...}}
+            {"event": "reset", "data": {}}
+            {"event": "tool_start", "data": {"id": ..., "name": ..., "args": ...}}
+            {"event": "tool_end", "data": {"id": ..., "name": ..., "status": ...}}
+        """
+        # 当前 agent 步已输出的内容及其所属的消息 id（不同模型调用的消息 id 不同）
+        streamed = ""
+        streamed_id = None
+        async for mode, chunk in self._graph.astream(
+            {"messages": HumanMessage(content=message)},
+            config=self._config(
+                thread_id, deadline=deadline, context=context, cache_query=cache_query, stream_tokens=True
+            ),
+            stream_mode=["messages", "updates"],
+            durability=self._durability,
+        ):
+            if mode == "messages":
+                message_chunk, metadata = chunk
+                if (
+                    metadata.get("langgraph_node") == "agent"
+                    and isinstance(message_chunk, AIMessage)
+                    and isinstance(message_chunk.content, str)
+                    and message_chunk.content
+                ):
+                    if streamed and message_chunk.id != streamed_id:
+                        # 模型切换（如主模型中途失败后由备用模型回答）
+                        yield {"event": "reset", "data": {}}
+                        streamed = ""
+                    streamed_id = message_chunk.id
+                    streamed += message_chunk.content
+                    yield {"event": "token", "data": {"content": message_chunk.content}}
+                continue
+
+            for node_name, update in chunk.items():
+                if not update:
+                    continue
+                if node_name == "response_cache":
+                    # 缓存命中不经过模型，没有 token 流，直接输出完整回复
+                    yield {"event": "token", "data": {"content": update["messages"][-1].content}}
+                    continue
+                for node_message in update.get("messages", []):
+                    if node_name == "agent" and isinstance(node_message, AIMessage):
+                        if (
+                            not node_message.tool_calls
+                            and isinstance(node_message.content, str)
+                            and node_message.content != streamed
+                        ):
+                            # 未逐 token 输出或输出不完整时，以最终消息为准
+                            if streamed:
+                                yield {"event": "reset", "data": {}}
+                            yield {"event": "token", "data": {"content": node_message.content}}
+                        streamed = ""
+                        streamed_id = None
+                        for tool_call in node_message.tool_calls:
+                            yield {
+                                "event": "tool_start",
+                                "data": {
+                                    "id": tool_call["id"],
+                                    "name": tool_call["name"],
+                                    "args": tool_call["args"],
+                                },
+                            }
+                    elif node_name == "tools" and isinstance(node_message, ToolMessage):
+                        yield {
+                            "event": "tool_end",
+                            "data": {
+                                "id": node_message.tool_call_id,
+                                "name": node_message.name,
+                                "status": node_message.status,
+                            },
+                        }
+
+    async def _response_cache_node(self, state: AgentState, config: RunnableConfig) -> dict:
+        """首轮对话查询回复缓存，命中时把缓存的消息写入会话。"""
+        key = await self._response_cache_key(config)
+        messages = self._response_cache.get(key)
+        if messages is None:
+            return {}
+        logger.info(f"Response cache hit for thread {config['configurable']['thread_id']}")
+        return {"messages": messages}
+
+    def _route_start(self, state: AgentState, config: RunnableConfig) -> str:
+        """会话首轮且调用方提供了 cache_query 时先查询回复缓存。"""
+        if config["configurable"].get("cache_query") and len(state["messages"]) == 1 and not state.get("summary"):
+            return "response_cache"
+        return self._entry_node
+
+    def _route_response_cache(self, state: AgentState) -> str:
+        if isinstance(state["messages"][-1], AIMessage):
+            return END
+        return self._entry_node
+
+    async def _response_cache_key(self, config: RunnableConfig) -> tuple:
+        configurable = config["configurable"]
+        return await self._response_cache.key(configurable["cache_query"], configurable.get("context"))
+
+    async def _store_response(self, state: AgentState, response: AIMessage, config: RunnableConfig) -> None:
+        """首轮最终回复（连同本轮的工具调用与结果）写入回复缓存。"""
+        human_messages = [message for message in state["messages"] if isinstance(message, HumanMessage)]
+        if len(human_messages) != 1 or state.get("summary") or not config["configurable"].get("cache_query"):
+            return
+        try:
+            self._response_cache.set(await self._response_cache_key(config), [*state["messages"][1:], response])
+        except (OSError, RuntimeError, ValueError) as e:
+            # 语言检测模型加载失败、线程池已关闭或消息无法复制时不缓存
+            logger.warning(f"Failed to store response cache: {e}")
+
+    async def _compact_node(self, state: AgentState, config: RunnableConfig) -> dict:
+        """每轮开始前按 token 预算压缩历史；失败或超时时跳过，不影响本轮对话。"""
+        timeout = self._history_compactor.timeout
+        deadline: Deadline | None = config["configurable"].get("deadline")
+        if deadline is not None:
+            # 为本轮模型调用保留 final_answer_reserve，剩余时间不足时跳过压缩
+            budget = deadline.remaining() - self._final_answer_reserve
+            if budget <= 0:
+                logger.warning(f"Request deadline approaching ({deadline.remaining():.1f}s left), skipping compaction")
+                return {}
+            timeout = budget if timeout is None else min(timeout, budget)
+        try:
+            update = await asyncio.wait_for(
+                self._history_compactor.acompact(state["messages"], state.get("summary", "")), timeout=timeout
+            )
+        except (TimeoutError, openai.APIError, httpx.HTTPError, ValueError) as e:
+            logger.warning(f"History compaction failed, skipped: {e}")
+            return {}
+        if update is None:
+            return {}
+        logger.info(f"Compacted history: {len(update['messages'])} message updates")
+        return update
+
+    async def _agent_node(self, state: AgentState, config: RunnableConfig) -> dict:
+        messages = self._build_messages(state, config)
+
+        deadline: Deadline | None = config["configurable"].get("deadline")
+        if deadline is not None and deadline.remaining() < self._final_answer_reserve:
+            # 时间预算即将用尽：不再绑定工具，强制模型直接给出最终回复
+            logger.warning(f"Request deadline approaching ({deadline.remaining():.1f}s left), forcing final answer")
+            messages.append(SystemMessage(content=FINAL_ANSWER_PROMPT))
+            primary, backup = self._chat_model, self._backup_chat_model
+            forced_final_answer = True
+        else:
+            primary, backup = self._chat_model_with_tools, self._backup_chat_model_with_tools
+            forced_final_answer = False
+
+        invocation = self._ainvoke(primary, backup, messages, config)
+        if deadline is not None:
+            response = await asyncio.wait_for(invocation, timeout=deadline.timeout())
+        else:
+            response = await invocation
+        self._record_usage(response)
+        # 超时被迫给出的回复不完整，不缓存
+        if self._response_cache is not None and not response.tool_calls and not forced_final_answer:
+            await self._store_response(state, response, config)
+        return {"messages": [response]}
+
+    def _build_messages(self, state: AgentState, config: RunnableConfig) -> list[BaseMessage]:
+        """组装发给模型的消息。
+
+        默认在 system prompt 中填入精确到秒的当前时间；配置了 context_prompt 时，
+        system prompt 原样放在最前作为稳定前缀，粗粒度时间与用户上下文放在最后。
+        已压缩的历史摘要紧跟在 system prompt 之后。
+        """
+        summary_messages = []
+        if state.get("summary"):
+            summary_messages.append(
+                SystemMessage(content=HISTORY_SUMMARY_CONTEXT_PROMPT.format(summary=state["summary"]))
+            )
+
+        if self._context_prompt is None:
+            system_message = SystemMessage(
+                content=self._system_prompt.format(
+                    current_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                )
+            )
+            return [system_message, *summary_messages, *state["messages"]]
+
+        context_message = SystemMessage(
+            content=self._context_prompt.format(
+                current_time=datetime.now().strftime(self._context_time_format),
+                **config["configurable"].get("context", {}),
             )
         )
-        messages = [
-            system_message,
-            *state["messages"],
-        ]
+        return [SystemMessage(content=self._system_prompt), *summary_messages, *state["messages"], context_message]
+
+    @staticmethod
+    def _record_usage(response: BaseMessage) -> None:
+        """记录输入 token 数及命中前缀缓存的 token 数。"""
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            return
+        model = response.response_metadata.get("model_name", "unknown")
+        cached_tokens = usage.get("input_token_details", {}).get("cache_read")
+        if cached_tokens is None:
+            # Moonshot 等服务在 usage 顶层返回 cached_tokens
+            cached_tokens = response.response_metadata.get("token_usage", {}).get("cached_tokens") or 0
+        LLM_PROMPT_TOKENS.labels(model=model).inc(usage.get("input_tokens", 0))
+        LLM_CACHED_PROMPT_TOKENS.labels(model=model).inc(cached_tokens)
+
+    async def _ainvoke(
+        self,
+        primary: Runnable,
+        backup: Runnable | None,
+        messages: list[BaseMessage],
+        config: RunnableConfig,
+    ) -> BaseMessage:
+        """按熔断状态与对冲配置选择调用方式。"""
+        if backup and self._circuit_breaker and not self._circuit_breaker.allow_request():
+            logger.warning("Primary chat model circuit open, routing to backup chat model")
+            return await backup.ainvoke(messages)
+        # 逐 token 输出时不做对冲，避免两个模型的 token 交错
+        if backup and self._hedge_delay is not None and not config["configurable"].get("stream_tokens"):
+            return await self._ainvoke_hedged(primary, backup, messages)
+        return await self._ainvoke_with_fallback(primary, backup, messages)
 
+    async def _ainvoke_primary(self, primary: Runnable, messages: list[BaseMessage]) -> BaseMessage:
+        """调用主模型，并将结果与耗时记入熔断器。"""
+        if self._circuit_breaker is None:
+            return await primary.ainvoke(messages)
+
+        started_at = time.perf_counter()
         try:
-            response = await self._chat_model_with_tools.ainvoke(messages)
+            response = await primary.ainvoke(messages)
+        except asyncio.CancelledError:
+            self._circuit_breaker.record_cancelled(time.perf_counter() - started_at)
+            raise
+        except Exception:
+            self._circuit_breaker.record_failure(time.perf_counter() - started_at)
+            raise
+        self._circuit_breaker.record_success(time.perf_counter() - started_at)
+        return response
+
+    async def _ainvoke_with_fallback(
+        self, primary: Runnable, backup: Runnable | None, messages: list[BaseMessage]
+    ) -> BaseMessage:
+        """调用主模型，失败后回退到备用模型。"""
+        try:
+            return await self._ainvoke_primary(primary, messages)
         except Exception as e:
             logger.error(f"Primary chat model invocation failed: {e}")
-            if self._backup_chat_model_with_tools:
+            if backup:
                 logger.warning("Falling back to backup chat model")
-                response = await self._backup_chat_model_with_tools.ainvoke(messages)
-            else:
-                logger.error("No backup chat model available, re-raising")
-                raise e
-        return {"messages": [response]}
+                return await backup.ainvoke(messages)
+            logger.error("No backup chat model available, re-raising")
+            raise
 
-    def _should_continue(self, state: MessagesState) -> str:
+    async def _ainvoke_hedged(
+        self, primary: Runnable, backup: Runnable, messages: list[BaseMessage]
+    ) -> BaseMessage:
+        """对冲调用：主模型超过 hedge_delay 未返回时再调用备用模型，取先成功者并取消另一个。"""
+        primary_task = asyncio.create_task(self._ainvoke_primary(primary, messages))
+        backup_task: asyncio.Task | None = None
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=self._hedge_delay)
+            if done:
+                if primary_task.exception() is None:
+                    return primary_task.result()
+                logger.error(f"Primary chat model invocation failed: {primary_task.exception()}")
+                logger.warning("Falling back to backup chat model")
+                return await backup.ainvoke(messages)
+
+            logger.warning(
+                f"Primary chat model not answered within {self._hedge_delay}s, hedging with backup chat model"
+            )
+            backup_task = asyncio.create_task(backup.ainvoke(messages))
+            pending = {primary_task, backup_task}
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = "primary" if task is primary_task else "backup"
+                        LLM_HEDGED_CALLS.labels(winner=winner).inc()
+                        logger.info(f"Hedged chat model invocation won by {winner}")
+                        return task.result()
+                    error = task.exception()
+                    logger.error(f"Hedged chat model invocation failed: {error}")
+            LLM_HEDGED_CALLS.labels(winner="none").inc()
+            raise error
+        finally:
+            for task in (primary_task, backup_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _config(self, thread_id: str, **configurable: Any) -> RunnableConfig:
+        """
+        构造 graph config，值为 None 的配置项不下发。
+
+        configurable 中的字符串会被 langgraph 复制到每个 checkpoint 的 metadata，
+        未启用回复缓存时不下发 cache_query，避免原始用户消息重复写入 Postgres。
+        """
+        if self._response_cache is None:
+            configurable.pop("cache_query", None)
+        configurable = {key: value for key, value in configurable.items() if value is not None}
+        return {"configurable": {"thread_id": thread_id, **configurable}}
+
+    def _should_continue(self, state: AgentState) -> str:
         last_message = state["messages"][-1]
         if last_message.tool_calls:
             return "tools"
         return END
 
     def _get_checkpointer(self) -> BaseCheckpointSaver:
-        """会话持久化存储，默认使用内存存储"""
-        return MemorySaver()
+        """会话持久化存储，默认使用有界内存存储"""
+        from .checkpointers import BoundedMemorySaver
+        from .config import react_agent_settings
+
+        return BoundedMemorySaver(
+            max_threads=react_agent_settings.memory_checkpoint_max_threads,
+            idle_ttl=react_agent_settings.memory_checkpoint_idle_ttl,
+            max_bytes=react_agent_settings.memory_checkpoint_max_bytes,
+        )
 
     def _build(self) -> StateGraph:
-        graph = StateGraph(MessagesState)
+        graph = StateGraph(AgentState)
 
         graph.add_node("agent", self._agent_node)
         graph.add_node("tools", ToolNode(self._tools))
 
-        graph.add_edge(START, "agent")
+        if self._history_compactor:
+            graph.add_node("compact", self._compact_node)
+            graph.add_edge("compact", "agent")
+            self._entry_node = "compact"
+        else:
+            self._entry_node = "agent"
+
+        if self._response_cache:
+            graph.add_node("response_cache", self._response_cache_node)
+            graph.add_conditional_edges(START, self._route_start, ["response_cache", self._entry_node])
+            graph.add_conditional_edges("response_cache", self._route_response_cache, [self._entry_node, END])
+        else:
+            graph.add_edge(START, self._entry_node)
         graph.add_conditional_edges("agent", self._should_continue)
         graph.add_edge("tools", "agent")
 
@@ -120,6 +499,34 @@ class AISalesAgent(ReActAgent):
     """销售场景 ReAct Agent：会话持久化使用 PostgreSQL checkpointer。"""
     
     def _get_checkpointer(self) -> BaseCheckpointSaver:
-        """Postgres checkpointer 做会话持久化。"""
-        from app.core.shared import postgres_checkpointer
-        return postgres_checkpointer
+        """
+        Postgres checkpointer 做会话持久化：pipelined 模式下每步的写入合并为一次往返，shallow 模式下每个会话只保留最新状态，
+        可选进程内缓存活跃会话。
+        """
+        from app.config import settings
+        from app.core.shared import postgres_async_pool, postgres_checkpointer
+
+        from .checkpointers import (
+            CachedCheckpointSaver,
+            PipelinedPostgresSaver,
+            ShallowPostgresSaver,
+        )
+        from .config import react_agent_settings
+
+        if react_agent_settings.checkpoint_mode == "memory":
+            return super()._get_checkpointer()
+        checkpointer = postgres_checkpointer
+        flush_delay = react_agent_settings.checkpoint_writes_flush_delay
+        if react_agent_settings.checkpoint_mode == "pipelined":
+            checkpointer = PipelinedPostgresSaver(postgres_async_pool, flush_delay=flush_delay)
+        elif react_agent_settings.checkpoint_mode == "shallow":
+            checkpointer = ShallowPostgresSaver(postgres_async_pool, flush_delay=flush_delay)
+        if react_agent_settings.checkpoint_cache_enabled:
+            validate = react_agent_settings.checkpoint_cache_validate
+            checkpointer = CachedCheckpointSaver(
+                checkpointer,
+                maxsize=react_agent_settings.checkpoint_cache_maxsize,
+                ttl=react_agent_settings.checkpoint_cache_ttl,
+                validate=settings.workers > 1 if validate is None else validate,
+            )
+        return checkpointer
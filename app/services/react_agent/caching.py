@@ -0,0 +1,227 @@
+"""异步 TTL/LRU 缓存与首轮对话回复缓存。"""
+
+import asyncio
+import functools
+import inspect
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from langchain_core.messages import AnyMessage, ToolMessage
+from prometheus_client import Gauge
+
+from .metrics import RESPONSE_CACHE_REQUESTS, TOOL_CACHE_REQUESTS, TOOL_CACHE_SIZE
+from .resilience import Deadline
+from .utils import LanguageDetector
+
+
+class AsyncTTLCache:
+    """
+    带 TTL 与 LRU 容量上限的异步缓存，并发的相同请求合并为一次上游调用（single-flight）。
+
+    只缓存成功结果；异常会传递给所有等待方，但不写入缓存。
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 1024, size_gauge: Gauge | None = None) -> None:
+        """
+        Args:
+            name: 缓存名称，用于指标标签。
+            ttl: 缓存有效期（秒），<= 0 时不缓存（仍合并并发请求）。
+            maxsize: 最多缓存的条目数，超出时淘汰最久未使用的条目。
+            size_gauge: 上报条目数的指标，默认为工具查询缓存的 react_agent_tool_cache_size{cache=name}。
+        """
+        self.name = name
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        # 条目数在采集指标时计算，过期但尚未被访问或淘汰的条目不计入
+        (size_gauge if size_gauge is not None else TOOL_CACHE_SIZE.labels(cache=name)).set_function(self._live_size)
+
+    def get(self, key: Hashable) -> Any:
+        """读取未过期的缓存值，不存在时返回 None。"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入缓存并按 LRU 淘汰超出容量的条目。"""
+        if self._ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        读取缓存，未命中时调用 loader 加载；同一 key 同时只有一个 loader 在执行。
+
+        Args:
+            key: 缓存键。
+            loader: 加载函数。
+            timeout: 当前调用方最多等待的时间（秒），超时不会取消共享的加载任务。
+        """
+        value = self.get(key)
+        if value is not None:
+            TOOL_CACHE_REQUESTS.labels(cache=self.name, result="hit").inc()
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            TOOL_CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+            task = asyncio.create_task(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_loaded(key, t))
+        else:
+            TOOL_CACHE_REQUESTS.labels(cache=self.name, result="coalesced").inc()
+
+        # shield：单个调用方取消或超时不影响其他等待同一结果的调用方
+        return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+
+    def cached(self, ignore: tuple[str, ...] = ("deadline",)) -> Callable:
+        """
+        异步函数缓存装饰器，以规范化后的参数为缓存键。
+
+        Args:
+            ignore: 不参与缓存键的参数名；名为 deadline 的参数同时用于限制等待时间。
+        """
+
+        def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = tuple(
+                    (name, self._normalize_arg(value))
+                    for name, value in bound.arguments.items()
+                    if name not in ignore
+                )
+                deadline: Deadline | None = bound.arguments.get("deadline")
+                if deadline is not None:
+                    # 共享的加载不受第一个调用方截止时间的约束，各调用方按自己的截止时间等待结果
+                    bound.arguments["deadline"] = None
+                return await self.get_or_load(
+                    key,
+                    lambda: func(*bound.args, **bound.kwargs),
+                    timeout=deadline.timeout() if deadline else None,
+                )
+
+            return wrapper
+
+        return decorator
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def _live_size(self) -> int:
+        """未过期的条目数；在指标采集线程中调用，只读取不修改缓存。"""
+        now = time.monotonic()
+        return sum(1 for expires_at, _ in list(self._entries.values()) if expires_at > now)
+
+    def _on_loaded(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # 所有调用方都已放弃等待时，取走异常避免 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    @classmethod
+    def _normalize_arg(cls, value: Any) -> Hashable:
+        """字符串去除多余空白并转小写，列表转元组，使语义相同的参数命中同一缓存。"""
+        if isinstance(value, str):
+            return " ".join(value.split()).lower()
+        if isinstance(value, (list, tuple)):
+            return tuple(cls._normalize_arg(item) for item in value)
+        if isinstance(value, dict):
+            return tuple(sorted((key, cls._normalize_arg(item)) for key, item in value.items()))
+        return value
+
+
+class ResponseCache:
+    """
+    首轮对话的完整回复缓存。
+
+    以规范化后的用户消息、地区、平台、检测到的语言为键，缓存首轮产生的全部消息（工具调用、工具结果、最终回复）。
+    namespace 应包含提示词等版本信息，提示词或数据变更后旧缓存自然失效，其余情况按 TTL 过期。
+    """
+
+    _TRAILING_PUNCTUATION = "?？!！。.~～ "
+
+    def __init__(
+        self,
+        cache: AsyncTTLCache,
+        language_detector: LanguageDetector,
+        namespace: str = "",
+        uncacheable_tools: list[str] | None = None,
+    ) -> None:
+        """
+        Args:
+            cache: 底层 TTL/LRU 缓存。
+            language_detector: 语言检测器，检测结果参与缓存键。
+            namespace: 缓存命名空间，如提示词哈希 + 数据版本。
+            uncacheable_tools: 调用过这些工具的回复不缓存（如发送人工通知等有副作用或与用户相关的工具）。
+        """
+        self._cache = cache
+        self._language_detector = language_detector
+        self._namespace = namespace
+        self._uncacheable_tools = frozenset(uncacheable_tools or [])
+
+    async def key(self, query: str, context: dict[str, str] | None = None) -> tuple:
+        """构造缓存键。"""
+        context = context or {}
+        text = " ".join(query.split()).lower().rstrip(self._TRAILING_PUNCTUATION)
+        return (
+            self._namespace,
+            text,
+            context.get("region", ""),
+            context.get("platform", ""),
+            await self._language_detector.adetect(query),
+        )
+
+    def get(self, key: tuple) -> list[AnyMessage] | None:
+        """读取缓存的消息，返回去掉 id 的副本，写入新会话时重新分配 id。"""
+        messages = self._cache.get(key)
+        if messages is None:
+            RESPONSE_CACHE_REQUESTS.labels(result="miss").inc()
+            return None
+        RESPONSE_CACHE_REQUESTS.labels(result="hit").inc()
+        return [message.model_copy(update={"id": None}) for message in messages]
+
+    def set(self, key: tuple, messages: list[AnyMessage]) -> bool:
+        """缓存首轮消息；调用了不可缓存工具或工具执行失败时不缓存。"""
+        for message in messages:
+            if isinstance(message, ToolMessage) and (
+                message.name in self._uncacheable_tools or self._is_failed_tool_result(message)
+            ):
+                return False
+        self._cache.set(key, [message.model_copy(update={"id": None}) for message in messages])
+        return True
+
+    @staticmethod
+    def _is_failed_tool_result(message: ToolMessage) -> bool:
+        """工具执行失败：ToolMessage 状态为 error，或统一返回结构中 success 为 false。"""
+        if message.status == "error":
+            return True
+        try:
+            result = json.loads(message.content) if isinstance(message.content, str) else None
+        except ValueError:
+            return False
+        return isinstance(result, dict) and result.get("success") is False
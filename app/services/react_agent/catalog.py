@@ -0,0 +1,136 @@
+"""产品目录本地索引：按型号、颜色、材质与价格区间查询各平台产品。"""
+
+import bisect
+import re
+from typing import Any, ClassVar
+
+
+class ProductCatalogIndex:
+    """
+    单个平台产品目录的内存索引：按型号、颜色、材质建立倒排索引，按价格排序支持区间查询。
+
+    查询文本中出现的型号/颜色/材质取值（忽略大小写与空白）作为过滤条件，价格区间从剩余文本中解析。
+    剩余文本中还有无法识别的型号片段（如目录中没有的 "METAVERTU 2 Max" 中的 "Max"）时不作本地回答，
+    由调用方回退到远程查询。
+    """
+
+    _NORMALIZE_PATTERN = re.compile(r"[\s\-_]+")
+    _PRICE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(万|w|k|千)?\s*(?:元|块|rmb|cny|yuan)?", re.IGNORECASE)
+    _PRICE_UNITS: ClassVar[dict[str, int]] = {"万": 10000, "w": 10000, "k": 1000, "千": 1000}
+    _PRICE_MAX_HINTS = ("以下", "以内", "之内", "不超过", "低于", "under", "below", "less than", "within")
+    _PRICE_MIN_HINTS = ("以上", "起", "超过", "高于", "over", "above", "more than")
+    _PRICE_AROUND_HINTS = ("左右", "上下", "约", "大概", "大约", "around", "about")
+    # "左右" 等表示的价格区间为 ±_PRICE_TOLERANCE
+    _PRICE_TOLERANCE = 0.2
+    _MIN_PRICE = 100
+    # 剩余文本中允许出现的英文/数字片段，其余片段视为未识别的型号
+    _UNKNOWN_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    _QUERY_WORDS = frozenset(
+        ("vertu", "price", "prices", "cost", "how", "much", "what", "is", "the", "of", "for", "and", "or", "to")
+    )
+
+    def __init__(self, products: list[dict[str, Any]], fields: dict[str, str]) -> None:
+        """
+        Args:
+            products: 产品列表。
+            fields: 索引字段到产品字段名的映射，键为 model/color/material/price。
+        """
+        self.products = products
+        self._fields = fields
+        self._values: dict[str, dict[str, set[int]]] = {}
+        for field in ("model", "color", "material"):
+            values: dict[str, set[int]] = {}
+            for i, product in enumerate(products):
+                value = product.get(fields[field])
+                if value:
+                    values.setdefault(self._normalize(str(value)), set()).add(i)
+            # 长的取值优先匹配（如 METAVERTU 2 优先于 METAVERTU）
+            self._values[field] = dict(sorted(values.items(), key=lambda item: len(item[0]), reverse=True))
+        priced = []
+        for i, product in enumerate(products):
+            price = self._parse_price(product.get(fields["price"]))
+            if price is not None:
+                priced.append((price, i))
+        priced.sort()
+        self._prices = [price for price, _ in priced]
+        self._price_ids = [i for _, i in priced]
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def search(self, query: str, limit: int = 10) -> list[dict[str, Any]]:
+        """按查询文本过滤产品，没有识别出任何条件或查询中有未识别的型号片段时返回空列表。"""
+        text = self._normalize(query)
+        remaining = query.lower()
+        candidates: set[int] | None = None
+        for values in self._values.values():
+            matched: set[int] = set()
+            for value, ids in values.items():
+                if value in text:
+                    matched |= ids
+                    text = text.replace(value, " ")
+                    # 从原文中去掉已匹配的取值，避免型号中的数字被当作价格
+                    remaining = re.sub(r"[\s\-_]*".join(map(re.escape, value)), " ", remaining)
+            if matched:
+                candidates = matched if candidates is None else candidates & matched
+
+        low, high = self._parse_price_range(remaining)
+        if self._has_unknown_tokens(remaining):
+            return []
+        if low is not None or high is not None:
+            start = bisect.bisect_left(self._prices, low) if low is not None else 0
+            end = bisect.bisect_right(self._prices, high) if high is not None else len(self._prices)
+            in_range = set(self._price_ids[start:end])
+            candidates = in_range if candidates is None else candidates & in_range
+
+        if not candidates:
+            return []
+        return [self.products[i] for i in sorted(candidates)[:limit]]
+
+    def _has_unknown_tokens(self, remaining: str) -> bool:
+        """去掉价格与提示词后，剩余文本中是否还有未识别的英文/数字片段。"""
+        # 低于 _MIN_PRICE 的数字不是价格（如 "METAVERTU 3" 中的 3），保留下来视为型号片段
+        remaining = self._PRICE_PATTERN.sub(
+            lambda match: " " if self._to_price(*match.groups()) >= self._MIN_PRICE else match.group(),
+            remaining.replace(",", ""),
+        )
+        for hint in (*self._PRICE_MAX_HINTS, *self._PRICE_MIN_HINTS, *self._PRICE_AROUND_HINTS):
+            remaining = remaining.replace(hint, " ")
+        return any(
+            token not in self._QUERY_WORDS for token in self._UNKNOWN_TOKEN_PATTERN.findall(remaining)
+        )
+
+    def _parse_price_range(self, query: str) -> tuple[float | None, float | None]:
+        """从去掉型号等取值后的文本中解析价格区间。"""
+        prices = [price for price in self._find_prices(query) if price >= self._MIN_PRICE]
+        if len(prices) >= 2:
+            return min(prices), max(prices)
+        if len(prices) == 1:
+            if any(hint in query for hint in self._PRICE_MAX_HINTS):
+                return None, prices[0]
+            if any(hint in query for hint in self._PRICE_MIN_HINTS):
+                return prices[0], None
+            if any(hint in query for hint in self._PRICE_AROUND_HINTS):
+                return prices[0] * (1 - self._PRICE_TOLERANCE), prices[0] * (1 + self._PRICE_TOLERANCE)
+        return None, None
+
+    @classmethod
+    def _find_prices(cls, text: str) -> list[float]:
+        """解析文本中的全部金额，支持 万/w/千/k 单位与 元 等后缀。"""
+        return [cls._to_price(number, unit) for number, unit in cls._PRICE_PATTERN.findall(text.replace(",", ""))]
+
+    @classmethod
+    def _to_price(cls, number: str, unit: str | None) -> float:
+        return float(number) * cls._PRICE_UNITS.get((unit or "").lower(), 1)
+
+    @classmethod
+    def _parse_price(cls, value: Any) -> float | None:
+        """解析产品价格，兼容 "¥12,800"、"约 1.2万" 之类的字符串。"""
+        if isinstance(value, (int, float)):
+            return float(value)
+        prices = cls._find_prices(str(value or ""))
+        return prices[0] if prices else None
+
+    @classmethod
+    def _normalize(cls, text: str) -> str:
+        return cls._NORMALIZE_PATTERN.sub("", text.lower())
@@ -0,0 +1,602 @@
+"""React Agent 会话持久化（checkpointer）实现。"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from typing import Any
+
+import psycopg
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_serializable_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg import AsyncCursor
+from psycopg.rows import DictRow, dict_row
+from psycopg.types.json import Jsonb
+from psycopg_pool import AsyncConnectionPool
+
+from .metrics import (
+    CHECKPOINT_CACHE_REQUESTS,
+    CHECKPOINT_LOAD_SECONDS,
+    MEMORY_CHECKPOINT_BYTES,
+    MEMORY_CHECKPOINT_EVICTIONS,
+    MEMORY_CHECKPOINT_THREADS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PipelinedPostgresSaver(AsyncPostgresSaver):
+    """
+    减少网络往返的 Postgres checkpointer，与 AsyncPostgresSaver 共用表结构。
+
+    - 每一步的 pending writes 先在进程内暂存，与随后写入的 checkpoint、blob 合并到同一个 pipeline 中一次提交；
+      flush_delay 秒内没有新的 checkpoint（如本轮以异常结束）时由后台任务单独写入；
+    - 读取、删除会话前先写入该会话暂存的 writes，保证本进程内读到自己的写入；
+    - 写入失败时暂存的 writes 放回暂存区，随下一次 checkpoint 或后台任务重试（写入语句均为 upsert，可重复执行）；
+    - 使用连接池时不再持有 saver 级的全局锁，各请求的 checkpoint 读写并发使用各自的连接。
+
+    进程在暂存期间崩溃时会丢失这些 writes，恢复时对应步骤会重新执行。
+    """
+
+    def __init__(self, conn: AsyncConnectionPool, flush_delay: float = 0.5) -> None:
+        """
+        Args:
+            conn: 连接池。
+            flush_delay: pending writes 最长暂存时间（秒），<= 0 时立即写入。
+        """
+        super().__init__(conn)
+        self._flush_delay = flush_delay
+        self._pending_writes: dict[tuple[str, str], list[tuple[str, list]]] = {}
+        self._flush_tasks: dict[tuple[str, str], asyncio.Task] = {}
+
+    @asynccontextmanager
+    async def _cursor(self, *, pipeline: bool = False) -> AsyncIterator[AsyncCursor[DictRow]]:
+        if self.pipe or not isinstance(self.conn, AsyncConnectionPool):
+            async with super()._cursor(pipeline=pipeline) as cur:
+                yield cur
+            return
+        # AsyncPostgresSaver 的全局锁用于串行使用同一个连接；连接池每次操作借出独立连接，连接之间无共享状态，
+        # 持锁只会把整个进程的 checkpoint 读写串行化。同一会话的读写由 graph 按步骤顺序发起，
+        # 与后台 flush 之间通过 _take_pending_writes（不含 await）保证每批 writes 只被一方取走
+        async with self.conn.connection() as conn:
+            if pipeline and self.supports_pipeline:
+                async with conn.pipeline(), conn.cursor(binary=True, row_factory=dict_row) as cur:
+                    yield cur
+            elif pipeline:
+                async with conn.transaction(), conn.cursor(binary=True, row_factory=dict_row) as cur:
+                    yield cur
+            else:
+                async with conn.cursor(binary=True, row_factory=dict_row) as cur:
+                    yield cur
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        await self._flush(self._key(config))
+        return await super().aget_tuple(config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if config is not None:
+            await self._flush(self._key(config))
+        async for checkpoint_tuple in super().alist(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        for key in [key for key in self._pending_writes if key[0] == thread_id]:
+            self._take_pending_writes(key)
+        await super().adelete_thread(thread_id)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """在一个 pipeline 中写入暂存的 writes、blob 与 checkpoint。"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        parent_id = config["configurable"].get("checkpoint_id")
+        pending_writes = self._take_pending_writes((thread_id, checkpoint_ns))
+
+        # 基本类型直接内联在 checkpoint 中，其余写入 blob 表
+        copy = checkpoint.copy()
+        copy["channel_values"] = copy["channel_values"].copy()
+        blob_values = {}
+        for key, value in checkpoint["channel_values"].items():
+            if value is None or isinstance(value, (str, int, float, bool)):
+                pass
+            else:
+                blob_values[key] = copy["channel_values"].pop(key)
+        blob_versions = {key: value for key, value in new_versions.items() if key in blob_values}
+        blob_params = (
+            await asyncio.to_thread(self._dump_blobs, thread_id, checkpoint_ns, blob_values, blob_versions)
+            if blob_versions
+            else []
+        )
+
+        try:
+            async with self._cursor(pipeline=True) as cur:
+                for query, params in self._filter_pending_writes(pending_writes, checkpoint):
+                    await cur.executemany(query, params)
+                if blob_params:
+                    await cur.executemany(self.UPSERT_CHECKPOINT_BLOBS_SQL, blob_params)
+                await cur.execute(
+                    self.UPSERT_CHECKPOINTS_SQL,
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint["id"],
+                        parent_id,
+                        Jsonb(copy),
+                        Jsonb(get_serializable_checkpoint_metadata(config, metadata)),
+                    ),
+                )
+                await self._after_checkpoint(cur, thread_id, checkpoint_ns, checkpoint)
+        except BaseException:
+            # checkpoint 未写入，父 checkpoint 的 writes 仍需保留
+            self._restore_pending_writes((thread_id, checkpoint_ns), pending_writes)
+            raise
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """暂存 pending writes，随下一个 checkpoint 一起写入。"""
+        if self._flush_delay <= 0:
+            await super().aput_writes(config, writes, task_id, task_path)
+            return
+
+        configurable = config["configurable"]
+        query = (
+            self.UPSERT_CHECKPOINT_WRITES_SQL
+            if all(write[0] in WRITES_IDX_MAP for write in writes)
+            else self.INSERT_CHECKPOINT_WRITES_SQL
+        )
+        params = await asyncio.to_thread(
+            self._dump_writes,
+            configurable["thread_id"],
+            configurable["checkpoint_ns"],
+            configurable["checkpoint_id"],
+            task_id,
+            task_path,
+            writes,
+        )
+        key = self._key(config)
+        self._pending_writes.setdefault(key, []).append((query, params))
+        self._schedule_flush(key)
+
+    async def _after_checkpoint(
+        self, cur: AsyncCursor[DictRow], thread_id: str, checkpoint_ns: str, checkpoint: Checkpoint
+    ) -> None:
+        """在写入 checkpoint 的同一个 pipeline 中追加语句，供子类扩展。"""
+
+    async def _after_flush(self, cur: AsyncCursor[DictRow], thread_id: str, checkpoint_ns: str) -> None:
+        """在单独写入 pending writes 的同一个 pipeline 中追加语句，供子类扩展。"""
+
+    def _filter_pending_writes(
+        self, pending_writes: list[tuple[str, list]], checkpoint: Checkpoint
+    ) -> list[tuple[str, list]]:
+        """随 checkpoint 一起写入的 pending writes，供子类过滤。"""
+        return pending_writes
+
+    def _schedule_flush(self, key: tuple[str, str]) -> None:
+        if key not in self._flush_tasks:
+            self._flush_tasks[key] = asyncio.create_task(self._flush_later(key))
+
+    def _take_pending_writes(self, key: tuple[str, str]) -> list[tuple[str, list]]:
+        task = self._flush_tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        return self._pending_writes.pop(key, [])
+
+    def _restore_pending_writes(self, key: tuple[str, str], pending_writes: list[tuple[str, list]]) -> None:
+        """写入失败的 writes 放回暂存区（排在期间新暂存的 writes 之前），并安排后台重试。"""
+        if not pending_writes:
+            return
+        self._pending_writes[key] = pending_writes + self._pending_writes.get(key, [])
+        self._schedule_flush(key)
+
+    async def _flush(self, key: tuple[str, str]) -> None:
+        pending_writes = self._take_pending_writes(key)
+        if not pending_writes:
+            return
+        try:
+            async with self._cursor(pipeline=True) as cur:
+                for query, params in pending_writes:
+                    await cur.executemany(query, params)
+                await self._after_flush(cur, *key)
+        except BaseException:
+            self._restore_pending_writes(key, pending_writes)
+            raise
+
+    async def _flush_later(self, key: tuple[str, str]) -> None:
+        await asyncio.sleep(self._flush_delay)
+        # 先移除自身，避免 _flush 取消正在执行写入的当前任务
+        self._flush_tasks.pop(key, None)
+        try:
+            await self._flush(key)
+        except psycopg.Error as e:
+            logger.error(f"Failed to flush checkpoint writes for thread {key[0]}: {e}")
+
+    @staticmethod
+    def _key(config: RunnableConfig) -> tuple[str, str]:
+        configurable = config["configurable"]
+        return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+
+class ShallowPostgresSaver(PipelinedPostgresSaver):
+    """
+    只保留每个会话最新状态的 Postgres checkpointer。
+
+    与 AsyncPostgresSaver 共用表结构，写入新 checkpoint 时在同一个 pipeline 中删除该会话的旧 checkpoint、
+    旧 checkpoint 的 writes 以及不再被引用的 blob，不支持 time travel / 回放。
+    （langgraph 自带的 AsyncShallowPostgresSaver 已弃用，且表结构与 AsyncPostgresSaver 不兼容。）
+    """
+
+    DELETE_OLD_CHECKPOINTS_SQL = """
+        delete from checkpoints
+        where thread_id = %s and checkpoint_ns = %s and checkpoint_id <> %s
+    """
+    DELETE_OLD_CHECKPOINT_WRITES_SQL = """
+        delete from checkpoint_writes
+        where thread_id = %s and checkpoint_ns = %s and checkpoint_id <> %s
+    """
+    # checkpoint_id 为时间有序的 uuid6：只删除早于最新 checkpoint 的 writes，
+    # 尚未写入的新 checkpoint 的 writes（durability="async"）保留
+    DELETE_STALE_CHECKPOINT_WRITES_SQL = """
+        delete from checkpoint_writes
+        where thread_id = %s and checkpoint_ns = %s
+        and checkpoint_id < (
+            select max(checkpoint_id) from checkpoints where thread_id = %s and checkpoint_ns = %s
+        )
+    """
+    DELETE_UNREFERENCED_BLOBS_SQL = """
+        delete from checkpoint_blobs
+        where thread_id = %s and checkpoint_ns = %s
+        and (channel, version) not in (select key, value from jsonb_each_text(%s))
+    """
+
+    def _filter_pending_writes(
+        self, pending_writes: list[tuple[str, list]], checkpoint: Checkpoint
+    ) -> list[tuple[str, list]]:
+        # 旧 checkpoint 的 writes 随后会被删除，无需写入；durability="async" 时新 checkpoint 的 writes
+        # 可能先于其 aput 暂存，需要保留（params 第 3 项为 checkpoint_id）
+        filtered = []
+        for query, params in pending_writes:
+            params = [param for param in params if param[2] == checkpoint["id"]]
+            if params:
+                filtered.append((query, params))
+        return filtered
+
+    async def _after_checkpoint(
+        self, cur: AsyncCursor[DictRow], thread_id: str, checkpoint_ns: str, checkpoint: Checkpoint
+    ) -> None:
+        await cur.execute(self.DELETE_OLD_CHECKPOINTS_SQL, (thread_id, checkpoint_ns, checkpoint["id"]))
+        await cur.execute(self.DELETE_OLD_CHECKPOINT_WRITES_SQL, (thread_id, checkpoint_ns, checkpoint["id"]))
+        await cur.execute(
+            self.DELETE_UNREFERENCED_BLOBS_SQL,
+            (thread_id, checkpoint_ns, Jsonb(checkpoint["channel_versions"])),
+        )
+
+    async def _after_flush(self, cur: AsyncCursor[DictRow], thread_id: str, checkpoint_ns: str) -> None:
+        # langgraph 在后台提交 aput_writes，上一步的 writes 可能在新 checkpoint 写入（并删除旧 checkpoint）后才暂存，
+        # 由后台任务单独写入时一并删除
+        await cur.execute(
+            self.DELETE_STALE_CHECKPOINT_WRITES_SQL, (thread_id, checkpoint_ns, thread_id, checkpoint_ns)
+        )
+
+
+class CachedCheckpointSaver(BaseCheckpointSaver):
+    """
+    两级 checkpointer：进程内 LRU/TTL 缓存最近活跃会话的最新 checkpoint，写入直通 Postgres。
+
+    多 worker 部署时开启 validate：读缓存前只查询该会话最新的 checkpoint_id（走主键索引，不加载 blob），
+    与缓存不一致时视为已被其他 worker 更新，回源加载。
+
+    缓存中保存以 serde 序列化后的数据，每次命中反序列化出新的对象：调用方修改返回的 checkpoint 不会影响缓存。
+    """
+
+    LATEST_CHECKPOINT_ID_SQL = """
+        select checkpoint_id from checkpoints
+        where thread_id = %s and checkpoint_ns = %s
+        order by checkpoint_id desc limit 1
+    """
+
+    def __init__(
+        self,
+        backend: AsyncPostgresSaver,
+        maxsize: int = 1000,
+        ttl: float = 300.0,
+        validate: bool = False,
+    ) -> None:
+        """
+        Args:
+            backend: 持久化 checkpointer。
+            maxsize: 最多缓存的会话数，超出时淘汰最久未使用的会话。
+            ttl: 缓存有效期（秒）。
+            validate: 读缓存前是否校验最新 checkpoint_id（多 worker 部署时需要开启）。
+        """
+        super().__init__(serde=backend.serde)
+        self._backend = backend
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._validate = validate
+        self._entries: OrderedDict[tuple[str, str], tuple[float, tuple[str, bytes]]] = OrderedDict()
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """读取 checkpoint，未指定 checkpoint_id（读取最新状态）时优先使用缓存。"""
+        started_at = time.perf_counter()
+        if get_checkpoint_id(config):
+            return await self._backend.aget_tuple(config)
+
+        key = self._key(config)
+        cached = self._get(key)
+        source = "cache"
+        if cached is not None and self._validate:
+            latest_id = await self._alatest_checkpoint_id(*key)
+            if latest_id != cached.config["configurable"]["checkpoint_id"]:
+                CHECKPOINT_CACHE_REQUESTS.labels(result="stale").inc()
+                self._entries.pop(key, None)
+                cached = None
+            source = "validated"
+
+        if cached is not None:
+            CHECKPOINT_CACHE_REQUESTS.labels(result="hit").inc()
+            CHECKPOINT_LOAD_SECONDS.labels(source=source).observe(time.perf_counter() - started_at)
+            return cached
+
+        CHECKPOINT_CACHE_REQUESTS.labels(result="miss").inc()
+        checkpoint_tuple = await self._backend.aget_tuple(config)
+        if checkpoint_tuple is not None:
+            self._set(key, checkpoint_tuple)
+        CHECKPOINT_LOAD_SECONDS.labels(source="backend").observe(time.perf_counter() - started_at)
+        return checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """写入 Postgres 成功后更新缓存。"""
+        key = self._key(config)
+        try:
+            next_config = await self._backend.aput(config, checkpoint, metadata, new_versions)
+        except BaseException:
+            self._entries.pop(key, None)
+            raise
+        parent_id = config["configurable"].get("checkpoint_id")
+        self._set(
+            key,
+            CheckpointTuple(
+                config=next_config,
+                checkpoint=checkpoint,
+                metadata=get_serializable_checkpoint_metadata(config, metadata),
+                parent_config=(
+                    {"configurable": {"thread_id": key[0], "checkpoint_ns": key[1], "checkpoint_id": parent_id}}
+                    if parent_id
+                    else None
+                ),
+                pending_writes=[],
+            ),
+        )
+        return next_config
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """写入 pending writes；缓存中的最新 checkpoint 不再完整，失效后由下一次 aput 或回源重建。"""
+        self._entries.pop(self._key(config), None)
+        await self._backend.aput_writes(config, writes, task_id, task_path)
+
+    def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        return self._backend.alist(config, filter=filter, before=before, limit=limit)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        for key in [key for key in self._entries if key[0] == thread_id]:
+            del self._entries[key]
+        await self._backend.adelete_thread(thread_id)
+
+    def get_next_version(self, current: Any, channel: None) -> Any:
+        return self._backend.get_next_version(current, channel)
+
+    async def _alatest_checkpoint_id(self, thread_id: str, checkpoint_ns: str) -> str | None:
+        async with self._backend._cursor() as cur:
+            await cur.execute(self.LATEST_CHECKPOINT_ID_SQL, (thread_id, checkpoint_ns))
+            row = await cur.fetchone()
+        return row["checkpoint_id"] if row else None
+
+    def _get(self, key: tuple[str, str]) -> CheckpointTuple | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        config, checkpoint, metadata, parent_config, pending_writes = self.serde.loads_typed(data)
+        if pending_writes is not None:
+            # msgpack 将元组还原为列表
+            pending_writes = [tuple(write) for write in pending_writes]
+        return CheckpointTuple(config, checkpoint, metadata, parent_config, pending_writes)
+
+    def _set(self, key: tuple[str, str], checkpoint_tuple: CheckpointTuple) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, self.serde.dumps_typed(tuple(checkpoint_tuple)))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _key(config: RunnableConfig) -> tuple[str, str]:
+        configurable = config["configurable"]
+        return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    有界的内存 checkpointer：限制会话数、空闲时间与序列化后的总字节数，超出时按 LRU 整体淘汰会话。
+
+    被淘汰的会话再次访问时从空状态开始。适用于不使用 Postgres 的测试/仿真环境。
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 10000,
+        idle_ttl: float = 6 * 3600,
+        max_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        """
+        Args:
+            max_threads: 最多保留的会话数。
+            idle_ttl: 会话空闲超过该时间（秒）后淘汰。
+            max_bytes: 所有会话序列化后数据的总字节数上限，当前写入的会话不会被淘汰。
+        """
+        super().__init__()
+        self._max_threads = max_threads
+        self._idle_ttl = idle_ttl
+        self._max_bytes = max_bytes
+        self._threads: OrderedDict[str, list] = OrderedDict()
+        """thread_id -> [最后访问时间, 字节数]，按最近访问排序。"""
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        with self._lock:
+            self._touch(config["configurable"]["thread_id"])
+            return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        blob_keys = [(thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items()]
+        with self._lock:
+            checkpoints = self.storage[thread_id][checkpoint_ns]
+            before = sum(self._size(self.blobs.get(key)) for key in blob_keys)
+            before += self._size(checkpoints.get(checkpoint["id"]))
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            after = sum(self._size(self.blobs.get(key)) for key in blob_keys)
+            after += self._size(checkpoints.get(checkpoint["id"]))
+            self._account(thread_id, after - before)
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        outer_key = (thread_id, configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"])
+        with self._lock:
+            before = self._size(self.writes.get(outer_key))
+            super().put_writes(config, writes, task_id, task_path)
+            self._account(thread_id, self._size(self.writes.get(outer_key)) - before)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            super().delete_thread(thread_id)
+            entry = self._threads.pop(thread_id, None)
+            if entry is not None:
+                self._total_bytes -= entry[1]
+            self._report()
+
+    def _touch(self, thread_id: str) -> None:
+        entry = self._threads.get(thread_id)
+        if entry is not None:
+            entry[0] = time.monotonic()
+            self._threads.move_to_end(thread_id)
+
+    def _account(self, thread_id: str, delta: int) -> None:
+        """记录会话字节数变化，并淘汰超出限制的会话。"""
+        entry = self._threads.setdefault(thread_id, [0.0, 0])
+        entry[0] = time.monotonic()
+        entry[1] += delta
+        self._threads.move_to_end(thread_id)
+        self._total_bytes += delta
+        self._evict(current=thread_id)
+        self._report()
+
+    def _evict(self, current: str) -> None:
+        idle_before = time.monotonic() - self._idle_ttl
+        while len(self._threads) > 1:
+            thread_id, (last_access, _) = next(iter(self._threads.items()))
+            if thread_id == current:
+                break
+            if last_access < idle_before:
+                reason = "idle"
+            elif len(self._threads) > self._max_threads:
+                reason = "max_threads"
+            elif self._total_bytes > self._max_bytes:
+                reason = "max_bytes"
+            else:
+                break
+            super().delete_thread(thread_id)
+            self._total_bytes -= self._threads.pop(thread_id)[1]
+            MEMORY_CHECKPOINT_EVICTIONS.labels(reason=reason).inc()
+
+    def _report(self) -> None:
+        MEMORY_CHECKPOINT_THREADS.set(len(self._threads))
+        MEMORY_CHECKPOINT_BYTES.set(self._total_bytes)
+
+    @classmethod
+    def _size(cls, value: Any) -> int:
+        """序列化数据占用的字节数（checkpoint/blob/writes 中的 bytes 之和）。"""
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        if isinstance(value, (tuple, list)):
+            return sum(cls._size(item) for item in value)
+        if isinstance(value, dict):
+            return sum(cls._size(item) for item in value.values())
+        return 0
@@ -1,3 +1,5 @@
+from typing import Any, Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -31,28 +33,233 @@ class ReactAgentSettings(BaseSettings):
         description="备用 OpenAI API 密钥",
     )
 
+    @property
+    def backup_llm_configured(self) -> bool:
+        """是否配置了备用模型（模型名与 API 地址均不为空）。"""
+        return bool(self.backup_llm_model and self.backup_openai_base_url)
+
+    # 历史摘要模型配置（为空时使用主模型配置）
+    summary_llm_model: str = Field(default="", description="历史摘要 LLM 模型，建议使用廉价模型")
+    summary_openai_base_url: str = Field(default="", description="历史摘要 OpenAI API 基础 URL")
+    summary_openai_api_key: str = Field(default="", description="历史摘要 OpenAI API 密钥")
+
     temperature: float = Field(default=0.01, description="温度")
 
+    # 对冲调用配置
+    llm_hedge_enabled: bool = Field(default=False, description="是否启用主/备模型对冲调用")
+    llm_hedge_delay: float = Field(
+        default=5.0, description="对冲延迟（秒），主模型超过该时间未返回时同时调用备用模型，建议取主模型 p95 延迟"
+    )
+
+    # 主模型熔断配置
+    circuit_breaker_enabled: bool = Field(
+        default=True, description="是否启用主模型熔断，熔断期间直接使用备用模型（仅在配置了备用模型时生效）"
+    )
+    circuit_breaker_window_size: int = Field(default=20, description="熔断统计滑动窗口大小（调用次数）")
+    circuit_breaker_min_calls: int = Field(default=5, description="窗口内开始计算比率的最少调用次数")
+    circuit_breaker_failure_rate: float = Field(default=0.5, description="熔断失败率阈值")
+    circuit_breaker_slow_call_duration: float = Field(default=20.0, description="慢调用耗时阈值（秒）")
+    circuit_breaker_slow_call_rate: float = Field(default=0.8, description="熔断慢调用率阈值")
+    circuit_breaker_cooldown: float = Field(default=30.0, description="熔断冷却时间（秒），之后半开试探")
+    circuit_breaker_half_open_calls: int = Field(default=1, description="半开状态放行的试探调用数")
+
+    # 历史压缩配置
+    history_compaction_enabled: bool = Field(default=False, description="是否启用基于 token 预算的会话历史压缩")
+    history_max_tokens: int = Field(default=8000, description="会话历史（含摘要）的 token 预算")
+    history_keep_last_turns: int = Field(default=4, description="压缩时原文保留的最近轮数")
+    history_tool_result_max_chars: int = Field(default=800, description="过期工具结果保留的最大字符数")
+    history_compaction_timeout: float = Field(
+        default=5.0, description="单次历史压缩（摘要模型调用）超时（秒），超时则跳过本轮压缩"
+    )
+
+    # 工具结果规范化配置
+    tool_result_max_tokens: dict[str, int] = Field(
+        default={"faq_query": 1500, "graph_query": 1500, "get_product_price": 1500},
+        description="按工具名配置的工具结果 token 上限",
+    )
+    tool_result_default_max_tokens: int = Field(default=1500, description="未单独配置的工具结果 token 上限")
+    tool_result_drop_fields: list[str] = Field(
+        default=["embedding", "vector", "score", "_score", "_id", "_index", "create_time", "update_time"],
+        description="工具结果记录层级（结果本身、列表条目）中剔除的字段名（模型不需要的检索元数据）",
+    )
+
+    # 工具查询缓存配置（TTL <= 0 时不缓存，但仍合并并发的相同请求）
+    faq_cache_ttl: float = Field(default=600.0, description="FAQ 查询结果缓存有效期（秒）")
+    graph_cache_ttl: float = Field(default=600.0, description="图谱查询结果缓存有效期（秒）")
+    product_price_cache_ttl: float = Field(default=300.0, description="产品价格查询结果缓存有效期（秒）")
+    tool_cache_maxsize: int = Field(default=1024, description="每个工具查询缓存的最大条目数")
+
+    # 首轮回复缓存配置
+    response_cache_enabled: bool = Field(default=False, description="是否启用首轮常见问题的完整回复缓存")
+    response_cache_ttl: float = Field(default=3600.0, description="首轮回复缓存有效期（秒）")
+    response_cache_maxsize: int = Field(default=2048, description="首轮回复缓存的最大条目数")
+    response_cache_version: str = Field(
+        default="", description="首轮回复缓存版本，FAQ/价格等数据更新后修改该值使旧缓存失效（提示词变更会自动失效）"
+    )
+
+    # 会话调度配置
+    thread_coalesce_window: float = Field(
+        default=0.0, description="同一会话新消息开始处理前等待合并后续消息的时间（秒），0 表示只合并排队期间到达的消息"
+    )
+    thread_coalesce_max_messages: int = Field(default=5, description="单轮最多合并的用户消息数")
+
+    # 会话持久化配置
+    checkpoint_mode: Literal["full", "pipelined", "shallow", "memory"] = Field(
+        default="full",
+        description="checkpoint 模式：full 保留每一步的历史，pipelined 同 full 但每步的写入合并为一次 pipeline 提交，"
+        "shallow 每个会话只保留最新状态（不支持回放），memory 使用有界内存存储（不使用 Postgres 的测试/仿真环境）",
+    )
+    checkpoint_writes_flush_delay: float = Field(
+        default=0.5,
+        description="pipelined/shallow 模式下 pending writes 等待随下一个 checkpoint 一起提交的最长时间（秒），0 表示立即写入",
+    )
+    checkpoint_durability: Literal["sync", "async", "exit"] = Field(
+        default="async",
+        description="checkpoint 写入时机：sync 每步同步写入，async 每步异步写入，exit 仅在一轮对话结束时写入",
+    )
+
+    checkpoint_cache_enabled: bool = Field(default=False, description="是否在进程内缓存活跃会话的最新 checkpoint")
+    checkpoint_cache_maxsize: int = Field(default=1000, description="checkpoint 缓存的最大会话数")
+    checkpoint_cache_ttl: float = Field(default=300.0, description="checkpoint 缓存有效期（秒）")
+    checkpoint_cache_validate: bool | None = Field(
+        default=None,
+        description="读缓存前是否校验最新 checkpoint_id，为空时在多 worker（WORKERS > 1）部署下自动开启",
+    )
+
+    memory_checkpoint_max_threads: int = Field(default=10000, description="内存 checkpointer 最多保留的会话数")
+    memory_checkpoint_idle_ttl: float = Field(default=21600.0, description="内存 checkpointer 会话空闲淘汰时间（秒）")
+    memory_checkpoint_max_bytes: int = Field(
+        default=512 * 1024 * 1024, description="内存 checkpointer 所有会话序列化数据的总字节数上限"
+    )
+
+    # checkpoint 保留策略（定时任务）
+    checkpoint_retention_enabled: bool = Field(default=False, description="是否启用 checkpoint 定时清理任务")
+    checkpoint_retention_hour: int = Field(default=3, description="每天执行清理的小时（0-23）")
+    checkpoint_retention_idle_days: int = Field(default=90, description="会话空闲超过该天数后整体删除")
+    checkpoint_retention_prune_after_days: int = Field(
+        default=7, description="会话空闲超过该天数后只保留最新 checkpoint"
+    )
+    checkpoint_retention_batch_size: int = Field(default=200, description="每批处理的会话数")
+    checkpoint_retention_batch_pause: float = Field(default=0.5, description="批次之间的暂停时间（秒）")
+    checkpoint_retention_lock_timeout: float = Field(default=2.0, description="清理语句等待行锁的超时（秒）")
+    checkpoint_retention_max_runtime: float = Field(default=3600.0, description="单次清理的最长运行时间（秒）")
+    checkpoint_retention_vacuum: bool = Field(default=True, description="清理后是否 VACUUM (ANALYZE) checkpoint 表")
+
+    # 提示词布局配置
+    prompt_cache_friendly: bool = Field(
+        default=False,
+        description="是否使用前缀缓存友好的提示词布局：静态 system prompt 在前，时间/用户等易变上下文在末尾",
+    )
+    prompt_context_time_format: str = Field(
+        default="%Y-%m-%d %H:00", description="缓存友好布局下上下文时间的格式（粒度越粗缓存越稳定）"
+    )
+
+    # 请求时限配置
+    request_timeout: float = Field(default=60.0, description="单次对话请求默认处理时限（秒）")
+    final_answer_reserve: float = Field(
+        default=10.0, description="剩余时间低于该值（秒）时不再调用工具，强制模型直接给出最终回复"
+    )
+
     faq_url: str = Field(
         default="http://192.168.151.84:8888/query", description="FAQ 查询 URL"
     )
     faq_top_n: int = Field(default=5, description="FAQ 查询返回结果数量")
+    faq_timeout: float = Field(default=10.0, description="FAQ 查询超时（秒）")
 
     graph_url: str = Field(
         default="http://192.168.151.84:10001/nl2graph_qa", description="图谱查询 URL"
     )
+    graph_timeout: float = Field(default=20.0, description="图谱查询超时（秒）")
 
     product_info_url: str = Field(default="", description="产品实时信息查询 URL")
+    product_info_timeout: float = Field(default=10.0, description="产品实时信息查询超时（秒）")
+
+    # 产品目录本地索引（定时任务全量拉取，get_product_price 优先本地查询）
+    product_catalog_enabled: bool = Field(default=False, description="是否定时拉取产品目录并在本地回答价格查询")
+    product_catalog_url: str = Field(
+        default="", description="产品目录全量拉取 URL（POST {\"index_name\": ...}，返回产品列表或 {\"data\": [...]}）"
+    )
+    product_catalog_indexes: list[str] = Field(
+        default=["tm_product", "jd_product", "overseas_product"], description="需要拉取的平台索引"
+    )
+    product_catalog_refresh_interval: float = Field(default=600.0, description="产品目录刷新间隔（秒）")
+    product_catalog_timeout: float = Field(default=60.0, description="产品目录拉取超时（秒）")
+    product_catalog_fields: dict[str, str] = Field(
+        default={"model": "model", "color": "color", "material": "material", "price": "price"},
+        description="索引字段（model/color/material/price）到产品字段名的映射",
+    )
+    product_catalog_max_results: int = Field(default=10, description="本地查询最多返回的产品数")
 
     wechat_push_url: str = Field(default="", description="微信群通知 URL")
     wechat_push_token: str = Field(default="", description="微信群通知 Token")
     wechat_push_api_key: str = Field(default="", description="微信群通知 API Key")
     wechat_push_group_name: str = Field(default="", description="微信群通知群名称")
+    wechat_push_timeout: float = Field(default=10.0, description="微信群通知超时（秒）")
+
+    # 人工服务通知 outbox（定时任务异步投递）
+    notification_outbox_enabled: bool = Field(
+        default=False, description="是否通过 Postgres outbox 异步投递人工服务通知，关闭时在对话中同步发送"
+    )
+    notification_dispatch_interval: float = Field(default=5.0, description="outbox 投递任务执行间隔（秒）")
+    notification_dispatch_batch_size: int = Field(default=20, description="outbox 每批投递的通知数")
+    notification_dispatch_max_runtime: float = Field(default=60.0, description="单次投递任务的最长运行时间（秒）")
+    notification_claim_lease: float = Field(
+        default=300.0, description="通知被认领后的租约时长（秒），投递 worker 异常退出时租约到期后可被重新认领"
+    )
+    notification_dedup_window: float = Field(
+        default=600.0, description="同一会话在该时间（秒）内已发送过通知时，不再重复投递"
+    )
+    notification_max_attempts: int = Field(default=5, description="单条通知最大投递次数，超过后标记为失败")
+    notification_retry_backoff_base: float = Field(default=10.0, description="投递失败重试退避基数（秒）")
+    notification_retry_backoff_max: float = Field(default=600.0, description="投递失败重试退避上限（秒）")
+
+    # 上游 HTTP 客户端配置（FAQ/图谱/价格/微信通知各自独立的连接池）
+    http_max_connections: int = Field(default=50, description="每个上游客户端的最大连接数")
+    http_max_keepalive_connections: int = Field(default=20, description="每个上游客户端的最大保活连接数")
+    http_keepalive_expiry: float = Field(default=30.0, description="空闲保活连接的过期时间（秒）")
+    http_connect_timeout: float = Field(default=3.0, description="建立连接超时（秒）")
+    http_pool_timeout: float = Field(default=5.0, description="等待连接池空闲连接的超时（秒）")
+    http2: bool = Field(default=False, description="是否启用 HTTP/2（需安装 h2）")
+    http_warmup_connections: int = Field(default=2, description="启动时每个上游预先建立的连接数，0 表示不预热")
+    http_warmup_path: str = Field(
+        default="/", description="预热时发送 HEAD 请求的路径，上游根路径需要鉴权或有副作用时可改为健康检查路径"
+    )
+    http_client_overrides: dict[str, dict[str, Any]] = Field(
+        default={"wechat_push": {"max_connections": 5, "max_keepalive_connections": 2, "warmup_connections": 0}},
+        description="按上游（faq/graph/product_info/wechat_push）覆盖上述配置，键为 HttpClientRegistry.register 的参数名",
+    )
+
+    # 上游调用重试配置
+    retry_max_attempts: int = Field(default=2, description="上游调用最大尝试次数（含首次）")
+    retry_backoff_base: float = Field(default=0.5, description="重试退避基数（秒），实际等待为 [0, base * 2^n] 内的随机值")
+    retry_backoff_max: float = Field(default=10.0, description="重试退避上限（秒）")
+    retry_after_max: float = Field(default=30.0, description="遵循上游 Retry-After 时的最长等待（秒），超过则不再重试")
+    retry_policy_overrides: dict[str, dict[str, float]] = Field(
+        default={},
+        description="按上游（faq/graph/product_info/wechat_push）覆盖重试配置，键为 max_attempts/backoff_base/backoff_max",
+    )
+    retry_budget_ratio: float = Field(default=0.1, description="全局重试预算：重试量占上游请求量的比例上限")
+    retry_budget_min_per_second: float = Field(default=1.0, description="全局重试预算：每秒保底允许的重试次数")
+    retry_budget_max_tokens: float = Field(default=10.0, description="全局重试预算：允许的最大突发重试数")
 
     language_detector_model_path: str = Field(default=".huggingface/lid.176.bin", description="语言检测模型路径")
     language_detector_threshold: float = Field(default=0.8, description="语言检测阈值")
     language_detector_min_length: int = Field(default=5, description="语言检测最小文本长度")
     language_detector_max_length: int = Field(default=500, description="语言检测最大文本长度")
+    language_detector_prefer_compressed: bool = Field(
+        default=False, description="模型同目录下存在同名 .ftz 压缩模型时优先加载（内存约 1 MB，准确率略低）"
+    )
+    language_detector_cache_size: int = Field(
+        default=10000, description="语言检测结果 LRU 缓存大小（按预处理后的文本），0 表示不缓存"
+    )
+    language_detector_max_workers: int = Field(default=4, description="异步语言检测线程池大小")
+    language_detector_warmup: bool = Field(
+        default=True, description="应用启动时预加载语言检测模型（仅在启用回复缓存等使用语言检测的功能时生效）"
+    )
+    language_detector_preload: bool = Field(
+        default=False,
+        description="导入时即加载语言检测模型，配合 gunicorn --preload 等先加载后 fork 的部署方式让 worker 共享模型内存",
+    )
     language_detector_exclude: list[str] = Field(default=[
         "IVERTU",
         "VERTU",
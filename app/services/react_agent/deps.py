@@ -1,13 +1,75 @@
-from .agent import ReActAgent, AISalesAgent
-from .shared import chat_model, backup_chat_model
+import hashlib
+
+from .agent import AISalesAgent, ReActAgent
+from .caching import ResponseCache
+from .config import react_agent_settings
+from .history import HistoryCompactor
+from .prompts import (
+    HISTORY_SUMMARY_PROMPT,
+    REACT_AGENT_CONTEXT_PROMPT,
+    REACT_AGENT_STATIC_SYSTEM_PROMPT,
+    REACT_AGENT_SYSTEM_PROMPT,
+)
+from .scheduler import ThreadRunScheduler
+from .shared import (
+    backup_chat_model,
+    chat_model,
+    chat_model_breaker,
+    language_detector,
+    response_cache,
+    summary_chat_model,
+    thread_run_scheduler,
+)
 from .tools import TOOLS
-from .prompts import REACT_AGENT_SYSTEM_PROMPT
 
 
-def get_react_agent() -> ReActAgent:
+async def get_react_agent() -> ReActAgent:
+    # 异步依赖在事件循环中执行：Postgres checkpointer（AsyncPostgresSaver 子类）构造时需要当前运行的事件循环，
+    # 同步依赖会被 FastAPI 放到线程池中执行
+    system_prompt = (
+        REACT_AGENT_STATIC_SYSTEM_PROMPT
+        if react_agent_settings.prompt_cache_friendly
+        else REACT_AGENT_SYSTEM_PROMPT
+    )
+    context_prompt = REACT_AGENT_CONTEXT_PROMPT if react_agent_settings.prompt_cache_friendly else None
     return AISalesAgent(
         chat_model=chat_model,
         tools=TOOLS,
-        system_prompt=REACT_AGENT_SYSTEM_PROMPT,
+        system_prompt=system_prompt,
         backup_chat_model=backup_chat_model,
+        hedge_delay=react_agent_settings.llm_hedge_delay if react_agent_settings.llm_hedge_enabled else None,
+        circuit_breaker=chat_model_breaker if react_agent_settings.circuit_breaker_enabled else None,
+        final_answer_reserve=react_agent_settings.final_answer_reserve,
+        context_prompt=context_prompt,
+        context_time_format=react_agent_settings.prompt_context_time_format,
+        history_compactor=(
+            HistoryCompactor(
+                chat_model=summary_chat_model,
+                summary_prompt=HISTORY_SUMMARY_PROMPT,
+                max_tokens=react_agent_settings.history_max_tokens,
+                keep_last_turns=react_agent_settings.history_keep_last_turns,
+                tool_result_max_chars=react_agent_settings.history_tool_result_max_chars,
+                timeout=react_agent_settings.history_compaction_timeout,
+            )
+            if react_agent_settings.history_compaction_enabled
+            else None
+        ),
+        response_cache=(
+            ResponseCache(
+                cache=response_cache,
+                language_detector=language_detector,
+                # 提示词变更后旧缓存自动失效
+                namespace=hashlib.sha256(
+                    f"{system_prompt}{context_prompt}{react_agent_settings.response_cache_version}".encode()
+                ).hexdigest()[:16],
+                uncacheable_tools=["send_human_notification"],
+            )
+            if react_agent_settings.response_cache_enabled
+            else None
+        ),
+        durability=react_agent_settings.checkpoint_durability,
     )
+
+
+def get_thread_run_scheduler() -> ThreadRunScheduler:
+    return thread_run_scheduler
@@ -0,0 +1,138 @@
+"""对话历史压缩：token 估算与滚动摘要。"""
+
+import json
+import re
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AnyMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：CJK 字符按 1 个 token，其余字符按 4 个字符 1 个 token。"""
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def estimate_message_tokens(messages: list[BaseMessage]) -> int:
+    """粗略估算消息列表的 token 数（含工具调用参数）。"""
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+        total += estimate_tokens(content) + 4
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            total += estimate_tokens(json.dumps(tool_call["args"], ensure_ascii=False))
+    return total
+
+
+class HistoryCompactor:
+    """
+    基于 token 预算的会话历史压缩器。
+
+    历史超出预算时：保留最近 keep_last_turns 轮原文，更早的轮次由（廉价）模型总结进滚动摘要后删除；
+    保留轮次中除当前轮外的工具结果截断到 tool_result_max_chars，截断后的消息带 truncated 标记，不会重复截断。
+    """
+
+    def __init__(
+        self,
+        chat_model: BaseChatModel,
+        summary_prompt: str,
+        max_tokens: int = 8000,
+        keep_last_turns: int = 4,
+        tool_result_max_chars: int = 800,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Args:
+            chat_model: 用于生成摘要的对话模型。
+            summary_prompt: 摘要提示词，需包含占位符 {summary} 与 {history}。
+            max_tokens: 历史消息（含摘要）的 token 预算。
+            keep_last_turns: 原文保留的最近轮数（一轮从一条用户消息开始），当前轮总是保留，小于 1 时按 1 处理。
+            tool_result_max_chars: 过期工具结果保留的最大字符数。
+            timeout: 单次压缩（摘要模型调用）的超时（秒），为 None 时不单独限制。
+        """
+        self._chat_model = chat_model
+        self._summary_prompt = summary_prompt
+        self._max_tokens = max_tokens
+        self._keep_last_turns = keep_last_turns
+        self._tool_result_max_chars = tool_result_max_chars
+        self.timeout = timeout
+
+    async def acompact(self, messages: list[AnyMessage], summary: str = "") -> dict | None:
+        """
+        按预算压缩历史。
+
+        Args:
+            messages: 当前会话消息。
+            summary: 已有的历史摘要。
+
+        Returns:
+            未超预算时返回 None；否则返回状态更新 {"messages": [RemoveMessage | 截断后的 ToolMessage, ...], "summary": ...}。
+        """
+        if estimate_message_tokens(messages) + estimate_tokens(summary) <= self._max_tokens:
+            return None
+
+        turn_starts = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+        if not turn_starts:
+            return None
+        keep_last_turns = max(self._keep_last_turns, 1)
+        cut = turn_starts[-keep_last_turns] if len(turn_starts) >= keep_last_turns else 0
+        older, kept = messages[:cut], messages[cut:]
+
+        # 当前轮（最后一条用户消息之后）的工具结果仍可能被模型引用，不截断
+        current_turn_start = turn_starts[-1] - cut
+        updates: list[AnyMessage] = [
+            self._truncate_tool_message(message)
+            for message in kept[:current_turn_start]
+            if isinstance(message, ToolMessage)
+            and not message.additional_kwargs.get("truncated")
+            and len(str(message.content)) > self._tool_result_max_chars
+        ]
+
+        if older:
+            prompt = self._summary_prompt.format(summary=summary or "无", history=self._render(older))
+            response = await self._chat_model.ainvoke([SystemMessage(content=prompt)])
+            content = response.content
+            summary = content.strip() if isinstance(content, str) else str(content).strip()
+            updates = [RemoveMessage(id=message.id) for message in older] + updates
+
+        if not updates:
+            return None
+        return {"messages": updates, "summary": summary}
+
+    def _truncate_tool_message(self, message: ToolMessage) -> ToolMessage:
+        """截断工具结果，保留原消息 id 以便覆盖 checkpoint 中的原消息，并标记为已截断。"""
+        return ToolMessage(
+            content=str(message.content)[: self._tool_result_max_chars] + "…（已截断）",
+            additional_kwargs={"truncated": True},
+            id=message.id,
+            tool_call_id=message.tool_call_id,
+            name=message.name,
+            status=message.status,
+        )
+
+    def _render(self, messages: list[AnyMessage]) -> str:
+        """将待总结的消息渲染为纯文本，工具结果截断以控制摘要输入。"""
+        lines = []
+        for message in messages:
+            content = str(message.content)
+            if isinstance(message, ToolMessage):
+                content = content[: self._tool_result_max_chars]
+                lines.append(f"[工具 {message.name} 结果] {content}")
+            elif isinstance(message, HumanMessage):
+                lines.append(f"[用户] {content}")
+            else:
+                tool_names = ", ".join(tool_call["name"] for tool_call in getattr(message, "tool_calls", None) or [])
+                if content:
+                    lines.append(f"[顾问] {content}")
+                if tool_names:
+                    lines.append(f"[顾问调用工具] {tool_names}")
+        return "\n".join(lines)
@@ -0,0 +1,240 @@
+"""React Agent 定时任务：Postgres checkpoint 保留策略、人工服务通知 outbox 投递、产品目录刷新。"""
+
+import logging
+import time
+from datetime import UTC, datetime, timedelta
+
+import httpx
+import psycopg
+from langgraph.checkpoint.base.id import UUID
+
+from app.config import settings
+from app.core.shared import httpx_sync_client, scheduler, shutdown_hooks, startup_hooks
+
+from .catalog import ProductCatalogIndex
+from .config import react_agent_settings
+from .metrics import (
+    CHECKPOINT_RETENTION_DELETED_ROWS,
+    PRODUCT_CATALOG_PRODUCTS,
+    PRODUCT_CATALOG_REFRESHED,
+)
+from .outbox import close_outbox, dispatch_notifications, setup_outbox
+from .shared import data_manager
+
+logger = logging.getLogger(__name__)
+
+# 多 worker 部署时每个进程都会注册该任务，通过 advisory lock 保证同一时间只有一个进程在清理
+_RETENTION_LOCK_KEY = 0x7665727475  # "vertu"
+
+_SELECT_THREADS_SQL = """
+select thread_id, max(checkpoint_id) as last_checkpoint_id, count(*) as checkpoints
+from checkpoints
+where thread_id > %s
+group by thread_id
+order by thread_id
+limit %s
+"""
+
+# 删除时再次确认会话仍然空闲：查询与删除之间恢复活跃的会话不会被删除
+# （按 checkpoint_id 比较，走主键索引，不读取 checkpoint 大字段）
+_STILL_IDLE_SQL = """
+not exists (
+    select 1 from checkpoints c
+    where c.thread_id = {table}.thread_id and c.checkpoint_id >= %s
+)
+"""
+
+_DELETE_THREADS_SQL = {
+    table: f"delete from {table} where thread_id = any(%s) and {_STILL_IDLE_SQL.format(table=table)}"
+    for table in ("checkpoint_writes", "checkpoint_blobs", "checkpoints")
+}
+
+# 只保留每个 (thread_id, checkpoint_ns) 的最新 checkpoint（checkpoint_id 为时间有序的 uuid6）
+_PRUNE_THREADS_SQL = {
+    "checkpoint_writes": """
+        delete from checkpoint_writes w
+        using (
+            select thread_id, checkpoint_ns, max(checkpoint_id) as latest
+            from checkpoints where thread_id = any(%s) group by thread_id, checkpoint_ns
+        ) l
+        where w.thread_id = l.thread_id and w.checkpoint_ns = l.checkpoint_ns and w.checkpoint_id < l.latest
+    """,
+    "checkpoints": """
+        delete from checkpoints c
+        using (
+            select thread_id, checkpoint_ns, max(checkpoint_id) as latest
+            from checkpoints where thread_id = any(%s) group by thread_id, checkpoint_ns
+        ) l
+        where c.thread_id = l.thread_id and c.checkpoint_ns = l.checkpoint_ns and c.checkpoint_id < l.latest
+    """,
+    # 删除不再被任何 checkpoint 的 channel_versions 引用的 blob
+    "checkpoint_blobs": """
+        delete from checkpoint_blobs b
+        where b.thread_id = any(%s)
+        and not exists (
+            select 1 from checkpoints c
+            where c.thread_id = b.thread_id
+            and c.checkpoint_ns = b.checkpoint_ns
+            and c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+        )
+    """,
+}
+
+
+# checkpoint_id 为 uuid6：高位是自 UUID 纪元（1582-10-15）起的 100 纳秒间隔数，字符串顺序即时间顺序
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+def _checkpoint_time(checkpoint_id: str) -> datetime:
+    """checkpoint 的创建时间（取自 checkpoint_id）。"""
+    return datetime.fromtimestamp((UUID(checkpoint_id).time - _UUID_EPOCH_OFFSET) / 10**7, UTC)
+
+
+def _min_checkpoint_id(ts: datetime) -> str:
+    """创建时间不早于 ts 的 checkpoint_id 的下界（时钟序列与节点取 0）。"""
+    timestamp = int(ts.timestamp()) * 10**7 + _UUID_EPOCH_OFFSET
+    return str(UUID(int=(timestamp >> 12) << 80 | (timestamp & 0x0FFF) << 64, version=6))
+
+
+def _delete(conn: psycopg.Connection, statements: dict[str, str], params: tuple) -> None:
+    """在一个短事务中按顺序执行删除语句。"""
+    with conn.transaction():
+        for table, sql in statements.items():
+            deleted = conn.execute(sql, params).rowcount
+            CHECKPOINT_RETENTION_DELETED_ROWS.labels(table=table).inc(deleted)
+
+
+def prune_checkpoints() -> None:
+    """
+    按保留策略清理 checkpoint：
+
+    - 最后活跃时间早于 checkpoint_retention_idle_days 的会话整体删除；
+    - 最后活跃时间早于 checkpoint_retention_prune_after_days 的会话只保留最新 checkpoint，并删除无引用的 blob；
+    - 清理完成后 VACUUM (ANALYZE) 三张 checkpoint 表。
+
+    按 thread_id 分批处理，每批一个短事务，批次之间暂停，避免阻塞在线流量。
+    """
+    now = datetime.now(UTC)
+    idle_cutoff = now - timedelta(days=react_agent_settings.checkpoint_retention_idle_days)
+    prune_cutoff = now - timedelta(days=react_agent_settings.checkpoint_retention_prune_after_days)
+    started_at = time.monotonic()
+    deleted_threads = pruned_threads = 0
+
+    with psycopg.connect(settings.postgres_url, autocommit=True) as conn:
+        if not conn.execute("select pg_try_advisory_lock(%s)", (_RETENTION_LOCK_KEY,)).fetchone()[0]:
+            logger.info("Checkpoint retention is running in another process, skipped")
+            return
+        try:
+            conn.execute(f"set lock_timeout = '{react_agent_settings.checkpoint_retention_lock_timeout}s'")
+            after = ""
+            while time.monotonic() - started_at < react_agent_settings.checkpoint_retention_max_runtime:
+                rows = conn.execute(
+                    _SELECT_THREADS_SQL, (after, react_agent_settings.checkpoint_retention_batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                after = rows[-1][0]
+
+                idle, prunable = [], []
+                for thread_id, last_checkpoint_id, checkpoints in rows:
+                    last_active = _checkpoint_time(last_checkpoint_id)
+                    if last_active < idle_cutoff:
+                        idle.append(thread_id)
+                    elif last_active < prune_cutoff and checkpoints > 1:
+                        prunable.append(thread_id)
+
+                try:
+                    if idle:
+                        _delete(conn, _DELETE_THREADS_SQL, (idle, _min_checkpoint_id(idle_cutoff)))
+                        deleted_threads += len(idle)
+                    if prunable:
+                        _delete(conn, _PRUNE_THREADS_SQL, (prunable,))
+                        pruned_threads += len(prunable)
+                except psycopg.errors.LockNotAvailable:
+                    # 会话正在被写入，留到下次清理
+                    logger.warning(f"Checkpoint retention batch after {after!r} skipped: lock not available")
+
+                time.sleep(react_agent_settings.checkpoint_retention_batch_pause)
+            else:
+                logger.warning("Checkpoint retention reached max runtime, remaining threads left for next run")
+
+            if react_agent_settings.checkpoint_retention_vacuum and (deleted_threads or pruned_threads):
+                for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes"):
+                    conn.execute(f"vacuum (analyze) {table}")
+        finally:
+            conn.execute("select pg_advisory_unlock(%s)", (_RETENTION_LOCK_KEY,))
+
+    logger.info(
+        f"Checkpoint retention finished in {time.monotonic() - started_at:.1f}s: "
+        f"{deleted_threads} idle threads deleted, {pruned_threads} threads pruned to latest checkpoint"
+    )
+
+
+def refresh_product_catalogs() -> None:
+    """
+    全量拉取各平台产品目录并重建索引，所有索引构建完成后整体替换 data_manager 中的数据。
+
+    单个平台拉取失败时沿用该平台上一次的索引。
+    """
+    current = data_manager.get_data()
+    indexes = {}
+    for index_name in react_agent_settings.product_catalog_indexes:
+        try:
+            response = httpx_sync_client.post(
+                react_agent_settings.product_catalog_url,
+                json={"index_name": index_name},
+                timeout=react_agent_settings.product_catalog_timeout,
+            )
+            response.raise_for_status()
+            data = response.json()
+            products = data["data"] if isinstance(data, dict) else data
+            indexes[index_name] = ProductCatalogIndex(products, react_agent_settings.product_catalog_fields)
+        except (httpx.HTTPError, ValueError, KeyError, TypeError, AttributeError) as e:
+            # 请求失败、响应不是 JSON 或结构不符合预期
+            logger.error(f"Failed to refresh product catalog {index_name}: {e.__class__.__name__}: {e}")
+            if index_name in current:
+                indexes[index_name] = current[index_name]
+            continue
+        PRODUCT_CATALOG_PRODUCTS.labels(index=index_name).set(len(indexes[index_name]))
+        PRODUCT_CATALOG_REFRESHED.labels(index=index_name).set_to_current_time()
+
+    data_manager.update_data(indexes)
+    logger.info(f"Product catalogs refreshed: { {name: len(index) for name, index in indexes.items()} }")
+
+
+if react_agent_settings.checkpoint_retention_enabled:
+    scheduler.add_job(
+        prune_checkpoints,
+        "cron",
+        hour=react_agent_settings.checkpoint_retention_hour,
+        id="react_agent_prune_checkpoints",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+
+if react_agent_settings.notification_outbox_enabled:
+    startup_hooks.append(setup_outbox)
+    shutdown_hooks.append(close_outbox)
+    scheduler.add_job(
+        dispatch_notifications,
+        "interval",
+        seconds=react_agent_settings.notification_dispatch_interval,
+        id="react_agent_dispatch_notifications",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+
+if react_agent_settings.product_catalog_enabled:
+    scheduler.add_job(
+        refresh_product_catalogs,
+        "interval",
+        seconds=react_agent_settings.product_catalog_refresh_interval,
+        # 启动后立即拉取一次
+        next_run_time=datetime.now(),
+        id="react_agent_refresh_product_catalogs",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
@@ -0,0 +1,183 @@
+"""React Agent 业务指标（Prometheus），随全局 /metrics 一起暴露。"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+TIME_TO_FIRST_TOKEN = Histogram(
+    "react_agent_time_to_first_token_seconds",
+    "流式对话从收到请求到输出首个 token 的耗时",
+    buckets=(0.25, 0.5, 1, 1.5, 2, 3, 5, 8, 13, 21),
+)
+
+LLM_HEDGED_CALLS = Counter(
+    "react_agent_llm_hedged_calls_total",
+    "触发对冲的 LLM 调用次数，按先返回的模型（primary/backup/none）区分",
+    ["winner"],
+)
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    "react_agent_circuit_breaker_state",
+    "熔断器状态：0=closed，1=half_open，2=open",
+    ["name"],
+)
+
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    "react_agent_circuit_breaker_transitions_total",
+    "熔断器状态切换次数，按切换后的状态区分",
+    ["name", "state"],
+)
+
+LLM_PROMPT_TOKENS = Counter(
+    "react_agent_llm_prompt_tokens_total",
+    "agent 节点 LLM 调用的输入 token 数",
+    ["model"],
+)
+
+LLM_CACHED_PROMPT_TOKENS = Counter(
+    "react_agent_llm_cached_prompt_tokens_total",
+    "agent 节点 LLM 调用中命中服务端前缀缓存的输入 token 数",
+    ["model"],
+)
+
+TOOL_RESULT_BYTES = Histogram(
+    "react_agent_tool_result_bytes",
+    "工具结果序列化后的大小（字节），按工具与处理阶段（raw/normalized）区分",
+    ["tool", "stage"],
+    buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536),
+)
+
+TOOL_CACHE_REQUESTS = Counter(
+    "react_agent_tool_cache_requests_total",
+    "工具查询缓存请求次数，按结果（hit/miss/coalesced）区分",
+    ["cache", "result"],
+)
+
+TOOL_CACHE_SIZE = Gauge(
+    "react_agent_tool_cache_size",
+    "工具查询缓存当前条目数",
+    ["cache"],
+)
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "react_agent_response_cache_requests_total",
+    "首轮回复缓存查询次数，按结果（hit/miss）区分",
+    ["result"],
+)
+
+RESPONSE_CACHE_SIZE = Gauge(
+    "react_agent_response_cache_size",
+    "首轮回复缓存当前条目数",
+)
+
+COALESCED_MESSAGES = Counter(
+    "react_agent_coalesced_messages_total",
+    "与同一会话中排队消息合并处理的用户消息数（每条少一轮 agent 调用）",
+)
+
+CHECKPOINT_RETENTION_DELETED_ROWS = Counter(
+    "react_agent_checkpoint_retention_deleted_rows_total",
+    "checkpoint 保留策略清理删除的行数",
+    ["table"],
+)
+
+CHECKPOINT_CACHE_REQUESTS = Counter(
+    "react_agent_checkpoint_cache_requests_total",
+    "会话最新状态缓存查询次数，按结果（hit/miss/stale）区分",
+    ["result"],
+)
+
+CHECKPOINT_LOAD_SECONDS = Histogram(
+    "react_agent_checkpoint_load_seconds",
+    "加载会话最新状态的耗时，按来源（cache/validated/backend）区分",
+    ["source"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+MEMORY_CHECKPOINT_THREADS = Gauge(
+    "react_agent_memory_checkpoint_threads",
+    "内存 checkpointer 中常驻的会话数",
+)
+
+MEMORY_CHECKPOINT_BYTES = Gauge(
+    "react_agent_memory_checkpoint_bytes",
+    "内存 checkpointer 中常驻会话序列化后的总字节数",
+)
+
+MEMORY_CHECKPOINT_EVICTIONS = Counter(
+    "react_agent_memory_checkpoint_evictions_total",
+    "内存 checkpointer 淘汰的会话数，按原因（idle/max_threads/max_bytes）区分",
+    ["reason"],
+)
+
+UPSTREAM_RETRIES = Counter(
+    "react_agent_upstream_retries_total",
+    "上游工具调用的重试次数，按上游与触发原因（状态码或异常类型）区分",
+    ["upstream", "reason"],
+)
+
+RETRY_BUDGET_TOKENS = Gauge(
+    "react_agent_retry_budget_tokens",
+    "重试预算当前剩余令牌数",
+    ["budget"],
+)
+
+RETRY_BUDGET_EXHAUSTED = Counter(
+    "react_agent_retry_budget_exhausted_total",
+    "因重试预算耗尽而放弃的重试次数",
+    ["budget", "upstream"],
+)
+
+NOTIFICATION_OUTBOX = Counter(
+    "react_agent_notification_outbox_total",
+    "人工服务通知 outbox 处理数，按结果（enqueued/sent/skipped/retried/failed）区分",
+    ["result"],
+)
+
+NOTIFICATION_OUTBOX_PENDING = Gauge(
+    "react_agent_notification_outbox_pending",
+    "outbox 中待投递的人工服务通知数（每次投递任务结束时更新）",
+)
+
+PRODUCT_CATALOG_LOOKUPS = Counter(
+    "react_agent_product_catalog_lookups_total",
+    "产品价格本地目录查询次数，按结果（hit/miss）区分，miss 时回退远程查询",
+    ["index", "result"],
+)
+
+PRODUCT_CATALOG_PRODUCTS = Gauge(
+    "react_agent_product_catalog_products",
+    "本地产品目录中的产品数",
+    ["index"],
+)
+
+PRODUCT_CATALOG_REFRESHED = Gauge(
+    "react_agent_product_catalog_last_refresh_timestamp_seconds",
+    "产品目录最近一次成功刷新的时间戳",
+    ["index"],
+)
+
+LANGUAGE_MODEL_LOAD_SECONDS = Gauge(
+    "react_agent_language_model_load_seconds",
+    "FastText 语言检测模型加载耗时（秒）",
+)
+
+LANGUAGE_MODEL_RSS_BYTES = Gauge(
+    "react_agent_language_model_rss_bytes",
+    "加载 FastText 语言检测模型带来的进程常驻内存增量（字节）",
+)
+
+LANGUAGE_DETECTION_QUEUE_DEPTH = Gauge(
+    "react_agent_language_detection_queue_depth",
+    "等待语言检测线程池执行的异步检测请求数",
+)
+
+LANGUAGE_DETECTION_SECONDS = Histogram(
+    "react_agent_language_detection_seconds",
+    "异步语言检测耗时（含线程池排队）",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+LANGUAGE_DETECTION_CACHE_REQUESTS = Counter(
+    "react_agent_language_detection_cache_requests_total",
+    "语言检测结果缓存查询次数，按结果（hit/miss）区分",
+    ["result"],
+)
@@ -0,0 +1,206 @@
+"""人工服务通知 outbox：对话中只写入 Postgres，由定时任务异步投递到微信群。"""
+
+import logging
+import random
+import time
+
+import httpx
+import psycopg
+
+from app.config import settings
+from app.core.shared import httpx_sync_client, postgres_async_pool
+
+from .config import react_agent_settings
+from .metrics import NOTIFICATION_OUTBOX, NOTIFICATION_OUTBOX_PENDING
+from .service import ReactAgentService
+
+logger = logging.getLogger(__name__)
+
+# 多 worker 同时启动时串行执行建表语句
+_SETUP_LOCK_KEY = 0x6F7574626F78  # "outbox"
+
+_SETUP_SQL = """
+create table if not exists react_agent_notification_outbox (
+    id bigserial primary key,
+    thread_id text not null,
+    content text not null,
+    status text not null default 'pending',
+    attempts integer not null default 0,
+    last_error text,
+    created_at timestamptz not null default now(),
+    next_attempt_at timestamptz not null default now(),
+    claimed_until timestamptz,
+    sent_at timestamptz
+);
+alter table react_agent_notification_outbox add column if not exists claimed_until timestamptz;
+create index if not exists react_agent_notification_outbox_pending_idx
+    on react_agent_notification_outbox (next_attempt_at) where status = 'pending';
+create index if not exists react_agent_notification_outbox_thread_idx
+    on react_agent_notification_outbox (thread_id, sent_at);
+"""
+
+_INSERT_SQL = "insert into react_agent_notification_outbox (thread_id, content) values (%s, %s)"
+
+# 认领一批待投递的通知：写入租约到期时间后立即提交，投递在事务外进行；
+# 租约未到期的通知（其他 worker 正在投递）及其所在会话的其他通知不会被认领
+_CLAIM_SQL = """
+update react_agent_notification_outbox
+set claimed_until = now() + make_interval(secs => %s)
+where id in (
+    select o.id
+    from react_agent_notification_outbox o
+    where o.status = 'pending'
+    and o.next_attempt_at <= now()
+    and (o.claimed_until is null or o.claimed_until < now())
+    and not exists (
+        select 1 from react_agent_notification_outbox c
+        where c.thread_id = o.thread_id and c.status = 'pending' and c.claimed_until >= now()
+    )
+    order by o.id
+    limit %s
+    for update skip locked
+)
+returning id, thread_id, content, attempts
+"""
+
+_SELECT_RECENTLY_SENT_SQL = """
+select distinct thread_id
+from react_agent_notification_outbox
+where status = 'sent' and thread_id = any(%s) and sent_at > now() - make_interval(secs => %s)
+"""
+
+_MARK_SENT_SQL = """
+update react_agent_notification_outbox
+set status = 'sent', attempts = attempts + 1, sent_at = now(), claimed_until = null
+where id = %s
+"""
+_MARK_SKIPPED_SQL = """
+update react_agent_notification_outbox set status = 'skipped', claimed_until = null where id = any(%s)
+"""
+_MARK_RETRY_SQL = """
+update react_agent_notification_outbox
+set attempts = attempts + 1, last_error = %s, next_attempt_at = now() + make_interval(secs => %s), claimed_until = null
+where id = %s
+"""
+_MARK_FAILED_SQL = """
+update react_agent_notification_outbox
+set status = 'failed', attempts = attempts + 1, last_error = %s, claimed_until = null
+where id = %s
+"""
+
+_COUNT_PENDING_SQL = "select count(*) from react_agent_notification_outbox where status = 'pending'"
+
+
+async def setup_outbox() -> None:
+    """创建 outbox 表（应用启动时执行一次，对话与投递路径不再执行 DDL）。"""
+    async with postgres_async_pool.connection() as conn, conn.transaction():
+        await conn.execute("select pg_advisory_xact_lock(%s)", (_SETUP_LOCK_KEY,))
+        await conn.execute(_SETUP_SQL)
+
+
+async def enqueue_notification(thread_id: str, content: str) -> None:
+    """写入一条待投递的人工服务通知。"""
+    async with postgres_async_pool.connection() as conn:
+        await conn.execute(_INSERT_SQL, (thread_id, content))
+    NOTIFICATION_OUTBOX.labels(result="enqueued").inc()
+
+
+def _backoff(attempts: int) -> float:
+    """第 attempts 次失败后的重试等待（full jitter 指数退避）。"""
+    ceiling = min(
+        react_agent_settings.notification_retry_backoff_max,
+        react_agent_settings.notification_retry_backoff_base * 2 ** (attempts - 1),
+    )
+    return random.uniform(0, ceiling)
+
+
+def _send(notification_id: int, thread_id: str, content: str, attempts: int, conn: psycopg.Connection) -> None:
+    """投递一条通知，并在独立的短事务中记录结果。"""
+    try:
+        response = httpx_sync_client.post(
+            **ReactAgentService.wechat_push_request(content),
+            timeout=react_agent_settings.wechat_push_timeout,
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        error = f"{e.__class__.__name__}: {e}"
+        if attempts + 1 >= react_agent_settings.notification_max_attempts:
+            conn.execute(_MARK_FAILED_SQL, (error, notification_id))
+            NOTIFICATION_OUTBOX.labels(result="failed").inc()
+            logger.error(f"Notification {notification_id} for thread {thread_id} failed: {error}")
+        else:
+            conn.execute(_MARK_RETRY_SQL, (error, _backoff(attempts + 1), notification_id))
+            NOTIFICATION_OUTBOX.labels(result="retried").inc()
+            logger.warning(f"Notification {notification_id} for thread {thread_id} will be retried: {error}")
+        return
+    conn.execute(_MARK_SENT_SQL, (notification_id,))
+    NOTIFICATION_OUTBOX.labels(result="sent").inc()
+
+
+class _DispatchConnection:
+    """投递任务复用的长连接（每个进程一个），连接关闭或损坏时在下次投递前重新建立。"""
+
+    def __init__(self) -> None:
+        self._conn: psycopg.Connection | None = None
+
+    def get(self) -> psycopg.Connection:
+        if self._conn is None or self._conn.closed or self._conn.broken:
+            self._conn = psycopg.connect(settings.postgres_url, autocommit=True)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_dispatch_connection = _DispatchConnection()
+
+
+async def close_outbox() -> None:
+    """关闭投递任务的长连接（应用关闭、定时任务停止后执行）。"""
+    _dispatch_connection.close()
+
+
+def dispatch_notifications() -> None:
+    """
+    投递 outbox 中的待发送通知：
+
+    - 每批最多 notification_dispatch_batch_size 条，先以租约（notification_claim_lease 秒）认领并提交，
+      再在事务外逐条投递，每条结果单独提交；worker 中途退出时租约到期后由其他 worker 重新认领；
+    - 同一会话在 notification_dedup_window 内已发送过通知（或同一批中已有通知）时，后续通知标记为 skipped；
+    - 投递失败按指数退避重试，超过 notification_max_attempts 次后标记为 failed。
+
+    任务每隔几秒执行一次，复用进程内的长连接，不在每次执行时重新建立连接。
+    """
+    started_at = time.monotonic()
+    conn = _dispatch_connection.get()
+    while time.monotonic() - started_at < react_agent_settings.notification_dispatch_max_runtime:
+        rows = conn.execute(
+            _CLAIM_SQL,
+            (react_agent_settings.notification_claim_lease, react_agent_settings.notification_dispatch_batch_size),
+        ).fetchall()
+        if not rows:
+            break
+
+        recently_sent = {
+            row[0]
+            for row in conn.execute(
+                _SELECT_RECENTLY_SENT_SQL,
+                (list({row[1] for row in rows}), react_agent_settings.notification_dedup_window),
+            )
+        }
+        skipped = []
+        for notification_id, thread_id, content, attempts in sorted(rows):
+            if thread_id in recently_sent:
+                skipped.append(notification_id)
+                continue
+            # 失败的通知会重试，同一批中该会话后续的通知同样跳过
+            recently_sent.add(thread_id)
+            _send(notification_id, thread_id, content, attempts, conn)
+
+        if skipped:
+            conn.execute(_MARK_SKIPPED_SQL, (skipped,))
+            NOTIFICATION_OUTBOX.labels(result="skipped").inc(len(skipped))
+
+    NOTIFICATION_OUTBOX_PENDING.set(conn.execute(_COUNT_PENDING_SQL).fetchone()[0])
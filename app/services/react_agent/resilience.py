@@ -0,0 +1,229 @@
+"""上游调用的弹性控制：请求截止时间、熔断器与重试预算。"""
+
+import logging
+import time
+from collections import deque
+from typing import ClassVar
+
+from .metrics import (
+    CIRCUIT_BREAKER_STATE,
+    CIRCUIT_BREAKER_TRANSITIONS,
+    RETRY_BUDGET_EXHAUSTED,
+    RETRY_BUDGET_TOKENS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Deadline:
+    """
+    请求截止时间（基于 time.monotonic），随 graph config 传递给各节点与工具。
+    """
+
+    def __init__(self, expires_at: float) -> None:
+        self._expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        """从现在起 seconds 秒后到期。"""
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """剩余时间（秒），已到期时为负数。"""
+        return self._expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float | None = None) -> float:
+        """
+        按剩余时间收缩超时。
+
+        Args:
+            default: 未受截止时间约束时的超时（秒），为 None 时直接返回剩余时间。
+
+        Returns:
+            min(default, 剩余时间)。
+
+        Raises:
+            TimeoutError: 已到期。
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise TimeoutError("Request deadline exceeded")
+        return remaining if default is None else min(default, remaining)
+
+
+class CircuitBreaker:
+    """
+    熔断器（closed / open / half_open）。
+
+    在滑动窗口内统计最近调用的失败率与慢调用率，超过阈值即熔断（open），
+    冷却期后进入半开（half_open）放行少量试探调用，试探成功则恢复（closed），否则再次熔断。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _STATE_VALUES: ClassVar[dict[str, int]] = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        slow_call_duration: float = 15.0,
+        slow_call_rate_threshold: float = 0.8,
+        cooldown: float = 30.0,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        """
+        Args:
+            name: 熔断器名称（如模型名），用于日志与指标标签。
+            window_size: 滑动窗口大小（最近调用次数）。
+            min_calls: 窗口内至少多少次调用才开始计算比率。
+            failure_rate_threshold: 失败率阈值 [0, 1]，达到即熔断。
+            slow_call_duration: 慢调用耗时阈值（秒）。
+            slow_call_rate_threshold: 慢调用率阈值 [0, 1]，达到即熔断。
+            cooldown: 熔断后的冷却时间（秒），之后进入半开状态。
+            half_open_max_calls: 半开状态下放行的试探调用数。
+        """
+        self._name = name
+        self._window: deque[tuple[bool, bool]] = deque(maxlen=window_size)
+        self._min_calls = min_calls
+        self._failure_rate_threshold = failure_rate_threshold
+        self._slow_call_duration = slow_call_duration
+        self._slow_call_rate_threshold = slow_call_rate_threshold
+        self._cooldown = cooldown
+        self._half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        CIRCUIT_BREAKER_STATE.labels(name=name).set(self._STATE_VALUES[self.CLOSED])
+
+    @property
+    def state(self) -> str:
+        """当前状态；冷却期结束的 open 状态会转为 half_open。"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._cooldown:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def allow_request(self) -> bool:
+        """是否放行本次调用。half_open 状态下每放行一次占用一个试探名额。"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._half_open_calls < self._half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+        return False
+
+    def record_success(self, duration: float) -> None:
+        """记录一次成功调用，耗时超过阈值的记为慢调用。"""
+        self._record(failed=False, slow=duration >= self._slow_call_duration)
+
+    def record_failure(self, duration: float) -> None:
+        """记录一次失败调用。"""
+        self._record(failed=True, slow=duration >= self._slow_call_duration)
+
+    def record_cancelled(self, duration: float) -> None:
+        """记录一次被取消的调用（如对冲落败）：已超过慢调用阈值的记为慢调用，否则仅归还试探名额。"""
+        if duration >= self._slow_call_duration:
+            self._record(failed=False, slow=True)
+        elif self._state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        state = self.state
+        if state == self.HALF_OPEN:
+            if failed or slow:
+                self._transition(self.OPEN)
+            else:
+                self._transition(self.CLOSED)
+            return
+        if state == self.OPEN:
+            return
+
+        self._window.append((failed, slow))
+        if len(self._window) < self._min_calls:
+            return
+        failure_rate = sum(f for f, _ in self._window) / len(self._window)
+        slow_rate = sum(s for _, s in self._window) / len(self._window)
+        if failure_rate >= self._failure_rate_threshold or slow_rate >= self._slow_call_rate_threshold:
+            logger.warning(
+                f"Circuit breaker {self._name} opened: failure_rate={failure_rate:.2f}, slow_rate={slow_rate:.2f}"
+            )
+            self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.info(f"Circuit breaker {self._name}: {self._state} -> {state}")
+        self._state = state
+        self._half_open_calls = 0
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+        if state == self.CLOSED:
+            self._window.clear()
+        CIRCUIT_BREAKER_STATE.labels(name=self._name).set(self._STATE_VALUES[state])
+        CIRCUIT_BREAKER_TRANSITIONS.labels(name=self._name, state=state).inc()
+
+
+class RetryBudget:
+    """
+    重试预算（令牌桶）。
+
+    每次首次调用存入 ratio 个令牌，每次重试取出 1 个令牌，另按 min_retries_per_second 匀速补充保底令牌，
+    令牌数不超过 max_tokens。上游整体变慢时重试总量被限制在请求量的 ratio 左右，避免重试风暴。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ratio: float = 0.1,
+        min_retries_per_second: float = 1.0,
+        max_tokens: float = 10.0,
+    ) -> None:
+        """
+        Args:
+            name: 预算名称，用于日志与指标标签。
+            ratio: 重试量占请求量的比例上限。
+            min_retries_per_second: 低流量时每秒保底允许的重试次数。
+            max_tokens: 令牌上限（允许的最大突发重试数）。
+        """
+        self._name = name
+        self._ratio = ratio
+        self._min_retries_per_second = min_retries_per_second
+        self._max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated_at = time.monotonic()
+        RETRY_BUDGET_TOKENS.labels(budget=name).set(self._tokens)
+
+    @property
+    def tokens(self) -> float:
+        return self._refill()
+
+    def deposit(self) -> None:
+        """记录一次首次调用。"""
+        self._tokens = min(self._max_tokens, self._refill() + self._ratio)
+        RETRY_BUDGET_TOKENS.labels(budget=self._name).set(self._tokens)
+
+    def try_withdraw(self, upstream: str) -> bool:
+        """申请一次重试，预算不足时返回 False。"""
+        tokens = self._refill()
+        if tokens < 1:
+            RETRY_BUDGET_EXHAUSTED.labels(budget=self._name, upstream=upstream).inc()
+            logger.warning(f"Retry budget {self._name} exhausted, {upstream} call not retried")
+            return False
+        self._tokens = tokens - 1
+        RETRY_BUDGET_TOKENS.labels(budget=self._name).set(self._tokens)
+        return True
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self._max_tokens, self._tokens + (now - self._updated_at) * self._min_retries_per_second)
+        self._updated_at = now
+        return self._tokens
@@ -1,42 +1,156 @@
-from fastapi import APIRouter, Depends
+import json
+import logging
+import time
+from collections.abc import AsyncGenerator
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from langchain_core.messages import messages_to_dict
 
-from .deps import get_react_agent
 from .agent import ReActAgent
+from .config import react_agent_settings
+from .deps import get_react_agent, get_thread_run_scheduler
+from .metrics import TIME_TO_FIRST_TOKEN
+from .resilience import Deadline
+from .scheduler import ThreadRunScheduler
 from .schemas import ReactAgentRequest, ReactAgentResponse
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/api/v1/react",
     tags=["React Agent"],
 )
 
 
-@router.post("/chat", response_model=ReactAgentResponse)
-async def chat(
-    request: ReactAgentRequest,
-    react_agent: ReActAgent = Depends(get_react_agent),
-) -> ReactAgentResponse:
-    user_message = f"""
+def _build_user_message(request: ReactAgentRequest, message: str | None = None) -> str:
+    message = request.message if message is None else message
+    if react_agent_settings.prompt_cache_friendly:
+        # 用户 id、平台、地区作为易变上下文放在提示词末尾，见 _build_context
+        return f"""
+    严格遵循用户输入的语种进行回复！！！
+    用户消息：{message}
+    """
+    return f"""
     严格遵循用户输入的语种进行回复！！！
-    用户消息：{request.message}
+    用户消息：{message}
     用户id：{request.user_id}
     平台：{request.platform}
     地区：{request.region}
     """
-    agent_message = ""
-    debug_info = []
-
-    if request.debug:
-        async for chunk in react_agent.astream(user_message, request.thread_id):
-            for node_name, state in chunk.items():
-                if node_name == "agent":
-                    agent_message = state["messages"][-1].content
-                debug_info.append(messages_to_dict(state["messages"]))
-    else:
-        agent_message = await react_agent.arun(user_message, request.thread_id)
+
+
+def _build_context(request: ReactAgentRequest) -> dict[str, str]:
+    return {
+        "user_id": request.user_id,
+        "platform": request.platform,
+        "region": request.region.value,
+    }
+
+
+def _request_deadline(request: ReactAgentRequest) -> Deadline:
+    return Deadline.after(request.timeout or react_agent_settings.request_timeout)
+
+
+def _sse(event: str, data: dict) -> str:
+    """格式化一条 Server-Sent Event。"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat", response_model=ReactAgentResponse)
+async def chat(
+    request: ReactAgentRequest,
+    react_agent: ReActAgent = Depends(get_react_agent),
+    scheduler: ThreadRunScheduler = Depends(get_thread_run_scheduler),
+) -> ReactAgentResponse:
+    context = _build_context(request)
+    deadline = _request_deadline(request)
+
+    async def run(message: str) -> tuple[str, list]:
+        """以（可能已合并的）用户消息执行一轮对话。"""
+        user_message = _build_user_message(request, message)
+        agent_message = ""
+        debug_info = []
+        if request.debug:
+            async for chunk in react_agent.astream(
+                user_message, request.thread_id, deadline=deadline, context=context, cache_query=message
+            ):
+                for node_name, state in chunk.items():
+                    # 压缩、缓存未命中等节点可能没有状态更新
+                    if not state or not state.get("messages"):
+                        continue
+                    if node_name in ("agent", "response_cache"):
+                        agent_message = state["messages"][-1].content
+                    debug_info.append(messages_to_dict(state["messages"]))
+        else:
+            agent_message = await react_agent.arun(
+                user_message, request.thread_id, deadline=deadline, context=context, cache_query=message
+            )
+        return agent_message, debug_info
+
+    try:
+        # 同一会话串行处理，排队期间连续发送的消息合并为一轮；合并后沿用该批第一个请求的截止时间，
+        # 调试开关或用户上下文不同的请求不合并
+        agent_message, debug_info = await scheduler.submit(
+            request.thread_id,
+            request.message,
+            run,
+            timeout=deadline.timeout(),
+            merge_key=(request.debug, tuple(sorted(context.items()))),
+        )
+    except TimeoutError:
+        logger.warning(f"=== [ROUTER] 对话处理超时: {request.thread_id} ===")
+        raise HTTPException(status_code=504, detail="对话处理超时")
 
     return {
         "message": agent_message,
         "thread_id": request.thread_id,
         "debug_info": debug_info,
     }
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ReactAgentRequest,
+    react_agent: ReActAgent = Depends(get_react_agent),
+    scheduler: ThreadRunScheduler = Depends(get_thread_run_scheduler),
+) -> StreamingResponse:
+    """SSE 流式对话：逐 token 推送回复，并推送工具调用进度。
+
+    事件类型：token、reset、tool_start、tool_end、done、error。
+    """
+    started_at = time.perf_counter()
+    user_message = _build_user_message(request)
+    context = _build_context(request)
+    deadline = _request_deadline(request)
+
+    async def event_stream() -> AsyncGenerator[str, None]:
+        first_token = True
+        agent_message = ""
+        try:
+            # 流式请求不合并消息，仅与同一会话的其他请求串行
+            async with scheduler.serialize(request.thread_id):
+                async for item in react_agent.astream_tokens(
+                    user_message, request.thread_id, deadline=deadline, context=context, cache_query=request.message
+                ):
+                    if item["event"] == "token":
+                        if first_token:
+                            first_token = False
+                            TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started_at)
+                        agent_message += item["data"]["content"]
+                    elif item["event"] in ("reset", "tool_start"):
+                        # 模型切换前或工具调用前输出的内容不是最终回复
+                        agent_message = ""
+                    yield _sse(item["event"], item["data"])
+        except Exception as e:
+            logger.exception("=== [ROUTER] 流式对话失败 ===")
+            yield _sse("error", {"detail": f"{e.__class__.__name__}: {e}"})
+            return
+
+        yield _sse("done", {"message": agent_message, "thread_id": request.thread_id})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,121 @@
+"""按会话串行执行对话并合并连续发送的用户消息。"""
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from .metrics import COALESCED_MESSAGES
+
+
+class _ThreadBatch:
+    """同一会话中等待执行的一批用户消息。"""
+
+    __slots__ = ("future", "merge_key", "messages")
+
+    def __init__(self, message: str, merge_key: Hashable) -> None:
+        self.messages = [message]
+        self.merge_key = merge_key
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class ThreadRunScheduler:
+    """
+    按会话串行执行对话，并合并连续发送的用户消息。
+
+    同一 thread_id 同时只有一轮对话在执行；等待执行期间（含 coalesce_window）到达的消息合并为一轮，
+    所有被合并的请求得到同一个回复。仅在单进程内生效，多 worker 部署需按 thread_id 粘性路由。
+
+    合并后的一轮使用该批第一个请求的 run 执行（即沿用其截止时间、调试开关与上下文），
+    只有 merge_key 相同的请求才会合并，其余请求排在下一批。
+    """
+
+    def __init__(self, coalesce_window: float = 0.0, max_batch_size: int = 5, separator: str = "\n") -> None:
+        """
+        Args:
+            coalesce_window: 新一批消息开始执行前额外等待的时间（秒），0 表示只合并排队期间到达的消息。
+            max_batch_size: 单轮最多合并的消息数。
+            separator: 合并消息时使用的分隔符。
+        """
+        self._coalesce_window = coalesce_window
+        self._max_batch_size = max_batch_size
+        self._separator = separator
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._lock_users: dict[str, int] = {}
+        self._pending: dict[str, _ThreadBatch] = {}
+        # 持有执行中任务的引用，避免执行期间被垃圾回收
+        self._tasks: set[asyncio.Task] = set()
+
+    @asynccontextmanager
+    async def serialize(self, thread_id: str) -> AsyncIterator[None]:
+        """独占会话，退出时若无其他等待者则释放锁对象。"""
+        lock = self._locks.setdefault(thread_id, asyncio.Lock())
+        self._lock_users[thread_id] = self._lock_users.get(thread_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[thread_id] -= 1
+            if not self._lock_users[thread_id]:
+                del self._lock_users[thread_id]
+                del self._locks[thread_id]
+
+    async def submit(
+        self,
+        thread_id: str,
+        message: str,
+        run: Callable[[str], Awaitable[Any]],
+        timeout: float | None = None,
+        merge_key: Hashable = None,
+    ) -> Any:
+        """
+        提交一条用户消息。
+
+        Args:
+            thread_id: 会话 ID。
+            message: 用户消息。
+            run: 以合并后的消息执行一轮对话的函数；合并时使用该批第一个请求的 run。
+            timeout: 当前调用方最多等待的时间（秒），超时不会取消已合并的对话。
+            merge_key: run 中除消息外影响结果的参数（如调试开关、用户上下文），不同的请求不合并。
+
+        Returns:
+            本条消息所在批次的对话结果。
+        """
+        batch = self._pending.get(thread_id)
+        if batch is not None and batch.merge_key == merge_key and len(batch.messages) < self._max_batch_size:
+            batch.messages.append(message)
+            COALESCED_MESSAGES.inc()
+        else:
+            batch = _ThreadBatch(message, merge_key)
+            self._pending[thread_id] = batch
+            batch.future.add_done_callback(self._retrieve_exception)
+            task = asyncio.create_task(self._run_batch(thread_id, batch, run))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.wait_for(asyncio.shield(batch.future), timeout=timeout)
+
+    async def _run_batch(self, thread_id: str, batch: _ThreadBatch, run: Callable[[str], Awaitable[Any]]) -> None:
+        try:
+            if self._coalesce_window > 0:
+                await asyncio.sleep(self._coalesce_window)
+            async with self.serialize(thread_id):
+                # 开始执行后不再接受新消息，之后到达的消息进入下一批
+                if self._pending.get(thread_id) is batch:
+                    del self._pending[thread_id]
+                result = await run(self._separator.join(batch.messages))
+        except BaseException as e:
+            if not batch.future.done():
+                batch.future.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        else:
+            batch.future.set_result(result)
+        finally:
+            if self._pending.get(thread_id) is batch:
+                del self._pending[thread_id]
+
+    @staticmethod
+    def _retrieve_exception(future: asyncio.Future) -> None:
+        # 所有调用方都已超时离开时，取走异常避免 "exception was never retrieved"
+        if not future.cancelled():
+            future.exception()
@@ -18,6 +18,9 @@ class ReactAgentRequest(BaseModel):
         default_factory=lambda: str(uuid.uuid4()), description="会话 ID"
     )
     debug: bool = Field(False, description="是否调试模式")
+    timeout: float | None = Field(
+        None, gt=0, description="请求处理时限（秒），为空时使用服务端默认值"
+    )
 
 
 class ReactAgentResponse(BaseModel):
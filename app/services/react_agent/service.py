@@ -1,76 +1,214 @@
 import logging
+from collections.abc import Callable
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 from typing import Any
 
 import httpx
 from tenacity import (
+    RetryCallState,
     retry,
-    retry_if_exception_type,
     stop_after_attempt,
-    wait_exponential,
-    before_sleep_log
+    wait_random_exponential,
 )
 
-from app.core.shared import httpx_async_client
 from .config import react_agent_settings
+from .metrics import PRODUCT_CATALOG_LOOKUPS, UPSTREAM_RETRIES
+from .resilience import Deadline
+from .shared import (
+    data_manager,
+    faq_cache,
+    faq_http_client,
+    graph_cache,
+    graph_http_client,
+    product_info_http_client,
+    product_price_cache,
+    retry_budget,
+    wechat_push_http_client,
+)
 
 logger = logging.getLogger(__name__)
 
-_retry = retry(
-    stop=stop_after_attempt(2),
-    wait=wait_exponential(multiplier=0.5, max=10),
-    retry=retry_if_exception_type(httpx.RequestError),
-    before_sleep=before_sleep_log(logger, logging.WARNING),
-    reraise=True,
-)
+
+def _stop_at_deadline(retry_state: RetryCallState) -> bool:
+    """剩余时间不足以等待下一次重试时停止重试。"""
+    deadline: Deadline | None = retry_state.kwargs.get("deadline")
+    return deadline is not None and deadline.remaining() <= (retry_state.upcoming_sleep or 0)
+
+
+def _timeout(client: httpx.AsyncClient, deadline: Deadline | None) -> httpx.Timeout:
+    """
+    单次请求超时：有截止时间时按剩余时间收缩读写超时。
+
+    请求级的 timeout 会整体替换客户端的 httpx.Timeout，因此连接与等待连接池的超时需沿用客户端配置。
+    """
+    timeout = client.timeout
+    if deadline is None:
+        return timeout
+    return httpx.Timeout(
+        connect=timeout.connect,
+        read=deadline.timeout(timeout.read),
+        write=deadline.timeout(timeout.write),
+        pool=timeout.pool,
+    )
+
+
+def _retry_reason(exception: BaseException | None) -> str | None:
+    """可重试的异常返回原因（状态码或异常类型），否则返回 None：网络异常、429 与 5xx 可重试。"""
+    if isinstance(exception, httpx.HTTPStatusError):
+        status_code = exception.response.status_code
+        return str(status_code) if status_code == 429 or status_code >= 500 else None
+    if isinstance(exception, httpx.RequestError):
+        return exception.__class__.__name__
+    return None
+
+
+def _retry_after(exception: BaseException | None) -> float | None:
+    """解析响应的 Retry-After 头（秒数或 HTTP 日期）。"""
+    if not isinstance(exception, httpx.HTTPStatusError):
+        return None
+    value = exception.response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_policy(upstream: str) -> Callable:
+    """
+    上游调用的重试策略：
+
+    - 网络异常、429 与 5xx 重试，最多 max_attempts 次尝试；
+    - 退避为 full jitter 的指数退避，响应带 Retry-After 时按其等待，超过 retry_after_max 则不再重试；
+    - 每次重试从全局重试预算中取令牌，预算耗尽时不再重试；剩余时间不足以等待下一次重试时停止。
+    """
+    policy = {
+        "max_attempts": react_agent_settings.retry_max_attempts,
+        "backoff_base": react_agent_settings.retry_backoff_base,
+        "backoff_max": react_agent_settings.retry_backoff_max,
+    }
+    policy.update(react_agent_settings.retry_policy_overrides.get(upstream, {}))
+    jitter = wait_random_exponential(multiplier=policy["backoff_base"], max=policy["backoff_max"])
+
+    def should_retry(retry_state: RetryCallState) -> bool:
+        return _retry_reason(retry_state.outcome.exception()) is not None
+
+    def wait(retry_state: RetryCallState) -> float:
+        retry_after = _retry_after(retry_state.outcome.exception())
+        return jitter(retry_state) if retry_after is None else retry_after
+
+    def stop_on_retry_after(retry_state: RetryCallState) -> bool:
+        return (retry_state.upcoming_sleep or 0) > react_agent_settings.retry_after_max
+
+    def stop_on_budget(retry_state: RetryCallState) -> bool:
+        # 放在最后：其他条件都允许重试时才消耗预算
+        return not retry_budget.try_withdraw(upstream)
+
+    def before(retry_state: RetryCallState) -> None:
+        if retry_state.attempt_number == 1:
+            retry_budget.deposit()
+
+    def before_sleep(retry_state: RetryCallState) -> None:
+        exception = retry_state.outcome.exception()
+        UPSTREAM_RETRIES.labels(upstream=upstream, reason=_retry_reason(exception)).inc()
+        logger.warning(
+            f"Retrying {upstream} call in {retry_state.upcoming_sleep:.2f}s "
+            f"(attempt {retry_state.attempt_number}): {exception!r}"
+        )
+
+    return retry(
+        stop=stop_after_attempt(int(policy["max_attempts"])) | _stop_at_deadline | stop_on_retry_after | stop_on_budget,
+        wait=wait,
+        retry=should_retry,
+        before=before,
+        before_sleep=before_sleep,
+        reraise=True,
+    )
 
 
 class ReactAgentService:
 
     @staticmethod
-    @_retry
-    async def faq_query(collection_names: list, query: str, top_k: int = react_agent_settings.faq_top_n) -> Any:
+    @faq_cache.cached()
+    @_retry_policy("faq")
+    async def faq_query(
+        collection_names: list,
+        query: str,
+        top_k: int = react_agent_settings.faq_top_n,
+        deadline: Deadline | None = None,
+    ) -> Any:
         """查询 FAQ 知识库。"""
-        response = await httpx_async_client.post(
-            react_agent_settings.faq_url, json={"collection_names": collection_names, "query": query, "top_k": top_k}
+        response = await faq_http_client.post(
+            react_agent_settings.faq_url,
+            json={"collection_names": collection_names, "query": query, "top_k": top_k},
+            timeout=_timeout(faq_http_client, deadline),
         )
+        response.raise_for_status()
         items = response.json()["categories"][0]["items"]
         return [{"question": item["question"], "answer": item["answer"]} for item in items]
 
     @staticmethod
-    @_retry
-    async def graph_query(query: str) -> Any:
+    @graph_cache.cached()
+    @_retry_policy("graph")
+    async def graph_query(query: str, deadline: Deadline | None = None) -> Any:
         """查询图谱素材。"""    
-        response = await httpx_async_client.post(
+        response = await graph_http_client.post(
             react_agent_settings.graph_url,
             json={"query": query},
-            timeout=20,
+            timeout=_timeout(graph_http_client, deadline),
         )
+        response.raise_for_status()
         return response.json()["data"]["full_context"]
 
     @staticmethod
-    @_retry
-    async def send_human_notification(content: str) -> Any:
-        """发送人工服务通知。"""
-        url = react_agent_settings.wechat_push_url
-        headers = {
-            "Authorization": f"Bearer {react_agent_settings.wechat_push_token}",
-            "X-API-Key": react_agent_settings.wechat_push_api_key,
+    def wechat_push_request(content: str) -> dict[str, Any]:
+        """微信群通知的请求参数（同步投递的 outbox 与异步发送共用）。"""
+        return {
+            "url": react_agent_settings.wechat_push_url,
+            "json": {"content": content, "ats": ""},
+            "headers": {
+                "Authorization": f"Bearer {react_agent_settings.wechat_push_token}",
+                "X-API-Key": react_agent_settings.wechat_push_api_key,
+            },
+            "params": {"nickName": react_agent_settings.wechat_push_group_name},
         }
-        payload = {"content": content, "ats": ""}
-        params = {"nickName": react_agent_settings.wechat_push_group_name}
 
-        await httpx_async_client.post(
-            url, json=payload, headers=headers, params=params
+    @staticmethod
+    @_retry_policy("wechat_push")
+    async def send_human_notification(content: str, deadline: Deadline | None = None) -> Any:
+        """发送人工服务通知。"""
+        response = await wechat_push_http_client.post(
+            **ReactAgentService.wechat_push_request(content),
+            timeout=_timeout(wechat_push_http_client, deadline),
         )
+        response.raise_for_status()
         return "人工服务通知发送成功。"
 
     @staticmethod
-    @_retry
-    async def get_product_price(index_name: str, query: str) -> Any:
+    def search_product_catalog(index_name: str, query: str) -> list[dict[str, Any]] | None:
+        """在本地产品目录中查询价格，目录未加载或没有匹配结果时返回 None。"""
+        index = data_manager.get_data().get(index_name)
+        if index is None:
+            return None
+        products = index.search(query, limit=react_agent_settings.product_catalog_max_results)
+        PRODUCT_CATALOG_LOOKUPS.labels(index=index_name, result="hit" if products else "miss").inc()
+        return products or None
+
+    @staticmethod
+    @product_price_cache.cached()
+    @_retry_policy("product_info")
+    async def get_product_price(index_name: str, query: str, deadline: Deadline | None = None) -> Any:
         """查询平台产品价格。"""
-        response = await httpx_async_client.post(
+        response = await product_info_http_client.post(
             react_agent_settings.product_info_url,
             json={"query": query, "index_name": index_name},
-            timeout=10,
+            timeout=_timeout(product_info_http_client, deadline),
         )
+        response.raise_for_status()
         return response.json()
@@ -1,7 +1,20 @@
+import asyncio
+import logging
+
+from httpx import AsyncClient
 from langchain_openai import ChatOpenAI
 
+from app.core.shared import http_clients, shutdown_hooks, startup_hooks
+
+from .caching import AsyncTTLCache
 from .config import react_agent_settings
-from .utils import DataManager
+from .metrics import RESPONSE_CACHE_SIZE
+from .resilience import CircuitBreaker, RetryBudget
+from .scheduler import ThreadRunScheduler
+from .tool_results import ToolResultNormalizer
+from .utils import DataManager, LanguageDetector
+
+logger = logging.getLogger(__name__)
 
 chat_model = ChatOpenAI(
     base_url=react_agent_settings.openai_base_url,
@@ -10,11 +23,141 @@ chat_model = ChatOpenAI(
     temperature=react_agent_settings.temperature,
 )
 
-backup_chat_model = ChatOpenAI(
-    base_url=react_agent_settings.backup_openai_base_url,
-    api_key=react_agent_settings.backup_openai_api_key,
-    model=react_agent_settings.backup_llm_model,
+# 未配置备用模型时不创建：主模型失败直接报错，而不是把流量转给不可用的备用模型
+backup_chat_model = (
+    ChatOpenAI(
+        base_url=react_agent_settings.backup_openai_base_url,
+        api_key=react_agent_settings.backup_openai_api_key,
+        model=react_agent_settings.backup_llm_model,
+        temperature=react_agent_settings.temperature,
+    )
+    if react_agent_settings.backup_llm_configured
+    else None
+)
+
+summary_chat_model = ChatOpenAI(
+    base_url=react_agent_settings.summary_openai_base_url or react_agent_settings.openai_base_url,
+    api_key=react_agent_settings.summary_openai_api_key or react_agent_settings.openai_api_key,
+    model=react_agent_settings.summary_llm_model or react_agent_settings.llm_model,
     temperature=react_agent_settings.temperature,
 )
 
+
+
+def _register_http_client(name: str, url: str, timeout: float) -> AsyncClient:
+    """按上游注册独立连接池的 HTTP 客户端，http_client_overrides 中的配置优先。"""
+    options = {
+        "max_connections": react_agent_settings.http_max_connections,
+        "max_keepalive_connections": react_agent_settings.http_max_keepalive_connections,
+        "keepalive_expiry": react_agent_settings.http_keepalive_expiry,
+        "timeout": timeout,
+        "connect_timeout": react_agent_settings.http_connect_timeout,
+        "pool_timeout": react_agent_settings.http_pool_timeout,
+        "http2": react_agent_settings.http2,
+        "warmup_connections": react_agent_settings.http_warmup_connections,
+        "warmup_path": react_agent_settings.http_warmup_path,
+    }
+    options.update(react_agent_settings.http_client_overrides.get(name, {}))
+    return http_clients.register(name, url, **options)
+
+
+faq_http_client = _register_http_client("faq", react_agent_settings.faq_url, react_agent_settings.faq_timeout)
+graph_http_client = _register_http_client("graph", react_agent_settings.graph_url, react_agent_settings.graph_timeout)
+product_info_http_client = _register_http_client(
+    "product_info", react_agent_settings.product_info_url, react_agent_settings.product_info_timeout
+)
+wechat_push_http_client = _register_http_client(
+    "wechat_push", react_agent_settings.wechat_push_url, react_agent_settings.wechat_push_timeout
+)
+
+# 所有上游工具调用共享的重试预算
+retry_budget = RetryBudget(
+    name="upstream",
+    ratio=react_agent_settings.retry_budget_ratio,
+    min_retries_per_second=react_agent_settings.retry_budget_min_per_second,
+    max_tokens=react_agent_settings.retry_budget_max_tokens,
+)
+
+# 熔断只用于把流量切到备用模型，没有备用模型时不启用
+chat_model_breaker = (
+    CircuitBreaker(
+        name=react_agent_settings.llm_model,
+        window_size=react_agent_settings.circuit_breaker_window_size,
+        min_calls=react_agent_settings.circuit_breaker_min_calls,
+        failure_rate_threshold=react_agent_settings.circuit_breaker_failure_rate,
+        slow_call_duration=react_agent_settings.circuit_breaker_slow_call_duration,
+        slow_call_rate_threshold=react_agent_settings.circuit_breaker_slow_call_rate,
+        cooldown=react_agent_settings.circuit_breaker_cooldown,
+        half_open_max_calls=react_agent_settings.circuit_breaker_half_open_calls,
+    )
+    if react_agent_settings.backup_llm_configured
+    else None
+)
+
+tool_result_normalizer = ToolResultNormalizer(
+    max_tokens=react_agent_settings.tool_result_max_tokens,
+    default_max_tokens=react_agent_settings.tool_result_default_max_tokens,
+    drop_fields=react_agent_settings.tool_result_drop_fields,
+)
+
+faq_cache = AsyncTTLCache(
+    "faq_query", ttl=react_agent_settings.faq_cache_ttl, maxsize=react_agent_settings.tool_cache_maxsize
+)
+graph_cache = AsyncTTLCache(
+    "graph_query", ttl=react_agent_settings.graph_cache_ttl, maxsize=react_agent_settings.tool_cache_maxsize
+)
+product_price_cache = AsyncTTLCache(
+    "get_product_price",
+    ttl=react_agent_settings.product_price_cache_ttl,
+    maxsize=react_agent_settings.tool_cache_maxsize,
+)
+
+response_cache = AsyncTTLCache(
+    "response",
+    ttl=react_agent_settings.response_cache_ttl,
+    maxsize=react_agent_settings.response_cache_maxsize,
+    size_gauge=RESPONSE_CACHE_SIZE,
+)
+
+language_detector = LanguageDetector(
+    model_path=react_agent_settings.language_detector_model_path,
+    threshold=react_agent_settings.language_detector_threshold,
+    exclude=react_agent_settings.language_detector_exclude,
+    min_length=react_agent_settings.language_detector_min_length,
+    max_length=react_agent_settings.language_detector_max_length,
+    prefer_compressed=react_agent_settings.language_detector_prefer_compressed,
+    max_workers=react_agent_settings.language_detector_max_workers,
+    cache_size=react_agent_settings.language_detector_cache_size,
+)
+
+if react_agent_settings.language_detector_preload:
+    language_detector.load()
+
+
+async def _warmup_language_detector() -> None:
+    """启动时在线程中加载语言检测模型，模型缺失时只记录日志（检测结果为 unknown）。"""
+    try:
+        await asyncio.to_thread(language_detector.load)
+    except FileNotFoundError as e:
+        logger.warning(f"Language detection model not loaded: {e}")
+
+
+# 模型约 126 MB，只在有使用方（回复缓存的缓存键）时预加载，避免每个 worker 都常驻一份用不到的模型
+if react_agent_settings.language_detector_warmup and react_agent_settings.response_cache_enabled:
+    startup_hooks.append(_warmup_language_detector)
+
+
+async def _shutdown_language_detector() -> None:
+    """关闭语言检测线程池（等待执行中的检测完成）。"""
+    await asyncio.to_thread(language_detector.shutdown)
+
+
+shutdown_hooks.append(_shutdown_language_detector)
+
+thread_run_scheduler = ThreadRunScheduler(
+    coalesce_window=react_agent_settings.thread_coalesce_window,
+    max_batch_size=react_agent_settings.thread_coalesce_max_messages,
+)
+
+# 产品目录索引 {index_name: ProductCatalogIndex}，由 jobs.refresh_product_catalogs 整体替换
 data_manager = DataManager()
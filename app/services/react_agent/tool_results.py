@@ -0,0 +1,156 @@
+"""工具结果后处理：剔除无用字段、去重并按 token 上限截断。"""
+
+import json
+import logging
+import re
+from typing import Any
+
+from .history import estimate_tokens
+from .metrics import TOOL_RESULT_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+# markdown 图片/链接整体匹配（group 1 为链接），其余为裸链接
+_URL_PATTERN = re.compile(r"!?\[[^\]]*\]\((https?://[^\s)]+)[^)]*\)|https?://[^\s\"'<>)\]，。；]+")
+
+
+class ToolResultNormalizer:
+    """
+    工具结果后处理：剔除空字段与无用字段、去除重复 FAQ 条目与重复素材链接，
+    并按工具限制 token 数，结果越小后续每一步 LLM 调用越快、checkpoint 越小。
+    """
+
+    def __init__(
+        self,
+        max_tokens: dict[str, int] | None = None,
+        default_max_tokens: int = 1500,
+        drop_fields: list[str] | None = None,
+    ) -> None:
+        """
+        Args:
+            max_tokens: 按工具名配置的 token 上限。
+            default_max_tokens: 未单独配置的工具使用的 token 上限。
+            drop_fields: 需要剔除的字段名，只作用于记录层级（结果本身、列表条目及其外层的包装对象），
+                记录内部嵌套对象中的同名字段保留。
+        """
+        self._max_tokens = dict(max_tokens or {})
+        self._default_max_tokens = default_max_tokens
+        self._drop_fields = frozenset(drop_fields or [])
+
+    def normalize(self, tool_name: str, data: Any) -> Any:
+        """
+        规范化工具返回数据，并记录处理前后的大小。
+
+        Args:
+            tool_name: 工具名。
+            data: 上游返回的原始数据。
+
+        Returns:
+            规范化后的数据；超出 token 上限时列表从末尾丢弃条目，其他数据截断为文本。
+        """
+        raw_size = self._size(data)
+        data = self._prune(data, set())
+        data = self._cap(data, self._max_tokens.get(tool_name, self._default_max_tokens))
+        normalized_size = self._size(data)
+
+        TOOL_RESULT_BYTES.labels(tool=tool_name, stage="raw").observe(raw_size)
+        TOOL_RESULT_BYTES.labels(tool=tool_name, stage="normalized").observe(normalized_size)
+        if normalized_size < raw_size:
+            logger.debug(f"Normalized {tool_name} result: {raw_size} -> {normalized_size} bytes")
+        return data
+
+    def _prune(self, data: Any, seen_urls: set[str], in_record: bool = False, is_item: bool = False) -> Any:
+        """
+        递归剔除空值与 drop_fields 字段，列表条目去重，重复出现的链接只保留第一次。
+
+        Args:
+            in_record: 是否位于某条记录（列表条目）内部，记录内部不再剔除 drop_fields。
+            is_item: 是否为列表条目。
+        """
+        if isinstance(data, dict):
+            pruned = {}
+            for key, value in data.items():
+                if not in_record and key in self._drop_fields:
+                    continue
+                value = self._prune(value, seen_urls, in_record or is_item)
+                if value is None or value == "" or value == [] or value == {}:
+                    continue
+                pruned[key] = value
+            return pruned
+        if isinstance(data, list):
+            items = [self._prune(item, seen_urls, in_record, is_item=True) for item in self._dedupe(data)]
+            return [item for item in items if item is not None and item != "" and item != [] and item != {}]
+        if isinstance(data, str):
+            return self._dedupe_text(data, seen_urls)
+        return data
+
+    @staticmethod
+    def _dedupe_text(text: str, seen_urls: set[str]) -> str:
+        """去除重复行与重复链接，重复的 markdown 图片/链接整体去除。"""
+        lines = []
+        seen_lines = set()
+        for line in text.splitlines():
+            key = line.strip()
+            if key and key in seen_lines:
+                continue
+            seen_lines.add(key)
+
+            def _replace(match: re.Match) -> str:
+                url = match.group(1) or match.group(0)
+                if url in seen_urls:
+                    return ""
+                seen_urls.add(url)
+                return match.group(0)
+
+            deduped = _URL_PATTERN.sub(_replace, line)
+            if key and not deduped.strip():
+                continue
+            lines.append(deduped)
+        return "\n".join(lines).strip()
+
+    @staticmethod
+    def _dedupe(items: list) -> list:
+        """去除重复条目；FAQ 条目按问题去重，保留排序靠前的一条。"""
+        deduped = []
+        seen = set()
+        for item in items:
+            if isinstance(item, dict) and "question" in item:
+                key = re.sub(r"\s+", "", str(item["question"])).lower()
+            else:
+                key = json.dumps(item, ensure_ascii=False, sort_keys=True, default=str)
+            if key in seen:
+                continue
+            seen.add(key)
+            deduped.append(item)
+        return deduped
+
+    def _cap(self, data: Any, max_tokens: int) -> Any:
+        """限制 token 数：列表保留靠前的条目，其他数据截断序列化后的文本。"""
+        if estimate_tokens(self._dumps(data)) <= max_tokens:
+            return data
+        if isinstance(data, list):
+            kept = list(data)
+            while len(kept) > 1 and estimate_tokens(self._dumps(kept)) > max_tokens:
+                kept.pop()
+            if estimate_tokens(self._dumps(kept)) <= max_tokens:
+                return kept
+            data = kept
+
+        text = data if isinstance(data, str) else self._dumps(data)
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if estimate_tokens(text[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low] + "…（已截断）"
+
+    @staticmethod
+    def _dumps(data: Any) -> str:
+        return data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, default=str)
+
+    @classmethod
+    def _size(cls, data: Any) -> int:
+        return len(cls._dumps(data).encode("utf-8"))
@@ -1,9 +1,14 @@
 import logging
 from typing import Any
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
+from .config import react_agent_settings
+from .outbox import enqueue_notification
+from .resilience import Deadline
 from .service import ReactAgentService
+from .shared import tool_result_normalizer
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +23,13 @@ def tool_result_fail(error: str) -> dict[str, Any]:
     return {"success": False, "error": error}
 
 
+def get_deadline(config: RunnableConfig) -> Deadline | None:
+    """从 graph config 中取出请求截止时间。"""
+    return config.get("configurable", {}).get("deadline")
+
+
 @tool
-async def faq_query(collection_name: str, query: str):
+async def faq_query(collection_name: str, query: str, config: RunnableConfig):
     """查询 FAQ 知识库，产品相关的咨询问题。
 
     Args:
@@ -31,8 +41,8 @@ async def faq_query(collection_name: str, query: str):
     """
     logger.info(f"--- [TOOL] 查询 FAQ: {collection_name} {query} ---")
     try:
-        data = await ReactAgentService.faq_query([collection_name], query)
-        return tool_result_ok(data)
+        data = await ReactAgentService.faq_query([collection_name], query, deadline=get_deadline(config))
+        return tool_result_ok(tool_result_normalizer.normalize("faq_query", data))
     except Exception as e:
         exc_info = f"{e.__class__.__name__}: {e}"
         logger.warning(f"--- [TOOL] 查询 FAQ 失败: {exc_info} ---")
@@ -40,7 +50,7 @@ async def faq_query(collection_name: str, query: str):
 
 
 @tool
-async def graph_query(query: str):
+async def graph_query(query: str, config: RunnableConfig):
     """查询图谱，产品相关的图片、视频等素材内容。
 
     Args:
@@ -51,8 +61,8 @@ async def graph_query(query: str):
     """
     logger.info(f"--- [TOOL] 查询图谱: {query} ---")
     try:
-        data = await ReactAgentService.graph_query(query)
-        return tool_result_ok(data)
+        data = await ReactAgentService.graph_query(query, deadline=get_deadline(config))
+        return tool_result_ok(tool_result_normalizer.normalize("graph_query", data))
     except Exception as e:
         exc_info = f"{e.__class__.__name__}: {e}"
         logger.warning(f"--- [TOOL] 查询图谱失败: {exc_info} ---")
@@ -60,7 +70,7 @@ async def graph_query(query: str):
 
 
 @tool
-async def send_human_notification(reason: str, user: str, platform: str):
+async def send_human_notification(reason: str, user: str, platform: str, config: RunnableConfig):
     """遇到无法解决的问题，或用户主动要求转人工时，发送通知。
 
     Args:
@@ -75,7 +85,11 @@ async def send_human_notification(reason: str, user: str, platform: str):
 
     logger.info(f"--- [TOOL] 发送人工服务通知: \n{content} ---")
     try:
-        data = await ReactAgentService.send_human_notification(content)
+        if react_agent_settings.notification_outbox_enabled:
+            # 写入 outbox 后立即返回，由定时任务投递并对同一会话的重复通知去重
+            await enqueue_notification(config["configurable"]["thread_id"], content)
+            return tool_result_ok("人工服务通知已提交，稍后将通知人工客服。")
+        data = await ReactAgentService.send_human_notification(content, deadline=get_deadline(config))
         return tool_result_ok(data)
     except Exception as e:
         exc_info = f"{e.__class__.__name__}: {e}"
@@ -84,7 +98,7 @@ async def send_human_notification(reason: str, user: str, platform: str):
 
 
 @tool
-async def get_product_price(index_name: str, query: str):
+async def get_product_price(index_name: str, query: str, config: RunnableConfig):
     """查询各个平台的产品价格。
 
     Args:
@@ -96,8 +110,10 @@ async def get_product_price(index_name: str, query: str):
     """
     logger.info(f"--- [TOOL] 查询平台的产品价格: {index_name} {query} ---")
     try:
-        data = await ReactAgentService.get_product_price(index_name, query)
-        return tool_result_ok(data)
+        data = ReactAgentService.search_product_catalog(index_name, query)
+        if data is None:
+            data = await ReactAgentService.get_product_price(index_name, query, deadline=get_deadline(config))
+        return tool_result_ok(tool_result_normalizer.normalize("get_product_price", data))
     except Exception as e:
         exc_info = f"{e.__class__.__name__}: {e}"
         logger.warning(f"--- [TOOL] 查询产品价格失败: {exc_info} ---")
@@ -1,13 +1,41 @@
+import asyncio
+import logging
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import NamedTuple
 from types import MappingProxyType
-from datetime import datetime
+from typing import Any, NamedTuple
 
 import fasttext
+import numpy as np
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import SystemMessage
 
+from .metrics import (
+    LANGUAGE_DETECTION_CACHE_REQUESTS,
+    LANGUAGE_DETECTION_QUEUE_DEPTH,
+    LANGUAGE_DETECTION_SECONDS,
+    LANGUAGE_MODEL_LOAD_SECONDS,
+    LANGUAGE_MODEL_RSS_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_bytes() -> int:
+    """当前进程常驻内存（字节），仅支持 Linux，其他平台返回 0。"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
 
 class LanguageResult(NamedTuple):
     """语言检测结果。"""
@@ -20,14 +48,25 @@ class LanguageResult(NamedTuple):
     """前 k 个候选 (语言代码, 置信度)，便于排查。"""
 
 
+class LanguageBatchResult(NamedTuple):
+    """批量语言检测结果（列式）：第 i 条文本的语言代码为 langs[i]，置信度为 scores[i]。"""
+
+    langs: np.ndarray
+    scores: np.ndarray
+
+
 class LanguageDetector:
     """
     基于 FastText 的语言检测器。
     """
 
     _LABEL_PREFIX = "__label__"
+    # URL/邮箱的 \S+ 在没有空格的长中文文本上回溯代价很高，只在包含 http / @ 时执行
+    _URL_EMAIL_PATTERN = re.compile(r"https?://\S+|\S+@\S+\.\S+")
+    # emoji、标点等非文字字符
+    _SYMBOL_PATTERN = re.compile(r"[^\w\s\u4e00-\u9fff\u3040-\u30ff]+")
 
-    def __init__(self, model_path: str | Path, threshold: float = 0.9, exclude: list[str] | None = None, min_length: int = 5, max_length: int = 500) -> None:
+    def __init__(self, model_path: str | Path, threshold: float = 0.9, exclude: list[str] | None = None, min_length: int = 5, max_length: int = 500, prefer_compressed: bool = False, max_workers: int = 4, cache_size: int = 0) -> None:
         """
         Args:
             model_path: 预训练 lid 模型路径（.bin 或 .ftz）。
@@ -35,26 +74,59 @@ class LanguageDetector:
             exclude: 预处理时从文本中去除的词/短语列表，如品牌名、干扰语等。
             min_length: 最小文本长度，低于该长度的文本返回 unknown。
             max_length: 最大文本长度，超过该长度的文本截断。
+            prefer_compressed: 同目录下存在同名 .ftz 压缩模型（lid.176.ftz 约 1 MB）时优先加载。
+            max_workers: 异步接口（adetect 等）使用的线程池大小。
+            cache_size: 以预处理后文本为键的 LRU 结果缓存大小，0 表示不缓存。
         """
         self._model_path = Path(model_path)
+        if prefer_compressed and self._model_path.with_suffix(".ftz").exists():
+            self._model_path = self._model_path.with_suffix(".ftz")
         self._threshold = threshold
         self._model: fasttext.FastText._FastText | None = None
+        self._load_lock = threading.Lock()
         self._exclude = exclude or []
+        self._exclude_pattern = self._compile_exclude(self._exclude)
         self._min_length = min_length
         self._max_length = max_length
         self._chinese_variants = ["zh", "wuu", "yue", "hak", "nan", "lzh"]
+        # fasttext predict 期间释放 GIL，线程池可以真正并行
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="language-detector")
+        self._cache: OrderedDict[tuple[str, int], LanguageResult] = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
     
     @property
     def model(self) -> fasttext.FastText._FastText:
-        """懒加载模型。"""
+        """模型，未预加载时在首次使用时加载。"""
         if self._model is None:
+            self.load()
+        return self._model
+
+    def load(self) -> None:
+        """
+        加载模型并上报加载耗时与常驻内存增量，已加载时直接返回。
+
+        应用启动时调用以避免首个请求等待加载；在 fork 前（如 gunicorn --preload）调用时各 worker 以写时复制方式共享模型内存。
+        """
+        with self._load_lock:
+            if self._model is not None:
+                return
             if not self._model_path.exists():
                 raise FileNotFoundError(
                     f"FastText 语言检测模型不存在: {self._model_path}。"
                     "请从 https://fasttext.cc/docs/en/language-identification.html 下载。"
                 )
+            rss_before = _rss_bytes()
+            started_at = time.perf_counter()
             self._model = fasttext.load_model(str(self._model_path))
-        return self._model
+            elapsed = time.perf_counter() - started_at
+            rss_delta = max(0, _rss_bytes() - rss_before)
+            LANGUAGE_MODEL_LOAD_SECONDS.set(elapsed)
+            LANGUAGE_MODEL_RSS_BYTES.set(rss_delta)
+            logger.info(
+                f"Language detection model {self._model_path.name} loaded in {elapsed:.2f}s, "
+                f"RSS +{rss_delta / 1024 / 1024:.1f} MB"
+            )
 
     def detect(self, text: str, normalize: bool = True) -> str:
         """
@@ -87,6 +159,10 @@ class LanguageDetector:
         if len(text) < self._min_length:
             return LanguageResult("unknown", 0.0, [])
 
+        cached = self._cache_get((text, k))
+        if cached is not None:
+            return cached
+
         try:
             labels, scores = self.model.predict(text, k=k)
             if not labels or not scores.size:
@@ -100,11 +176,100 @@ class LanguageDetector:
                     lang_code = label
                 candidates.append((lang_code, sc))
             lang, score = candidates[0]
-            return LanguageResult(lang, score, candidates)
+            result = LanguageResult(lang, score, candidates)
+            self._cache_set((text, k), result)
+            return result
         except Exception as e:
-            print(f"Language detection error: {e}")
+            logger.warning(f"Language detection error: {e}")
             return LanguageResult("unknown", 0.0, [])
     
+    def detect_many(self, texts: list[str], normalize: bool = True) -> np.ndarray:
+        """
+        批量检测文本语言，语义同 detect。
+
+        Args:
+            texts: 待检测文本列表。
+            normalize: 是否归一化语言代码。
+        Returns:
+            与 texts 等长的语言代码数组，低于阈值或过短的文本为 'unknown'。
+        """
+        langs, scores = self.detect_with_confidence_many(texts)
+        if normalize:
+            langs = np.where(np.isin(langs, self._chinese_variants), "zh", langs)
+        return np.where(scores < self._threshold, "unknown", langs)
+
+    def detect_with_confidence_many(self, texts: list[str]) -> LanguageBatchResult:
+        """
+        批量检测文本语言并返回置信度：预处理后一次调用 fasttext 的多行 predict，避免逐条调用的开销。
+
+        Args:
+            texts: 待检测文本列表。
+        Returns:
+            LanguageBatchResult(langs, scores)，过短的文本为 unknown、置信度 0。
+        """
+        texts = [self._preprocess(text) for text in texts]
+        langs = ["unknown"] * len(texts)
+        scores = np.zeros(len(texts), dtype=np.float32)
+        indexes = [i for i, text in enumerate(texts) if len(text) >= self._min_length]
+        if indexes:
+            labels, probs = self.model.predict([texts[i] for i in indexes], k=1)
+            for i, label, prob in zip(indexes, labels, probs):
+                if label:
+                    langs[i] = label[0].removeprefix(self._LABEL_PREFIX)
+                    scores[i] = prob[0]
+        return LanguageBatchResult(np.array(langs), scores)
+
+    def _cache_get(self, key: tuple[str, int]) -> LanguageResult | None:
+        if not self._cache_size:
+            return None
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+        LANGUAGE_DETECTION_CACHE_REQUESTS.labels(result="miss" if result is None else "hit").inc()
+        return result
+
+    def _cache_set(self, key: tuple[str, int], result: LanguageResult) -> None:
+        if not self._cache_size:
+            return
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def shutdown(self) -> None:
+        """关闭异步接口使用的线程池：等待执行中的检测完成，取消排队中的检测；之后异步接口抛出 RuntimeError。"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def adetect(self, text: str, normalize: bool = True) -> str:
+        """detect 的异步版本，在线程池中执行，不阻塞事件循环。"""
+        return await self._run_in_executor(self.detect, text, normalize)
+
+    async def adetect_with_confidence(self, text: str, k: int = 5) -> LanguageResult:
+        """detect_with_confidence 的异步版本，在线程池中执行，不阻塞事件循环。"""
+        return await self._run_in_executor(self.detect_with_confidence, text, k)
+
+    async def _run_in_executor(self, func: Callable[..., Any], *args: Any) -> Any:
+        started_at = time.perf_counter()
+        LANGUAGE_DETECTION_QUEUE_DEPTH.inc()
+        dequeued = threading.Lock()
+
+        def dequeue() -> None:
+            # 任务开始执行或排队中被取消时出队，两者只计一次
+            if dequeued.acquire(blocking=False):
+                LANGUAGE_DETECTION_QUEUE_DEPTH.dec()
+
+        def run() -> Any:
+            dequeue()
+            return func(*args)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+        finally:
+            dequeue()
+            LANGUAGE_DETECTION_SECONDS.observe(time.perf_counter() - started_at)
+
     def _normalize_language(self, lang: str) -> str:
         """
         归一化语言代码。
@@ -113,24 +278,24 @@ class LanguageDetector:
             return "zh"
         return lang
     
-    def _preprocess(self, text: str) -> str | None:
-        text = text.replace("\n", " ").replace("\r", " ").replace("\x00", "").strip().lower()
-        
-        # 去除 URL
-        text = re.sub(r"https?://\S+", "", text)
-        # 去除邮箱
-        text = re.sub(r"\S+@\S+\.\S+", "", text)
-        # 去除 emoji
-        text = re.sub(r"[^\w\s\u4e00-\u9fff\u3040-\u30ff]", "", text)
-        # 合并多余空格
-        text = re.sub(r"\s+", " ", text)
-        # 截断
-        text = text[:self._max_length]
-        # 去除 exclude 中的词/短语
-        for word in self._exclude:
-            text = text.replace(word.lower(), "")
-
-        return text
+    def _preprocess(self, text: str) -> str:
+        """小写化并去除 URL、邮箱、emoji/标点与排除词，合并空白后截断到 max_length。"""
+        text = text.lower()
+        if "http" in text or "@" in text:
+            text = self._URL_EMAIL_PATTERN.sub("", text)
+        text = self._SYMBOL_PATTERN.sub("", text)
+        if self._exclude_pattern is not None:
+            text = self._exclude_pattern.sub(" ", text)
+        return " ".join(text.split())[:self._max_length]
+
+    @staticmethod
+    def _compile_exclude(exclude: list[str]) -> re.Pattern | None:
+        """排除词编译为一个正则：长词优先匹配（如 METAVERTU 2 优先于 METAVERTU），词内空白匹配任意空白。"""
+        words = {" ".join(word.lower().split()) for word in exclude if word.strip()}
+        if not words:
+            return None
+        alternatives = [r"\s+".join(map(re.escape, word.split())) for word in sorted(words, key=len, reverse=True)]
+        return re.compile("|".join(alternatives))
 
 
 class LanguageTranslator:
@@ -0,0 +1,70 @@
+"""
+语言检测预处理基准：对比逐条 re.sub + 逐词 str.replace 的旧实现与预编译的 LanguageDetector._preprocess。
+
+样本为 mock_sessions 中的全部对话消息，外加带 URL、邮箱、emoji 与超长文本的构造样本。
+
+用法：
+    python -m benchmarks.language_detector_bench --number 20
+"""
+
+import argparse
+import json
+import re
+import timeit
+from pathlib import Path
+
+from app.services.react_agent.config import react_agent_settings
+from app.services.react_agent.utils import LanguageDetector
+
+
+def _legacy_preprocess(text: str, exclude: list[str], max_length: int) -> str:
+    """改造前的预处理实现（先截断、再逐个去除排除词）。"""
+    text = text.replace("\n", " ").replace("\r", " ").replace("\x00", "").strip().lower()
+    text = re.sub(r"https?://\S+", "", text)
+    text = re.sub(r"\S+@\S+\.\S+", "", text)
+    text = re.sub(r"[^\w\s\u4e00-\u9fff\u3040-\u30ff]", "", text)
+    text = re.sub(r"\s+", " ", text)
+    text = text[:max_length]
+    for word in exclude:
+        text = text.replace(word.lower(), "")
+    return text
+
+
+def _load_texts() -> list[str]:
+    texts = []
+    for path in Path("mock_sessions").glob("*.json"):
+        session = json.loads(path.read_text(encoding="utf-8"))
+        texts.extend(message["content"] for message in session.get("conversation", []) if message.get("content"))
+    texts += [
+        "请问 METAVERTU 2 的价格是多少？🤔 详情见 https://vertu.com/metavertu-2?from=chat",
+        "My email is someone@example.com, can I get the SIGNATURE S in black? 😊",
+        "Agent Q 和 iVERTU 有什么区别！！！" * 3,
+        "VERTU " * 200,
+    ]
+    return texts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20, help="每个实现重复处理全部样本的次数")
+    args = parser.parse_args()
+
+    texts = _load_texts()
+    exclude = react_agent_settings.language_detector_exclude
+    max_length = react_agent_settings.language_detector_max_length
+    detector = LanguageDetector(
+        react_agent_settings.language_detector_model_path, exclude=exclude, max_length=max_length
+    )
+
+    implementations = {
+        "legacy": lambda: [_legacy_preprocess(text, exclude, max_length) for text in texts],
+        "compiled": lambda: [detector._preprocess(text) for text in texts],
+    }
+    for name, run in implementations.items():
+        seconds = min(timeit.repeat(run, number=args.number, repeat=3))
+        per_call = seconds / args.number / len(texts) * 1e6
+        print(f"{name:<10} texts={len(texts):<6} {per_call:.2f}us/text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import asyncio
+from pathlib import Path
+
+import fasttext
+import pytest
+
+
+async def _import_shared() -> None:
+    # app.core.shared 在导入时创建 AsyncPostgresSaver，需要运行中的事件循环
+    import app.core.shared  # noqa: F401
+
+
+asyncio.run(_import_shared())
+
+
+@pytest.fixture(scope="session")
+def lid_model_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """只区分 en / zh 的小型 fastText 语言检测模型，代替约 126 MB 的 lid.176.bin。"""
+    english = [
+        "how much is the phone",
+        "what is the price of this model",
+        "do you ship to london",
+        "tell me about the battery life",
+        "is there a warranty for repairs",
+    ]
+    chinese = ["这款手机多少钱", "请问有什么颜色", "可以寄到上海吗", "电池能用多久", "保修期是多长时间"]
+    lines = [f"__label__en {text}" for text in english]
+    for text in chinese:
+        lines += [f"__label__zh {text}", f"__label__zh {' '.join(text)}"]
+    directory = tmp_path_factory.mktemp("lid")
+    (directory / "train.txt").write_text("\n".join(lines * 20))
+    model = fasttext.train_supervised(
+        str(directory / "train.txt"), dim=16, epoch=50, lr=1.0, minn=1, maxn=3, bucket=20000, thread=1, verbose=0
+    )
+    model.save_model(str(directory / "lid.bin"))
+    return directory / "lid.bin"
+
+
+@pytest.fixture
+def make_agent(monkeypatch: pytest.MonkeyPatch):
+    """构造新的 ReActAgent 单例（内存 checkpointer），工具默认为 tests.fakes.lookup。"""
+    from app.services.react_agent.agent import ReActAgent
+    from tests.fakes import lookup
+
+    def make(chat_model, system_prompt: str = "time: {current_time}", tools=None, **kwargs) -> ReActAgent:
+        monkeypatch.setattr(ReActAgent, "_instance", None)
+        return ReActAgent(chat_model=chat_model, tools=tools or [lookup], system_prompt=system_prompt, **kwargs)
+
+    return make
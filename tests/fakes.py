@@ -0,0 +1,84 @@
+"""测试用的对话模型与工具。"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.tools import tool
+from pydantic import Field
+
+
+class FakeChatModel(GenericFakeChatModel):
+    """按顺序返回预设消息的对话模型，可模拟响应延迟与调用失败；流式输出时按空格逐词输出。"""
+
+    delay: float = 0.0
+    error: Exception | None = None
+    # 流式输出该数量的词后抛出 stream_error（模拟输出中途失败）
+    stream_error_after: int | None = None
+    stream_error: Exception = Field(default_factory=lambda: RuntimeError("stream interrupted"))
+    calls: int = 0
+    received: list[list[BaseMessage]] = Field(default_factory=list)
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await self._before_call(messages)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await self._before_call(messages)
+        message = next(self.messages)
+        if message.tool_calls:
+            tool_call_chunks = [
+                {"id": call["id"], "name": call["name"], "args": json.dumps(call["args"]), "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ]
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=tool_call_chunks))
+            return
+        for i, word in enumerate(message.content.split(" ")):
+            if i == self.stream_error_after:
+                raise self.stream_error
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _before_call(self, messages: list[BaseMessage]) -> None:
+        self.calls += 1
+        self.received.append(messages)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+
+
+def replies(*messages: AIMessage | str) -> Iterator[AIMessage]:
+    return iter([AIMessage(content=message) if isinstance(message, str) else message for message in messages])
+
+
+def tool_call(name: str, call_id: str = "call-1", **args: Any) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{"id": call_id, "name": name, "args": args}])
+
+
+@tool
+async def lookup(query: str) -> dict:
+    """查询测试数据。"""
+    return {"success": True, "data": query}
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services.react_agent import shared
+from app.services.react_agent.config import react_agent_settings
+from app.services.react_agent.resilience import CircuitBreaker
+from tests.fakes import FakeChatModel, replies
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", window_size=1, min_calls=1, cooldown=60)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_open_breaker_routes_to_backup(make_agent) -> None:
+    primary = FakeChatModel(messages=replies("primary"))
+    backup = FakeChatModel(messages=replies("backup"))
+    agent = make_agent(primary, backup_chat_model=backup, circuit_breaker=_open_breaker())
+
+    assert asyncio.run(agent.arun("hi", "t1")) == "backup"
+    assert primary.calls == 0
+
+
+def test_primary_failure_is_raised_without_backup(make_agent) -> None:
+    primary = FakeChatModel(messages=replies(), error=RuntimeError("primary down"))
+    agent = make_agent(primary)
+
+    with pytest.raises(RuntimeError, match="primary down"):
+        asyncio.run(agent.arun("hi", "t1"))
+    assert primary.calls == 1
+
+
+def test_breaker_and_backup_are_built_only_with_backup_config() -> None:
+    configured = react_agent_settings.backup_llm_configured
+    assert (shared.backup_chat_model is not None) == configured
+    assert (shared.chat_model_breaker is not None) == configured
+
+
+def _hedged_calls(winner: str) -> float:
+    return REGISTRY.get_sample_value("react_agent_llm_hedged_calls_total", {"winner": winner}) or 0.0
+
+
+def test_slow_primary_is_hedged_with_backup(make_agent) -> None:
+    primary = FakeChatModel(messages=replies("primary"), delay=1.0)
+    backup = FakeChatModel(messages=replies("backup"))
+    agent = make_agent(primary, backup_chat_model=backup, hedge_delay=0.05)
+    won_by_backup = _hedged_calls("backup")
+
+    started_at = time.monotonic()
+    assert asyncio.run(agent.arun("hi", "t1")) == "backup"
+    assert time.monotonic() - started_at < 0.5
+    assert _hedged_calls("backup") == won_by_backup + 1
+
+
+def test_fast_primary_is_not_hedged(make_agent) -> None:
+    primary = FakeChatModel(messages=replies("primary"))
+    backup = FakeChatModel(messages=replies("backup"))
+    agent = make_agent(primary, backup_chat_model=backup, hedge_delay=0.5)
+
+    assert asyncio.run(agent.arun("hi", "t1")) == "primary"
+    assert backup.calls == 0
+
+
+def test_failed_primary_falls_back_before_hedge_delay(make_agent) -> None:
+    primary = FakeChatModel(messages=replies(), error=RuntimeError("primary down"))
+    backup = FakeChatModel(messages=replies("backup"))
+    agent = make_agent(primary, backup_chat_model=backup, hedge_delay=0.5)
+
+    assert asyncio.run(agent.arun("hi", "t1")) == "backup"
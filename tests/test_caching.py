@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services.react_agent.caching import AsyncTTLCache
+from app.services.react_agent.resilience import Deadline
+
+
+def test_concurrent_misses_share_one_load() -> None:
+    cache = AsyncTTLCache("test", ttl=60)
+    calls = []
+
+    async def loader() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def main() -> list[str]:
+        return await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["value"] * 10
+    assert len(calls) == 1
+    assert cache.get("key") == "value"
+
+
+def test_errors_reach_all_waiters_and_are_not_cached() -> None:
+    cache = AsyncTTLCache("test", ttl=60)
+    calls = []
+
+    async def loader() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def main() -> list:
+        return await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 1
+    assert cache.get("key") is None
+
+
+def test_caller_timeout_does_not_cancel_shared_load() -> None:
+    cache = AsyncTTLCache("test", ttl=60)
+
+    async def loader() -> str:
+        await asyncio.sleep(0.1)
+        return "value"
+
+    async def main() -> str:
+        impatient = asyncio.create_task(cache.get_or_load("key", loader, timeout=0.01))
+        patient = asyncio.create_task(cache.get_or_load("key", loader))
+        with pytest.raises(TimeoutError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(main()) == "value"
+    assert cache.get("key") == "value"
+
+
+def _size(name: str) -> float:
+    return REGISTRY.get_sample_value("react_agent_tool_cache_size", {"cache": name})
+
+
+def test_entries_expire_after_ttl() -> None:
+    cache = AsyncTTLCache("test_ttl", ttl=0.05)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert _size("test_ttl") == 1
+    time.sleep(0.06)
+    # 过期条目在被访问前即不再计入条目数
+    assert _size("test_ttl") == 0
+    assert cache.get("key") is None
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = AsyncTTLCache("test", ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_cached_decorator_ignores_deadline_in_key() -> None:
+    cache = AsyncTTLCache("test", ttl=60)
+    calls = []
+
+    @cache.cached()
+    async def query(collections: list[str], query: str, deadline: Deadline | None = None) -> dict:
+        calls.append(query)
+        return {"query": query}
+
+    async def main() -> None:
+        await query(["faq"], "价格", deadline=Deadline.after(10))
+        await query(["faq"], "价格")
+        await query(["faq"], "颜色")
+
+    asyncio.run(main())
+    assert calls == ["价格", "颜色"]
+
+
+def test_shared_load_does_not_inherit_the_first_callers_deadline() -> None:
+    cache = AsyncTTLCache("test", ttl=60)
+    deadlines = []
+
+    @cache.cached()
+    async def query(query: str, deadline: Deadline | None = None) -> str:
+        deadlines.append(deadline)
+        await asyncio.sleep(0.05)
+        return query
+
+    async def main() -> str:
+        hurried = asyncio.create_task(query("价格", deadline=Deadline.after(0.01)))
+        patient = asyncio.create_task(query("价格", deadline=Deadline.after(10)))
+        with pytest.raises(TimeoutError):
+            await hurried
+        return await patient
+
+    assert asyncio.run(main()) == "价格"
+    assert deadlines == [None]
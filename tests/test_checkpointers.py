@@ -0,0 +1,215 @@
+import asyncio
+import os
+import time
+
+import psycopg
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.base.id import uuid6
+from langgraph.checkpoint.memory import InMemorySaver
+from prometheus_client import REGISTRY
+from psycopg_pool import AsyncConnectionPool
+
+from app.services.react_agent import deps
+from app.services.react_agent.agent import AISalesAgent, ReActAgent
+from app.services.react_agent.checkpointers import (
+    BoundedMemorySaver,
+    CachedCheckpointSaver,
+    PipelinedPostgresSaver,
+    ShallowPostgresSaver,
+)
+from app.services.react_agent.config import react_agent_settings
+from app.services.react_agent.shared import chat_model
+from tests.fakes import FakeChatModel, replies, tool_call
+
+# 需要可写的 Postgres，例如 TEST_POSTGRES_URL=postgresql://postgres:@localhost:5432/postgres
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+requires_postgres = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+
+@pytest.fixture
+def fresh_agent(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(AISalesAgent, "_instance", None)
+    monkeypatch.setattr(react_agent_settings, "checkpoint_cache_enabled", False)
+
+
+@pytest.mark.parametrize(("mode", "saver"), [("pipelined", PipelinedPostgresSaver), ("shallow", ShallowPostgresSaver)])
+def test_postgres_saver_agent_is_built_by_the_async_dependency(fresh_agent, monkeypatch, mode, saver) -> None:
+    monkeypatch.setattr(react_agent_settings, "checkpoint_mode", mode)
+
+    # 事件循环外（如 FastAPI 线程池中的同步依赖）无法构造 AsyncPostgresSaver 子类
+    with pytest.raises(RuntimeError):
+        AISalesAgent(chat_model=chat_model, tools=[], system_prompt="")
+    # 构造失败不会留下没有 graph 的单例
+    assert not AISalesAgent._instance._initialized
+
+    agent = asyncio.run(deps.get_react_agent())
+    assert isinstance(agent._graph.checkpointer, saver)
+    assert asyncio.run(deps.get_react_agent()) is agent
+
+
+def _config(checkpoint_id: str | None = None) -> dict:
+    configurable = {"thread_id": "t1", "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def test_pending_writes_survive_a_failed_flush() -> None:
+    async def main() -> None:
+        # 未打开的连接池：每次借出连接都会失败
+        saver = PipelinedPostgresSaver(AsyncConnectionPool("", open=False), flush_delay=60)
+        await saver.aput_writes(_config("c1"), [("messages", "hi")], task_id="task")
+
+        with pytest.raises(psycopg.Error):
+            await saver._flush(("t1", ""))
+        assert len(saver._pending_writes[("t1", "")]) == 1
+
+        with pytest.raises(psycopg.Error):
+            await saver.aput(_config("c1"), empty_checkpoint(), {}, {})
+        assert len(saver._pending_writes[("t1", "")]) == 1
+        # 放回的 writes 由后台任务重试
+        assert ("t1", "") in saver._flush_tasks
+        saver._take_pending_writes(("t1", ""))
+
+    asyncio.run(main())
+
+
+def test_cached_checkpoints_are_isolated_from_callers() -> None:
+    async def main() -> None:
+        # 内存 checkpointer 代替 Postgres 作为回源后端
+        saver = CachedCheckpointSaver(InMemorySaver())
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": [HumanMessage(content="hi", id="m1")]}
+        await saver.aput(_config(), checkpoint, {}, {})
+        checkpoint["channel_values"]["messages"].append(HumanMessage(content="leaked"))
+
+        first = await saver.aget_tuple(_config())
+        assert [message.content for message in first.checkpoint["channel_values"]["messages"]] == ["hi"]
+        first.checkpoint["channel_values"]["messages"][0].content = "changed"
+
+        second = await saver.aget_tuple(_config())
+        assert second.checkpoint["channel_values"]["messages"][0].content == "hi"
+        assert second.config["configurable"]["checkpoint_id"] == checkpoint["id"]
+        assert second.pending_writes == []
+
+    asyncio.run(main())
+
+
+def _count_rows(thread_id: str) -> dict[str, int]:
+    with psycopg.connect(POSTGRES_URL) as conn:
+        return {
+            table: conn.execute(f"select count(*) from {table} where thread_id = %s", (thread_id,)).fetchone()[0]
+            for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes")
+        }
+
+
+async def _open_saver(saver_class: type[PipelinedPostgresSaver]) -> PipelinedPostgresSaver:
+    pool = AsyncConnectionPool(POSTGRES_URL, open=False, kwargs={"autocommit": True})
+    await pool.open()
+    saver = saver_class(pool)
+    await saver.setup()
+    return saver
+
+
+@requires_postgres
+@pytest.mark.parametrize("durability", ["sync", "async", "exit"])
+def test_shallow_saver_keeps_only_the_latest_checkpoint(make_agent, monkeypatch, durability) -> None:
+    thread_id = f"shallow-{durability}"
+
+    async def main() -> int:
+        saver = await _open_saver(ShallowPostgresSaver)
+        await saver.adelete_thread(thread_id)
+        monkeypatch.setattr(ReActAgent, "_get_checkpointer", lambda self: saver)
+        model = FakeChatModel(
+            messages=replies(tool_call("lookup", query="a"), "one", tool_call("lookup", query="b"), "two")
+        )
+        agent = make_agent(model, durability=durability)
+        try:
+            assert await agent.arun("hi", thread_id) == "one"
+            assert await agent.arun("again", thread_id) == "two"
+            state = await agent._graph.aget_state({"configurable": {"thread_id": thread_id}})
+            return len(state.values["messages"])
+        finally:
+            await saver.conn.close()
+
+    assert asyncio.run(main()) == 8
+    rows = _count_rows(thread_id)
+    assert rows["checkpoints"] == 1
+    assert rows["checkpoint_writes"] == 0
+    # 只保留最新 checkpoint 引用的 blob（messages）
+    assert rows["checkpoint_blobs"] == 1
+
+
+@requires_postgres
+def test_shallow_saver_keeps_writes_of_the_new_checkpoint() -> None:
+    async def main() -> list:
+        saver = await _open_saver(ShallowPostgresSaver)
+        saver._flush_delay = 5
+        await saver.adelete_thread("t1")
+        try:
+            first = {**empty_checkpoint(), "id": str(uuid6(clock_seq=1))}
+            first_config = await saver.aput(_config(), first, {"step": 0}, {})
+            second = {**empty_checkpoint(), "id": str(uuid6(clock_seq=2))}
+            # durability="async" 时新 checkpoint 的 writes 可能先于其 aput 写入
+            await saver.aput_writes(first_config, [("a", 1)], "old-task")
+            await saver.aput_writes(_config(second["id"]), [("b", 2)], "new-task")
+            await saver.aput(first_config, second, {"step": 1}, {})
+            checkpoint_tuple = await saver.aget_tuple(_config())
+            assert checkpoint_tuple.checkpoint["id"] == second["id"]
+            return checkpoint_tuple.pending_writes
+        finally:
+            await saver.conn.close()
+
+    assert asyncio.run(main()) == [("new-task", "b", 2)]
+
+
+def _put_thread(saver: BoundedMemorySaver, thread_id: str, text: str = "hello") -> None:
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": [HumanMessage(content=text)]}
+    checkpoint["channel_versions"] = {"messages": 1}
+    saver.put({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}, checkpoint, {}, {"messages": 1})
+
+
+def _has_thread(saver: BoundedMemorySaver, thread_id: str) -> bool:
+    return saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}) is not None
+
+
+def _evictions(reason: str) -> float:
+    return REGISTRY.get_sample_value("react_agent_memory_checkpoint_evictions_total", {"reason": reason}) or 0.0
+
+
+def test_bounded_memory_saver_evicts_least_recently_used_thread() -> None:
+    saver = BoundedMemorySaver(max_threads=2)
+    evicted = _evictions("max_threads")
+    _put_thread(saver, "t1")
+    _put_thread(saver, "t2")
+    assert _has_thread(saver, "t1")
+    _put_thread(saver, "t3")
+
+    assert [_has_thread(saver, thread_id) for thread_id in ("t1", "t2", "t3")] == [True, False, True]
+    assert _evictions("max_threads") == evicted + 1
+    assert REGISTRY.get_sample_value("react_agent_memory_checkpoint_threads") == 2
+
+
+def test_bounded_memory_saver_evicts_idle_and_oversized_threads() -> None:
+    saver = BoundedMemorySaver(idle_ttl=0.05)
+    _put_thread(saver, "t1")
+    time.sleep(0.06)
+    _put_thread(saver, "t2")
+    assert not _has_thread(saver, "t1")
+
+    size = saver._total_bytes
+    saver = BoundedMemorySaver(max_bytes=size + size // 2)
+    _put_thread(saver, "t1")
+    _put_thread(saver, "t2")
+    assert not _has_thread(saver, "t1")
+    # 当前会话即使单独超出上限也不会被淘汰
+    _put_thread(saver, "t2", text="x" * size * 2)
+    assert _has_thread(saver, "t2")
+
+    saver.delete_thread("t2")
+    assert saver._total_bytes == 0
+    assert REGISTRY.get_sample_value("react_agent_memory_checkpoint_bytes") == 0
@@ -0,0 +1,60 @@
+import time
+
+from app.services.react_agent.resilience import CircuitBreaker
+
+
+def _breaker(**kwargs) -> CircuitBreaker:
+    options = {"window_size": 4, "min_calls": 4, "failure_rate_threshold": 0.5, "cooldown": 0.05}
+    return CircuitBreaker("test", **(options | kwargs))
+
+
+def test_breaker_opens_when_failure_rate_reaches_threshold() -> None:
+    breaker = _breaker()
+    for _ in range(2):
+        breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_breaker_opens_on_slow_calls() -> None:
+    breaker = _breaker(slow_call_duration=1.0, slow_call_rate_threshold=0.75)
+    for _ in range(4):
+        breaker.record_success(2.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_closes_after_successful_probe() -> None:
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    # 半开状态只放行 half_open_max_calls 个试探调用
+    assert not breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_breaker_reopens_after_failed_probe() -> None:
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_cancelled_probe_returns_its_slot() -> None:
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_cancelled(0.1)
+    assert breaker.allow_request()
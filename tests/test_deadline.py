@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+from app.services.react_agent.prompts import FINAL_ANSWER_PROMPT
+from app.services.react_agent.resilience import Deadline
+from app.services.react_agent.tools import get_deadline
+from tests.fakes import FakeChatModel, replies, tool_call
+
+
+def test_deadline_shrinks_timeouts_and_expires() -> None:
+    deadline = Deadline.after(0.05)
+    assert deadline.timeout(10) <= 0.05
+    assert deadline.timeout(0.01) == 0.01
+    time.sleep(0.06)
+    assert deadline.expired
+    with pytest.raises(TimeoutError):
+        deadline.timeout(10)
+
+
+def test_tools_receive_the_request_deadline(make_agent) -> None:
+    remaining = []
+
+    @tool
+    async def check(query: str, config: RunnableConfig) -> str:
+        """读取截止时间。"""
+        remaining.append(get_deadline(config).remaining())
+        return "ok"
+
+    model = FakeChatModel(messages=replies(tool_call("check", query="q"), "done"))
+    agent = make_agent(model, tools=[check])
+
+    assert asyncio.run(agent.arun("hi", "t1", deadline=Deadline.after(30))) == "done"
+    assert 0 < remaining[0] <= 30
+
+
+def test_final_answer_is_forced_within_the_reserve(make_agent) -> None:
+    model = FakeChatModel(messages=replies("final"))
+    agent = make_agent(model, final_answer_reserve=10)
+
+    assert asyncio.run(agent.arun("hi", "t1", deadline=Deadline.after(5))) == "final"
+    assert model.received[0][-1].content == FINAL_ANSWER_PROMPT
+
+
+def test_model_call_is_bounded_by_the_deadline(make_agent) -> None:
+    agent = make_agent(FakeChatModel(messages=replies("late"), delay=1.0))
+
+    started_at = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(agent.arun("hi", "t1", deadline=Deadline.after(0.1)))
+    assert time.monotonic() - started_at < 0.5
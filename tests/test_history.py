@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+
+from app.services.react_agent.history import HistoryCompactor, estimate_tokens
+from app.services.react_agent.resilience import Deadline
+from tests.fakes import FakeChatModel, replies
+
+_SUMMARY_PROMPT = "summary: {summary}\nhistory: {history}"
+
+
+def _turn(index: int, tool_result: str = "ok") -> list:
+    return [
+        HumanMessage(content=f"question {index}", id=f"h{index}"),
+        AIMessage(
+            content="", id=f"a{index}", tool_calls=[{"id": f"call-{index}", "name": "lookup", "args": {"query": "q"}}]
+        ),
+        ToolMessage(content=tool_result, id=f"t{index}", tool_call_id=f"call-{index}", name="lookup"),
+        AIMessage(content=f"answer {index}", id=f"r{index}"),
+    ]
+
+
+def test_estimate_tokens_counts_cjk_per_character() -> None:
+    assert estimate_tokens("你好") == 2
+    assert estimate_tokens("abcd") == 1
+
+
+def test_zero_keep_last_turns_still_keeps_current_turn() -> None:
+    model = FakeChatModel(messages=replies("new summary"))
+    compactor = HistoryCompactor(model, _SUMMARY_PROMPT, max_tokens=1, keep_last_turns=0)
+    messages = [*_turn(1), *_turn(2), HumanMessage(content="question 3", id="h3")]
+
+    update = asyncio.run(compactor.acompact(messages))
+
+    removed = [message.id for message in update["messages"] if isinstance(message, RemoveMessage)]
+    assert removed == [message.id for message in messages[:-1]]
+    assert update["summary"] == "new summary"
+
+
+def test_truncated_tool_results_are_not_rewritten() -> None:
+    compactor = HistoryCompactor(
+        FakeChatModel(messages=replies()), _SUMMARY_PROMPT, max_tokens=1, keep_last_turns=2, tool_result_max_chars=10
+    )
+    messages = [*_turn(1, tool_result="x" * 100), HumanMessage(content="question 2", id="h2")]
+
+    update = asyncio.run(compactor.acompact(messages))
+    (truncated,) = update["messages"]
+    assert truncated.id == "t1"
+    assert truncated.additional_kwargs["truncated"] is True
+
+    messages[2] = truncated
+    assert asyncio.run(compactor.acompact(messages)) is None
+
+
+def test_compaction_timeout_leaves_time_for_the_agent(make_agent) -> None:
+    summary_model = FakeChatModel(messages=replies("summary"), delay=1.0)
+    compactor = HistoryCompactor(summary_model, _SUMMARY_PROMPT, max_tokens=1, keep_last_turns=1, timeout=0.05)
+    agent = make_agent(FakeChatModel(messages=replies("first", "second")), history_compactor=compactor)
+
+    asyncio.run(agent.arun("hi", "t1"))
+    start = time.monotonic()
+    assert asyncio.run(agent.arun("again", "t1", deadline=Deadline.after(5))) == "second"
+    assert time.monotonic() - start < 1.0
+    assert summary_model.calls == 1
+
+
+def test_compaction_is_skipped_within_final_answer_reserve(make_agent) -> None:
+    summary_model = FakeChatModel(messages=replies("summary"))
+    compactor = HistoryCompactor(summary_model, _SUMMARY_PROMPT, max_tokens=1, keep_last_turns=1)
+    agent = make_agent(
+        FakeChatModel(messages=replies("first", "second")), history_compactor=compactor, final_answer_reserve=10
+    )
+
+    asyncio.run(agent.arun("hi", "t1"))
+    assert asyncio.run(agent.arun("again", "t1", deadline=Deadline.after(5))) == "second"
+    assert summary_model.calls == 0
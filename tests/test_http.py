@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+
+from app.core.http import HttpClientRegistry, InstrumentedTransport
+from app.services.react_agent import service
+from app.services.react_agent.config import react_agent_settings
+from app.services.react_agent.resilience import Deadline
+from app.services.react_agent.shared import http_clients, wechat_push_http_client
+
+
+def test_connection_stats_track_in_flight_queued_and_idle_connections() -> None:
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await release.wait()
+        return httpx.Response(200)
+
+    limits = httpx.Limits(max_connections=2, max_keepalive_connections=1, keepalive_expiry=30)
+    transport = InstrumentedTransport("test", httpx.MockTransport(handler), limits)
+
+    async def main() -> None:
+        async with httpx.AsyncClient(transport=transport) as client:
+            requests = [asyncio.create_task(client.get("http://upstream.test/")) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            assert transport.connection_stats() == {"connections": 2, "idle": 0, "queued": 1}
+            release.set()
+            await asyncio.gather(*requests)
+            # 请求结束后最多保留 max_keepalive_connections 个空闲连接
+            assert transport.connection_stats() == {"connections": 1, "idle": 1, "queued": 0}
+
+    asyncio.run(main())
+
+
+def test_registry_returns_one_client_per_name_and_warms_up_configured_path() -> None:
+    registry = HttpClientRegistry()
+    client = registry.register(
+        "test", "http://upstream.test/api/query", timeout=10, warmup_connections=2, warmup_path="/health"
+    )
+    assert registry.register("test") is client
+
+    warmed = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        warmed.append((request.method, str(request.url)))
+        return httpx.Response(200)
+
+    registry.transports()["test"].transport = httpx.MockTransport(handler)
+    asyncio.run(registry.warmup())
+    assert warmed == [("HEAD", "http://upstream.test/health")] * 2
+
+
+def test_request_timeout_keeps_client_connect_and_pool_timeouts(monkeypatch) -> None:
+    timeouts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"])
+        return httpx.Response(200)
+
+    monkeypatch.setattr(react_agent_settings, "wechat_push_url", "http://wechat.test/push")
+    monkeypatch.setattr(http_clients.transports()["wechat_push"], "transport", httpx.MockTransport(handler))
+    asyncio.run(service.ReactAgentService.send_human_notification("hello", deadline=Deadline.after(0.5)))
+
+    configured = wechat_push_http_client.timeout
+    assert timeouts[0]["connect"] == configured.connect
+    assert timeouts[0]["pool"] == configured.pool
+    assert timeouts[0]["read"] <= 0.5
+    assert service._timeout(wechat_push_http_client, None) is configured
@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.shared import shutdown_hooks, startup_hooks
+from app.services.react_agent import shared
+from app.services.react_agent.config import react_agent_settings
+from app.services.react_agent.utils import LanguageDetector
+
+
+def _queue_depth() -> float:
+    return REGISTRY.get_sample_value("react_agent_language_detection_queue_depth")
+
+
+def test_queue_depth_returns_to_zero_when_queued_calls_are_cancelled(tmp_path) -> None:
+    detector = LanguageDetector(tmp_path / "lid.176.bin", max_workers=1)
+    baseline = _queue_depth()
+
+    async def main() -> None:
+        blocker = asyncio.create_task(detector._run_in_executor(time.sleep, 0.1))
+        await asyncio.sleep(0.02)
+        queued = [asyncio.create_task(detector._run_in_executor(time.sleep, 0)) for _ in range(4)]
+        await asyncio.sleep(0.02)
+        assert _queue_depth() == baseline + 4
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        await blocker
+
+    asyncio.run(main())
+    assert _queue_depth() == baseline
+
+
+def test_preprocess_removes_urls_symbols_and_excluded_words(tmp_path) -> None:
+    detector = LanguageDetector(tmp_path / "lid.176.bin", exclude=["VERTU", "Agent Q"])
+    text = "VERTU Agent Q 的价格是多少？🤔 https://vertu.com/agent-q someone@example.com"
+    assert detector._preprocess(text) == "的价格是多少"
+
+
+def test_load_is_idempotent_and_reports_load_metrics(lid_model_path) -> None:
+    detector = LanguageDetector(lid_model_path)
+    detector.load()
+    model = detector.model
+    detector.load()
+    assert detector.model is model
+    assert REGISTRY.get_sample_value("react_agent_language_model_load_seconds") > 0
+
+
+def test_load_raises_when_model_is_missing(tmp_path) -> None:
+    with pytest.raises(FileNotFoundError):
+        LanguageDetector(tmp_path / "lid.176.bin").load()
+
+
+def test_prefers_compressed_model_next_to_the_configured_one(tmp_path) -> None:
+    (tmp_path / "lid.176.ftz").touch()
+    assert LanguageDetector(tmp_path / "lid.176.bin", prefer_compressed=True)._model_path.name == "lid.176.ftz"
+    assert LanguageDetector(tmp_path / "lid.176.bin")._model_path.name == "lid.176.bin"
+
+
+def test_model_is_not_warmed_up_without_a_consumer() -> None:
+    # 默认未启用回复缓存，启动时不加载约 126 MB 的模型
+    assert not react_agent_settings.response_cache_enabled
+    assert shared._warmup_language_detector not in startup_hooks
+
+
+def _cache_requests(result: str) -> float:
+    return REGISTRY.get_sample_value("react_agent_language_detection_cache_requests_total", {"result": result}) or 0.0
+
+
+def test_results_are_memoized_in_a_bounded_lru(lid_model_path) -> None:
+    detector = LanguageDetector(lid_model_path, threshold=0.0, cache_size=2)
+    hits = _cache_requests("hit")
+    first = detector.detect_with_confidence("how much is the phone")
+    # 预处理后相同的文本共用缓存
+    assert detector.detect_with_confidence("How much is the phone?") is first
+    assert _cache_requests("hit") == hits + 1
+
+    detector.detect_with_confidence("tell me about the battery life")
+    detector.detect_with_confidence("how much is the phone")
+    detector.detect_with_confidence("do you ship to london")
+    assert list(detector._cache) == [("how much is the phone", 5), ("do you ship to london", 5)]
+
+
+def test_prediction_errors_are_logged_not_printed(tmp_path, caplog, capsys) -> None:
+    detector = LanguageDetector(tmp_path / "lid.176.bin")
+
+    assert detector.detect_with_confidence("how much is the phone").lang == "unknown"
+    assert "Language detection error" in caplog.text
+    assert capsys.readouterr().out == ""
+
+
+def test_shutdown_closes_the_executor_and_is_registered_as_shutdown_hook(tmp_path) -> None:
+    detector = LanguageDetector(tmp_path / "lid.176.bin", max_workers=1)
+    detector.shutdown()
+    with pytest.raises(RuntimeError):
+        asyncio.run(detector.adetect("how much is the phone"))
+    assert shared._shutdown_language_detector in shutdown_hooks
+
+
+def test_detect_many_matches_single_detection(lid_model_path) -> None:
+    detector = LanguageDetector(lid_model_path, threshold=0.5)
+    texts = ["how much is the phone", "这款手机多少钱", "hi", "", "do you ship to london"]
+
+    langs = detector.detect_many(texts)
+
+    assert langs.tolist() == [detector.detect(text) for text in texts]
+    assert langs.tolist() == ["en", "zh", "unknown", "unknown", "en"]
+    result = detector.detect_with_confidence_many(texts)
+    assert result.scores[2] == 0 and result.scores[3] == 0
+    assert detector.detect_many([]).tolist() == []
+
+
+def test_detect_many_returns_unknown_below_threshold(lid_model_path) -> None:
+    detector = LanguageDetector(lid_model_path, threshold=1.01)
+    assert detector.detect_many(["how much is the phone"]).tolist() == ["unknown"]
+    assert detector.detect_with_confidence_many(["how much is the phone"]).langs.tolist() == ["en"]
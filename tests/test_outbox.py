@@ -0,0 +1,107 @@
+import asyncio
+import os
+
+import httpx
+import psycopg
+import pytest
+from psycopg_pool import AsyncConnectionPool
+
+from app.config import settings
+from app.services.react_agent import outbox
+from app.services.react_agent.config import react_agent_settings
+
+# 需要可写的 Postgres，例如 TEST_POSTGRES_URL=postgresql://postgres:@localhost:5432/postgres
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+
+@pytest.fixture
+def push(monkeypatch):
+    """建表并将投递请求转到 MockTransport；返回收到的通知内容与下一次响应状态码。"""
+    state = {"sent": [], "status": 200}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state["sent"].append(request.read().decode())
+        return httpx.Response(state["status"])
+
+    # postgres_url 由各连接参数拼接而成（只读属性）
+    monkeypatch.setattr(type(settings), "postgres_url", property(lambda _: POSTGRES_URL))
+    monkeypatch.setattr(react_agent_settings, "wechat_push_url", "http://wechat.test/push")
+    monkeypatch.setattr(react_agent_settings, "notification_max_attempts", 2)
+    monkeypatch.setattr(react_agent_settings, "notification_retry_backoff_base", 0.0)
+    monkeypatch.setattr(outbox, "httpx_sync_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(outbox, "_dispatch_connection", outbox._DispatchConnection())
+
+    async def setup() -> None:
+        async with AsyncConnectionPool(POSTGRES_URL, open=False) as pool:
+            monkeypatch.setattr(outbox, "postgres_async_pool", pool)
+            async with pool.connection() as conn:
+                await conn.execute("drop table if exists react_agent_notification_outbox")
+            await outbox.setup_outbox()
+
+    asyncio.run(setup())
+    yield state
+    asyncio.run(outbox.close_outbox())
+    with psycopg.connect(POSTGRES_URL, autocommit=True) as conn:
+        conn.execute("drop table react_agent_notification_outbox")
+
+
+def _insert(*rows: tuple[str, str]) -> None:
+    with psycopg.connect(POSTGRES_URL, autocommit=True) as conn:
+        for row in rows:
+            conn.execute(outbox._INSERT_SQL, row)
+
+
+def _statuses() -> list[tuple[str, str, int]]:
+    with psycopg.connect(POSTGRES_URL) as conn:
+        return conn.execute(
+            "select content, status, attempts from react_agent_notification_outbox order by id"
+        ).fetchall()
+
+
+def test_sends_one_notification_per_thread(push) -> None:
+    _insert(("t1", "first"), ("t1", "second"), ("t2", "other"))
+    outbox.dispatch_notifications()
+    assert _statuses() == [("first", "sent", 1), ("second", "skipped", 0), ("other", "sent", 1)]
+    assert len(push["sent"]) == 2
+
+    # 去重窗口内同一会话的新通知同样跳过
+    _insert(("t1", "third"))
+    outbox.dispatch_notifications()
+    assert _statuses()[-1] == ("third", "skipped", 0)
+    assert len(push["sent"]) == 2
+
+
+def test_failed_notification_is_retried_then_marked_failed(push) -> None:
+    push["status"] = 500
+    _insert(("t1", "hello"))
+    outbox.dispatch_notifications()
+    assert _statuses() == [("hello", "failed", 2)]
+    assert len(push["sent"]) == 2
+
+
+def test_thread_with_active_claim_is_not_claimed_again(push) -> None:
+    _insert(("t1", "first"), ("t1", "second"))
+    with psycopg.connect(POSTGRES_URL, autocommit=True) as conn:
+        claimed = conn.execute(outbox._CLAIM_SQL, (300, 1)).fetchall()
+        assert [row[2] for row in claimed] == ["first"]
+        # 另一个 worker 在租约有效期内既不会重复认领，也不会认领同一会话的其他通知
+        assert conn.execute(outbox._CLAIM_SQL, (300, 10)).fetchall() == []
+
+        conn.execute("update react_agent_notification_outbox set claimed_until = now() - interval '1 second'")
+        reclaimed = conn.execute(outbox._CLAIM_SQL, (300, 10)).fetchall()
+    assert [row[2] for row in reclaimed] == ["first", "second"]
+
+
+def test_dispatch_reuses_one_connection_and_reconnects_when_closed(push) -> None:
+    outbox.dispatch_notifications()
+    conn = outbox._dispatch_connection.get()
+    outbox.dispatch_notifications()
+    assert outbox._dispatch_connection.get() is conn
+
+    conn.close()
+    _insert(("t1", "hello"))
+    outbox.dispatch_notifications()
+    assert outbox._dispatch_connection.get() is not conn
+    assert _statuses() == [("hello", "sent", 1)]
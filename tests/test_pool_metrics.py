@@ -0,0 +1,43 @@
+import asyncio
+import os
+
+import pytest
+from prometheus_client import CollectorRegistry
+from psycopg_pool import AsyncConnectionPool
+
+from app.core.metrics import ConnectionPoolCollector
+
+# 需要可写的 Postgres，例如 TEST_POSTGRES_URL=postgresql://postgres:@localhost:5432/postgres
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def _registry(pool: AsyncConnectionPool) -> CollectorRegistry:
+    registry = CollectorRegistry()
+    registry.register(ConnectionPoolCollector([pool]))
+    return registry
+
+
+def test_collector_skips_pools_that_are_not_open() -> None:
+    registry = _registry(AsyncConnectionPool("", name="test", min_size=2, max_size=5, open=False))
+    assert registry.get_sample_value("db_pool_in_use", {"pool": "test"}) is None
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+def test_collector_reports_connections_in_use_and_requests() -> None:
+    async def main() -> None:
+        async with AsyncConnectionPool(POSTGRES_URL, name="test", min_size=1, max_size=2, open=False) as pool:
+            await pool.wait()
+            registry = _registry(pool)
+            assert registry.get_sample_value("db_pool_min_size", {"pool": "test"}) == 1
+            assert registry.get_sample_value("db_pool_max_size", {"pool": "test"}) == 2
+            assert registry.get_sample_value("db_pool_size", {"pool": "test"}) == 1
+            assert registry.get_sample_value("db_pool_in_use", {"pool": "test"}) == 0
+
+            async with pool.connection(), pool.connection():
+                assert registry.get_sample_value("db_pool_in_use", {"pool": "test"}) == 2
+                assert registry.get_sample_value("db_pool_available", {"pool": "test"}) == 0
+            assert registry.get_sample_value("db_pool_requests_total", {"pool": "test"}) == 2
+            assert registry.get_sample_value("db_pool_connections_total", {"pool": "test"}) == 2
+            assert registry.get_sample_value("db_pool_usage_seconds_total", {"pool": "test"}) >= 0
+
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+import pytest
+
+from app.services.react_agent.catalog import ProductCatalogIndex
+
+FIELDS = {"model": "model", "color": "color", "material": "material", "price": "price"}
+PRODUCTS = [
+    {"model": "METAVERTU 2", "color": "黑色", "material": "小牛皮", "price": "¥12,800"},
+    {"model": "METAVERTU 2", "color": "红色", "material": "鳄鱼皮", "price": 39800},
+    {"model": "METAVERTU", "color": "黑色", "material": "小牛皮", "price": "约 0.98万"},
+    {"model": "SIGNATURE S", "color": "金色", "material": "钛金属", "price": "88000元"},
+]
+
+
+@pytest.fixture
+def index() -> ProductCatalogIndex:
+    return ProductCatalogIndex(PRODUCTS, FIELDS)
+
+
+def _models(products: list[dict]) -> list[tuple[str, str]]:
+    return [(product["model"], product["color"]) for product in products]
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("metavertu2 黑色", [("METAVERTU 2", "黑色")]),
+        ("MetaVertu 2 价格", [("METAVERTU 2", "黑色"), ("METAVERTU 2", "红色")]),
+        ("price of METAVERTU 2", [("METAVERTU 2", "黑色"), ("METAVERTU 2", "红色")]),
+        ("signature s", [("SIGNATURE S", "金色")]),
+        ("metavertu 2 3万以上", [("METAVERTU 2", "红色")]),
+    ],
+)
+def test_search_by_model(index: ProductCatalogIndex, query: str, expected: list[tuple[str, str]]) -> None:
+    assert _models(index.search(query)) == expected
+
+
+@pytest.mark.parametrize("query", ["METAVERTU 2 Max 价格", "metavertu 3", "iVERTU", "有没有 iPhone", "你好"])
+def test_search_unknown_model_falls_back(index: ProductCatalogIndex, query: str) -> None:
+    # 目录中没有的型号不能用相近型号回答，返回空列表由调用方回退到远程查询
+    assert index.search(query) == []
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("1万以下", (None, 10000)),
+        ("2w 以内", (None, 20000)),
+        ("3千元以上", (3000, None)),
+        ("10000元左右", (8000, 12000)),
+        ("约 1.2万", (9600, 14400)),
+        ("1.5万到5万", (15000, 50000)),
+        ("5000-20000", (5000, 20000)),
+        ("under 20k", (None, 20000)),
+        ("2 台", (None, None)),
+    ],
+)
+def test_parse_price_range(
+    index: ProductCatalogIndex, query: str, expected: tuple[float | None, float | None]
+) -> None:
+    assert index._parse_price_range(query) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("¥12,800", 12800), ("约 1.2万", 12000), ("88000元", 88000), (39800, 39800), ("面议", None)],
+)
+def test_parse_price(value: object, expected: float | None) -> None:
+    assert ProductCatalogIndex._parse_price(value) == expected
+
+
+def test_search_by_price_range(index: ProductCatalogIndex) -> None:
+    assert _models(index.search("1万以下")) == [("METAVERTU", "黑色")]
+    assert _models(index.search("10000元左右")) == [("METAVERTU", "黑色")]
+    assert _models(index.search("黑色 5000-20000")) == [("METAVERTU 2", "黑色"), ("METAVERTU", "黑色")]
@@ -0,0 +1,56 @@
+import asyncio
+import string
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.services.react_agent.prompts import (
+    REACT_AGENT_CONTEXT_PROMPT,
+    REACT_AGENT_STATIC_SYSTEM_PROMPT,
+)
+from app.services.react_agent.router import _build_context
+from app.services.react_agent.schemas import ReactAgentRequest
+from tests.fakes import FakeChatModel, replies
+
+_CONTEXT = {"user_id": "u1", "platform": "web", "region": "海外"}
+
+
+def _placeholders(template: str) -> set[str]:
+    return {name for _, name, _, _ in string.Formatter().parse(template) if name}
+
+
+def test_static_prompt_has_no_placeholders_and_context_prompt_matches_router_context() -> None:
+    assert _placeholders(REACT_AGENT_STATIC_SYSTEM_PROMPT) == set()
+    request = ReactAgentRequest(message="hi", **_CONTEXT)
+    assert _placeholders(REACT_AGENT_CONTEXT_PROMPT) == {"current_time", *_build_context(request)}
+
+
+def test_cache_friendly_layout_keeps_a_stable_prefix(make_agent) -> None:
+    model = FakeChatModel(messages=replies("first", "second"))
+    agent = make_agent(
+        model,
+        system_prompt=REACT_AGENT_STATIC_SYSTEM_PROMPT,
+        context_prompt=REACT_AGENT_CONTEXT_PROMPT,
+        context_time_format="%Y-%m-%d",
+    )
+
+    asyncio.run(agent.arun("hi", "t1", context=_CONTEXT))
+    asyncio.run(agent.arun("again", "t1", context=_CONTEXT))
+
+    first, second = model.received
+    # 第二轮以第一轮发送的消息（除末尾上下文外）为前缀
+    assert second[: len(first) - 1] == first[:-1]
+    assert first[0] == SystemMessage(content=REACT_AGENT_STATIC_SYSTEM_PROMPT)
+    assert isinstance(first[1], HumanMessage)
+    assert "用户id：u1" in first[-1].content
+    assert first[-1] == second[-1]
+
+
+def test_default_layout_puts_time_in_the_system_prompt(make_agent) -> None:
+    model = FakeChatModel(messages=replies("answer"))
+    agent = make_agent(model, system_prompt="time: {current_time}")
+
+    asyncio.run(agent.arun("hi", "t1"))
+
+    system, human = model.received[0]
+    assert system.content.startswith("time: 20")
+    assert human.content == "hi"
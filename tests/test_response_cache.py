@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+from prometheus_client import REGISTRY
+
+from app.services.react_agent.caching import AsyncTTLCache, ResponseCache
+from app.services.react_agent.metrics import RESPONSE_CACHE_SIZE
+from app.services.react_agent.utils import LanguageDetector
+from tests.fakes import FakeChatModel, replies, tool_call
+
+
+@pytest.fixture
+def response_cache(lid_model_path) -> ResponseCache:
+    return ResponseCache(
+        AsyncTTLCache("response_test", ttl=60, size_gauge=RESPONSE_CACHE_SIZE),
+        LanguageDetector(lid_model_path, threshold=0.5),
+        namespace="v1",
+        uncacheable_tools=["send_human_notification"],
+    )
+
+
+def test_key_normalizes_whitespace_case_and_trailing_punctuation(response_cache) -> None:
+    async def main() -> None:
+        key = await response_cache.key("How much is the phone?", {"region": "us"})
+        assert await response_cache.key("  how much   is the PHONE ？", {"region": "us"}) == key
+        assert await response_cache.key("How much is the phone?", {"region": "uk"}) != key
+        assert key[-1] == "en"
+
+    asyncio.run(main())
+
+
+def test_skips_uncacheable_and_failed_tool_results(response_cache) -> None:
+    notify = ToolMessage(content="ok", tool_call_id="1", name="send_human_notification")
+    failed = ToolMessage(content='{"success": false}', tool_call_id="2", name="lookup")
+    assert not response_cache.set(("a",), [notify, AIMessage(content="done")])
+    assert not response_cache.set(("b",), [failed, AIMessage(content="done")])
+    assert response_cache.set(("c",), [AIMessage(content="done", id="m1")])
+    assert [message.id for message in response_cache.get(("c",))] == [None]
+    assert REGISTRY.get_sample_value("react_agent_response_cache_size") == 1
+    # 回复缓存的条目数不计入工具查询缓存指标
+    assert REGISTRY.get_sample_value("react_agent_tool_cache_size", {"cache": "response_test"}) is None
+
+
+def test_first_turn_answer_is_replayed_for_other_threads(make_agent, response_cache) -> None:
+    model = FakeChatModel(messages=replies(tool_call("lookup", query="price"), "It costs 100"))
+    agent = make_agent(model, response_cache=response_cache)
+
+    async def main() -> None:
+        question = "how much is the phone"
+        assert await agent.arun(question, "t1", cache_query=question) == "It costs 100"
+        assert await agent.arun(question, "t2", cache_query=question) == "It costs 100"
+        state = await agent._graph.aget_state({"configurable": {"thread_id": "t2"}})
+        # 缓存的工具调用与结果一并写入新会话
+        assert [message.type for message in state.values["messages"]] == ["human", "ai", "tool", "ai"]
+
+    asyncio.run(main())
+    assert model.calls == 2
+
+
+def test_cache_query_is_not_stored_in_checkpoint_metadata_when_cache_is_disabled(make_agent) -> None:
+    agent = make_agent(FakeChatModel(messages=replies("hello")))
+
+    async def main() -> dict:
+        await agent.arun("hi", "t1", cache_query="private message")
+        state = await agent._graph.aget_state({"configurable": {"thread_id": "t1"}})
+        return state.metadata
+
+    assert "cache_query" not in asyncio.run(main())
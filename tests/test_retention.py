@@ -0,0 +1,63 @@
+import os
+from datetime import UTC, datetime, timedelta
+
+import psycopg
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.postgres import PostgresSaver
+
+from app.config import settings
+from app.services.react_agent import jobs
+from app.services.react_agent.config import react_agent_settings
+
+# 需要可写的 Postgres，例如 TEST_POSTGRES_URL=postgresql://postgres:@localhost:5432/postgres
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+_THREADS = ("retention-idle", "retention-stale", "retention-active")
+
+
+@pytest.fixture
+def saver(monkeypatch):
+    monkeypatch.setattr(type(settings), "postgres_url", property(lambda _: POSTGRES_URL))
+    monkeypatch.setattr(react_agent_settings, "checkpoint_retention_batch_pause", 0.0)
+    monkeypatch.setattr(react_agent_settings, "checkpoint_retention_vacuum", False)
+    with psycopg.connect(POSTGRES_URL, autocommit=True) as conn:
+        saver = PostgresSaver(conn)
+        saver.setup()
+        yield saver
+        for table in ("checkpoint_writes", "checkpoint_blobs", "checkpoints"):
+            conn.execute(f"delete from {table} where thread_id = any(%s)", (list(_THREADS),))
+
+
+def _put(saver: PostgresSaver, thread_id: str, days_ago: float) -> str:
+    checkpoint = empty_checkpoint()
+    # ts 总是当前时间：清理只依据 checkpoint_id 中的时间
+    checkpoint["id"] = jobs._min_checkpoint_id(datetime.now(UTC) - timedelta(days=days_ago))
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    saver.put(config, checkpoint, {}, {})
+    return checkpoint["id"]
+
+
+def test_checkpoint_id_round_trips_its_time() -> None:
+    ts = datetime(2026, 1, 2, 3, 4, 5, tzinfo=UTC)
+    assert jobs._checkpoint_time(jobs._min_checkpoint_id(ts)) == ts
+    assert jobs._min_checkpoint_id(ts) < jobs._min_checkpoint_id(ts + timedelta(seconds=1))
+
+
+def test_prune_checkpoints_uses_checkpoint_id_time(saver) -> None:
+    _put(saver, "retention-idle", days_ago=react_agent_settings.checkpoint_retention_idle_days + 1)
+    _put(saver, "retention-stale", days_ago=react_agent_settings.checkpoint_retention_prune_after_days + 2)
+    latest = _put(saver, "retention-stale", days_ago=react_agent_settings.checkpoint_retention_prune_after_days + 1)
+    _put(saver, "retention-active", days_ago=2)
+    _put(saver, "retention-active", days_ago=1)
+
+    jobs.prune_checkpoints()
+
+    rows = saver.conn.execute(
+        "select thread_id, checkpoint_id from checkpoints where thread_id = any(%s) order by thread_id, checkpoint_id",
+        (list(_THREADS),),
+    ).fetchall()
+    assert [row[0] for row in rows] == ["retention-active", "retention-active", "retention-stale"]
+    assert rows[-1][1] == latest
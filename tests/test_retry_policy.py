@@ -0,0 +1,109 @@
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.services.react_agent import service
+from app.services.react_agent.config import react_agent_settings
+from app.services.react_agent.resilience import Deadline, RetryBudget
+
+
+def _status_error(status_code: int, headers: dict[str, str] | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://upstream/query")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"{status_code}", request=request, response=response)
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(react_agent_settings, "retry_max_attempts", 3)
+    monkeypatch.setattr(react_agent_settings, "retry_backoff_base", 0.0)
+    monkeypatch.setattr(react_agent_settings, "retry_after_max", 1.0)
+    monkeypatch.setattr(service, "retry_budget", RetryBudget("test", max_tokens=10))
+
+
+def _flaky(errors: list[BaseException]):
+    calls = []
+
+    @service._retry_policy("test")
+    async def call(deadline: Deadline | None = None) -> str:
+        calls.append(time.monotonic())
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+
+    return call, calls
+
+
+def test_retries_server_errors_and_network_errors() -> None:
+    call, calls = _flaky([_status_error(503), httpx.ConnectError("refused")])
+    assert asyncio.run(call()) == "ok"
+    assert len(calls) == 3
+
+
+def test_stops_after_max_attempts() -> None:
+    call, calls = _flaky([_status_error(502)] * 5)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(call())
+    assert len(calls) == 3
+
+
+def test_does_not_retry_client_errors() -> None:
+    call, calls = _flaky([_status_error(400)])
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(call())
+    assert len(calls) == 1
+
+
+def test_waits_for_retry_after() -> None:
+    call, calls = _flaky([_status_error(429, {"Retry-After": "0.2"})])
+    assert asyncio.run(call()) == "ok"
+    assert calls[1] - calls[0] >= 0.2
+
+
+def test_gives_up_when_retry_after_exceeds_limit() -> None:
+    call, calls = _flaky([_status_error(429, {"Retry-After": "120"})])
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(call())
+    assert len(calls) == 1
+
+
+def test_gives_up_when_deadline_is_too_close() -> None:
+    call, calls = _flaky([_status_error(429, {"Retry-After": "0.5"})])
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(call(deadline=Deadline.after(0.2)))
+    assert len(calls) == 1
+
+
+def test_gives_up_when_retry_budget_is_exhausted(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(service, "retry_budget", RetryBudget("empty", ratio=0, min_retries_per_second=0, max_tokens=0))
+    call, calls = _flaky([_status_error(503)])
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(call())
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [({}, None), ({"Retry-After": "3"}, 3.0), ({"Retry-After": "-1"}, 0.0), ({"Retry-After": "soon"}, None)],
+)
+def test_parse_retry_after_seconds(headers: dict[str, str], expected: float | None) -> None:
+    assert service._retry_after(_status_error(429, headers)) == expected
+
+
+def test_parse_retry_after_http_date() -> None:
+    value = format_datetime(datetime.now(UTC) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= service._retry_after(_status_error(503, {"Retry-After": value})) <= 30
+
+
+def test_retry_budget_limits_retries_to_deposits() -> None:
+    budget = RetryBudget("test", ratio=0.5, min_retries_per_second=0, max_tokens=1)
+    assert budget.try_withdraw("faq")
+    assert not budget.try_withdraw("faq")
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_withdraw("faq")
+    assert not budget.try_withdraw("faq")
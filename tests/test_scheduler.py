@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from app.services.react_agent.scheduler import ThreadRunScheduler
+
+
+def test_messages_queued_behind_a_running_turn_are_coalesced() -> None:
+    scheduler = ThreadRunScheduler()
+    runs = []
+
+    async def run(message: str) -> str:
+        runs.append(message)
+        await asyncio.sleep(0.05)
+        return f"reply to {message!r}"
+
+    async def main() -> list[str]:
+        first = asyncio.create_task(scheduler.submit("t1", "a", run))
+        await asyncio.sleep(0.01)
+        rest = [asyncio.create_task(scheduler.submit("t1", message, run)) for message in ("b", "c")]
+        return await asyncio.gather(first, *rest)
+
+    assert asyncio.run(main()) == ["reply to 'a'", "reply to 'b\\nc'", "reply to 'b\\nc'"]
+    assert runs == ["a", "b\nc"]
+
+
+def test_coalesce_window_merges_burst_into_one_turn() -> None:
+    scheduler = ThreadRunScheduler(coalesce_window=0.05, max_batch_size=2)
+    runs = []
+
+    async def run(message: str) -> str:
+        runs.append(message)
+        return message
+
+    async def main() -> list[str]:
+        return await asyncio.gather(*(scheduler.submit("t1", message, run) for message in ("a", "b", "c")))
+
+    assert asyncio.run(main()) == ["a\nb", "a\nb", "c"]
+    assert runs == ["a\nb", "c"]
+
+
+def test_threads_run_concurrently() -> None:
+    scheduler = ThreadRunScheduler()
+    running = []
+    peak = []
+
+    async def run(message: str) -> str:
+        running.append(message)
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        running.remove(message)
+        return message
+
+    async def main() -> list[str]:
+        return await asyncio.gather(*(scheduler.submit(f"t{i}", f"m{i}", run) for i in range(3)))
+
+    assert asyncio.run(main()) == ["m0", "m1", "m2"]
+    assert max(peak) == 3
+
+
+def test_errors_reach_every_merged_request() -> None:
+    scheduler = ThreadRunScheduler(coalesce_window=0.02)
+
+    async def run(message: str) -> str:
+        raise RuntimeError(message)
+
+    async def main() -> list:
+        return await asyncio.gather(
+            *(scheduler.submit("t1", message, run) for message in ("a", "b")), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert [str(result) for result in results] == ["a\nb", "a\nb"]
+
+
+def test_caller_timeout_does_not_cancel_the_turn() -> None:
+    scheduler = ThreadRunScheduler()
+    finished = []
+
+    async def run(message: str) -> str:
+        await asyncio.sleep(0.05)
+        finished.append(message)
+        return message
+
+    async def main() -> None:
+        with pytest.raises(TimeoutError):
+            await scheduler.submit("t1", "a", run, timeout=0.01)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    assert finished == ["a"]
+
+
+def test_requests_with_different_merge_keys_are_not_coalesced() -> None:
+    scheduler = ThreadRunScheduler()
+    runs = []
+
+    def make_run(debug: bool):
+        async def run(message: str) -> tuple[str, bool]:
+            runs.append((message, debug))
+            await asyncio.sleep(0.02)
+            return message, debug
+
+        return run
+
+    async def main() -> list:
+        first = asyncio.create_task(scheduler.submit("t1", "a", make_run(False), merge_key=False))
+        await asyncio.sleep(0.01)
+        rest = [
+            asyncio.create_task(scheduler.submit("t1", message, make_run(debug), merge_key=debug))
+            for message, debug in (("b", True), ("c", True), ("d", False))
+        ]
+        return await asyncio.gather(first, *rest)
+
+    assert asyncio.run(main()) == [("a", False), ("b\nc", True), ("b\nc", True), ("d", False)]
+    assert runs == [("a", False), ("b\nc", True), ("d", False)]
+
+
+def test_scheduler_keeps_running_batches_referenced() -> None:
+    scheduler = ThreadRunScheduler()
+
+    async def run(message: str) -> str:
+        await asyncio.sleep(0.01)
+        return message
+
+    async def main() -> None:
+        request = asyncio.create_task(scheduler.submit("t1", "a", run))
+        await asyncio.sleep(0)
+        assert len(scheduler._tasks) == 1
+        await request
+        await asyncio.sleep(0)
+        assert not scheduler._tasks
+
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI
+
+from app.services.react_agent.deps import get_react_agent, get_thread_run_scheduler
+from app.services.react_agent.router import router
+from app.services.react_agent.scheduler import ThreadRunScheduler
+from tests.fakes import FakeChatModel, replies, tool_call
+
+
+def _collect(agent, message: str = "hi", thread_id: str = "t1") -> list[dict]:
+    async def main() -> list[dict]:
+        return [event async for event in agent.astream_tokens(message, thread_id)]
+
+    return asyncio.run(main())
+
+
+def _text(events: list[dict]) -> str:
+    """按客户端的处理方式拼接回复：reset 时丢弃此前的 token。"""
+    text = ""
+    for event in events:
+        if event["event"] == "reset":
+            text = ""
+        elif event["event"] == "token":
+            text += event["data"]["content"]
+    return text
+
+
+def test_tokens_are_streamed_between_tool_events(make_agent) -> None:
+    model = FakeChatModel(messages=replies(tool_call("lookup", query="price"), "Agent Q costs 1000"))
+    events = _collect(make_agent(model))
+
+    assert [event["event"] for event in events] == ["tool_start", "tool_end", "token", "token", "token", "token"]
+    assert events[0]["data"] == {"id": "call-1", "name": "lookup", "args": {"query": "price"}}
+    assert events[1]["data"] == {"id": "call-1", "name": "lookup", "status": "success"}
+    assert _text(events) == "Agent Q costs 1000"
+
+
+def test_reset_is_sent_when_backup_takes_over_mid_stream(make_agent) -> None:
+    primary = FakeChatModel(messages=replies("partial answer from primary"), stream_error_after=2)
+    backup = FakeChatModel(messages=replies("backup answer"))
+    events = _collect(make_agent(primary, backup_chat_model=backup))
+
+    assert [event["event"] for event in events] == ["token", "token", "reset", "token", "token"]
+    assert _text(events) == "backup answer"
+
+
+def test_sse_endpoint_reports_only_the_final_answer_as_done(make_agent) -> None:
+    primary = FakeChatModel(messages=replies("partial answer from primary"), stream_error_after=2)
+    agent = make_agent(primary, backup_chat_model=FakeChatModel(messages=replies("backup answer")))
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_react_agent] = lambda: agent
+    app.dependency_overrides[get_thread_run_scheduler] = ThreadRunScheduler
+
+    async def main() -> str:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post(
+                "/api/v1/react/chat/stream",
+                json={"message": "hi", "user_id": "u1", "platform": "web", "region": "海外", "thread_id": "t1"},
+            )
+        assert response.headers["content-type"].startswith("text/event-stream")
+        return response.text
+
+    body = asyncio.run(main())
+    events = [block.split("\n") for block in body.strip().split("\n\n")]
+    assert [lines[0] for lines in events] == [
+        "event: token", "event: token", "event: reset", "event: token", "event: token", "event: done"
+    ]
+    assert json.loads(events[-1][1].removeprefix("data: ")) == {"message": "backup answer", "thread_id": "t1"}
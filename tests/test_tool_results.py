@@ -0,0 +1,45 @@
+from app.services.react_agent.tool_results import ToolResultNormalizer
+
+
+def _normalizer(**kwargs) -> ToolResultNormalizer:
+    return ToolResultNormalizer(drop_fields=["score", "_id"], **kwargs)
+
+
+def test_duplicate_markdown_media_is_removed_entirely() -> None:
+    data = [
+        {"content": "图一 ![正面](https://cdn.test/a.jpg) 详见 [官网](https://vertu.test/p)"},
+        {"content": "再次出现 ![正面](https://cdn.test/a.jpg)\n[官网](https://vertu.test/p \"title\")\nhttps://cdn.test/a.jpg"},
+    ]
+    result = _normalizer().normalize("graph_query", data)
+    assert result == [
+        {"content": "图一 ![正面](https://cdn.test/a.jpg) 详见 [官网](https://vertu.test/p)"},
+        {"content": "再次出现"},
+    ]
+
+
+def test_drop_fields_apply_to_records_only() -> None:
+    data = {
+        "_id": "wrapper",
+        "data": [
+            {"_id": "1", "score": 0.9, "name": "Agent Q", "reviews": [{"score": 5, "text": "好"}]},
+            {"_id": "2", "name": "Quantum", "specs": {"score": "A+"}},
+        ],
+    }
+    result = _normalizer().normalize("get_product_price", data)
+    assert result == {
+        "data": [
+            {"name": "Agent Q", "reviews": [{"score": 5, "text": "好"}]},
+            {"name": "Quantum", "specs": {"score": "A+"}},
+        ]
+    }
+
+
+def test_faq_entries_are_deduped_and_capped() -> None:
+    data = [
+        {"question": "价格多少？", "answer": "a" * 40},
+        {"question": "价格 多少？", "answer": "duplicate"},
+        {"question": "保修多久？", "answer": "b" * 40},
+        {"question": "颜色有哪些？", "answer": "c" * 40},
+    ]
+    result = _normalizer(max_tokens={"faq_query": 60}).normalize("faq_query", data)
+    assert [item["question"] for item in result] == ["价格多少？", "保修多久？"]